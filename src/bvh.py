@@ -0,0 +1,231 @@
+# bvh.py
+# ------------------------------------------------------------
+#  BVH DE TRIÂNGULOS (construção e travessia vetorizadas)
+# ------------------------------------------------------------
+#  Os triângulos são ordenados por código de Morton e agrupados
+#  em folhas de LEAF_SIZE. A árvore é binária completa e implícita
+#  (nó i -> filhos 2i+1 e 2i+2), por isso cada nível constrói-se
+#  com uma única operação numpy e a travessia avança um nível de
+#  cada vez sobre toda a "fronteira" de nós atingidos.
+# ------------------------------------------------------------
+import numpy as np
+
+LEAF_SIZE = 8
+START_LEVEL = 3
+EPS = 1e-9
+
+_CHILDREN = np.array([1, 2])
+
+
+def _part1by2(x):
+    """Espalha 10 bits por posições múltiplas de 3 (Morton 3D)."""
+    x = x.astype(np.uint32) & 0x3FF
+    x = (x | (x << 16)) & 0x030000FF
+    x = (x | (x << 8)) & 0x0300F00F
+    x = (x | (x << 4)) & 0x030C30C3
+    x = (x | (x << 2)) & 0x09249249
+    return x
+
+
+def _morton_codes(points, lo, hi):
+    extent = np.maximum(hi - lo, EPS)
+    q = np.clip((points - lo) / extent * 1023.0, 0.0, 1023.0).astype(np.uint32)
+    return (_part1by2(q[:, 0]) << 2) | (_part1by2(q[:, 1]) << 1) | _part1by2(q[:, 2])
+
+
+class MeshBVH:
+    """BVH sobre um array de triângulos (T, 3, 3) em espaço local."""
+
+    def __init__(self, triangles, leaf_size=LEAF_SIZE):
+        tris = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+        n = len(tris)
+        self.leaf_size = leaf_size
+        self.count = n
+
+        if n == 0:
+            self.order = np.zeros(0, dtype=np.int64)
+            self.v0 = self.e1 = self.e2 = np.zeros((0, 3))
+            self.levels = 0
+            self.boxes = np.full((1, 2, 3), np.nan)
+            return
+
+        tmin = tris.min(axis=1)
+        tmax = tris.max(axis=1)
+        centroids = (tmin + tmax) * 0.5
+
+        codes = _morton_codes(centroids, centroids.min(axis=0), centroids.max(axis=0))
+        self.order = np.argsort(codes, kind="stable")
+
+        tris = tris[self.order]
+        tmin = tmin[self.order]
+        tmax = tmax[self.order]
+
+        # Dados pré-calculados para Möller–Trumbore
+        self.v0 = tris[:, 0]
+        self.e1 = tris[:, 1] - tris[:, 0]
+        self.e2 = tris[:, 2] - tris[:, 0]
+
+        # Folhas (número arredondado a uma potência de 2)
+        n_leaves = (n + leaf_size - 1) // leaf_size
+        levels = max(0, int(np.ceil(np.log2(n_leaves))))
+        p = 1 << levels
+        self.levels = levels
+
+        # Folhas de enchimento ficam com NaN: qualquer teste com elas falha
+        starts = np.arange(0, n, leaf_size)
+        boxes = np.full((2 * p - 1, 2, 3), np.nan)
+        boxes[p - 1:p - 1 + n_leaves, 0] = np.minimum.reduceat(tmin, starts, axis=0)
+        boxes[p - 1:p - 1 + n_leaves, 1] = np.maximum.reduceat(tmax, starts, axis=0)
+
+        # Níveis internos, de baixo para cima (fmin/fmax ignoram o enchimento)
+        width = p
+        while width > 1:
+            first = width - 1             # primeiro nó do nível atual
+            parent_first = width // 2 - 1
+            children = boxes[first:first + width].reshape(-1, 2, 2, 3)
+            parents = boxes[parent_first:parent_first + width // 2]
+            parents[:, 0] = np.fmin(children[:, 0, 0], children[:, 1, 0])
+            parents[:, 1] = np.fmax(children[:, 0, 1], children[:, 1, 1])
+            width //= 2
+
+        self.boxes = boxes
+
+    # ---------------------------------------------------------
+    # CONSULTAS
+    # ---------------------------------------------------------
+
+    @property
+    def bounds(self):
+        """AABB da raiz: (min, max)."""
+        return self.boxes[0, 0], self.boxes[0, 1]
+
+    def _slab(self, nodes, origin, inv_dir, t_max):
+        t = (self.boxes[nodes] - origin) * inv_dir      # (k, 2, 3)
+        t_near = t.min(axis=1).max(axis=1)
+        t_far = t.max(axis=1).min(axis=1)
+        return (t_near <= t_far) & (t_far >= 0.0) & (t_near <= t_max)
+
+    def intersect(self, origin, direction, t_max=np.inf):
+        """
+        Interseção raio/malha. Retorna (t, índice_triângulo) do impacto
+        mais próximo com t < t_max, ou None. O índice refere-se à ordem
+        original dos triângulos passados ao construtor.
+        """
+        if self.count == 0:
+            return None
+
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        # Componentes nulas -> inverso enorme mas finito (evita 0 * inf = nan)
+        safe = np.where(np.abs(direction) < 1e-30, 1e-30, direction)
+        inv_dir = 1.0 / safe
+
+        # Os primeiros níveis quase sempre passam: começa-se logo em START_LEVEL
+        level = min(self.levels, START_LEVEL)
+        nodes = np.arange((1 << level) - 1, (2 << level) - 1)
+        nodes = nodes[self._slab(nodes, origin, inv_dir, t_max)]
+
+        for _ in range(level, self.levels):
+            if len(nodes) == 0:
+                return None
+            nodes = (2 * nodes[:, None] + _CHILDREN).ravel()
+            nodes = nodes[self._slab(nodes, origin, inv_dir, t_max)]
+
+        if len(nodes) == 0:
+            return None
+
+        # Triângulos das folhas atingidas
+        leaves = nodes - ((1 << self.levels) - 1)
+        tri = (leaves[:, None] * self.leaf_size + np.arange(self.leaf_size)).ravel()
+        tri = tri[tri < self.count]
+
+        t = self._intersect_triangles(tri, origin, direction)
+        valid = (t > EPS) & (t < t_max)
+        if not valid.any():
+            return None
+
+        k = int(np.argmin(np.where(valid, t, np.inf)))
+        return float(t[k]), int(self.order[tri[k]])
+
+    def occluded(self, origins, directions, t_max=np.inf):
+        """
+        Teste de oclusão em lote: (R,) bool, True se o raio i atinge algum
+        triângulo com EPS < t < t_max. Desce a árvore um nível de cada vez
+        sobre todos os pares (raio, nó) ainda vivos.
+        """
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 3)
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+        hit = np.zeros(len(origins), dtype=bool)
+        if self.count == 0 or len(origins) == 0:
+            return hit
+        t_max = np.broadcast_to(np.asarray(t_max, dtype=np.float64), hit.shape)
+        safe = np.where(np.abs(directions) < 1e-30, 1e-30, directions)
+        inv_dir = 1.0 / safe
+
+        ray = np.arange(len(origins))
+        node = np.zeros(len(origins), dtype=np.int64)
+        for level in range(self.levels + 1):
+            t = (self.boxes[node] - origins[ray, None]) * inv_dir[ray, None]
+            t_near = t.min(axis=1).max(axis=1)
+            t_far = t.max(axis=1).min(axis=1)
+            keep = (t_near <= t_far) & (t_far >= 0.0) & (t_near <= t_max[ray])
+            ray, node = ray[keep], node[keep]
+            if level < self.levels:
+                ray = np.repeat(ray, 2)
+                node = (2 * node[:, None] + _CHILDREN).ravel()
+
+        # Pares (raio, triângulo) das folhas atingidas
+        leaves = node - ((1 << self.levels) - 1)
+        tri = (leaves[:, None] * self.leaf_size + np.arange(self.leaf_size)).ravel()
+        ray = np.repeat(ray, self.leaf_size)
+        valid = tri < self.count
+        tri, ray = tri[valid], ray[valid]
+
+        t = self._intersect_pairs(tri, origins[ray], directions[ray])
+        hit[ray[(t > EPS) & (t < t_max[ray])]] = True
+        return hit
+
+    def _intersect_pairs(self, tri, origins, directions):
+        """Möller–Trumbore com um raio por triângulo; devolve t (inf quando falha)."""
+        e1 = self.e1[tri]
+        e2 = self.e2[tri]
+        p = np.cross(directions, e2)
+        det = (e1 * p).sum(axis=1)
+        s = origins - self.v0[tri]
+        q = np.cross(s, e1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_det = 1.0 / det
+            u = (s * p).sum(axis=1) * inv_det
+            v = (directions * q).sum(axis=1) * inv_det
+            t = (e2 * q).sum(axis=1) * inv_det
+            hit = (np.abs(det) > EPS) & (u >= 0.0) & (v >= 0.0) & (u + v <= 1.0)
+        return np.where(hit, t, np.inf)
+
+    def _intersect_triangles(self, tri, origin, direction):
+        """Möller–Trumbore vetorizado; devolve t (inf quando falha)."""
+        e1 = self.e1[tri]
+        e2 = self.e2[tri]
+        dx, dy, dz = direction
+
+        # p = d x e2
+        p = np.empty_like(e2)
+        p[:, 0] = dy * e2[:, 2] - dz * e2[:, 1]
+        p[:, 1] = dz * e2[:, 0] - dx * e2[:, 2]
+        p[:, 2] = dx * e2[:, 1] - dy * e2[:, 0]
+        det = (e1 * p).sum(axis=1)
+
+        # q = s x e1
+        s = origin - self.v0[tri]
+        q = np.empty_like(s)
+        q[:, 0] = s[:, 1] * e1[:, 2] - s[:, 2] * e1[:, 1]
+        q[:, 1] = s[:, 2] * e1[:, 0] - s[:, 0] * e1[:, 2]
+        q[:, 2] = s[:, 0] * e1[:, 1] - s[:, 1] * e1[:, 0]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inv_det = 1.0 / det
+            u = (s * p).sum(axis=1) * inv_det
+            v = (q @ direction) * inv_det
+            t = (e2 * q).sum(axis=1) * inv_det
+
+        hit = (np.abs(det) > EPS) & (u >= 0.0) & (v >= 0.0) & (u + v <= 1.0)
+        return np.where(hit, t, np.inf)
@@ -0,0 +1,391 @@
+# capture.py
+# ------------------------------------------------------------
+#  CAPTURA ASSÍNCRONA (screenshots e vídeo) COM PBOs
+# ------------------------------------------------------------
+#  Um glReadPixels para memória de CPU espera que a GPU acabe o
+#  frame. Aqui a leitura vai para um anel de RING pixel buffer
+#  objects (GL_PIXEL_PACK_BUFFER): o glReadPixels só agenda a cópia
+#  e o buffer é mapeado RING-1 frames depois, quando a cópia já
+#  terminou. Os bytes seguem para fora da thread do GLUT:
+#    - PNG: pool de processos (compressão zlib em paralelo);
+#    - vídeo: uma thread escreve frames RGBA crus no stdin do
+#      ffmpeg (ou, sem ffmpeg, num ficheiro .rgba + .json).
+#  Se o encoder não acompanhar, o frame capturado é descartado
+#  (e contado) em vez de atrasar o render.
+#  O GL só é usado na thread do GLUT: close() (fecho da janela) ainda
+#  entrega o anel; shutdown() (atexit) só fecha o writer e os workers.
+#
+#  [ K ] screenshot   [ M ] começar / parar gravação
+#  python capture.py --bench    glReadPixels síncrono vs anel de PBOs
+# ------------------------------------------------------------
+import atexit
+import ctypes
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION.GL_1_0 import glReadPixels as _read_pixels_raw
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+RING = 3                        # PBOs no anel (mapeados RING-1 frames depois)
+OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "captures")
+VIDEO_FPS = 60
+PNG_WORKERS = 2
+MAX_PENDING = 6                 # frames à espera do encoder antes de descartar
+CLOSE_TIMEOUT = 5.0             # s à espera do encoder ao fechar a gravação
+FFMPEG_ARGS = ["-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p"]
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+_pbos = []
+_size = (0, 0)
+_slots = []                     # por PBO: None ou o destino do frame lá lido
+_index = 0
+_failed = False
+
+_shots_pending = 0
+_recording = None               # _VideoWriter ativo
+_png_pool = None
+_png_futures = []
+
+dropped = 0
+captured = 0
+
+
+# ---------------------------------------------------------
+# ENCODERS (fora da thread do GLUT)
+# ---------------------------------------------------------
+
+def _write_png(path, width, height, data):
+    """Corre num processo do pool: linhas de baixo para cima (GL) -> PNG."""
+    from PIL import Image
+    Image.frombuffer("RGBA", (width, height), data, "raw", "RGBA", 0, -1).save(path)
+    return path
+
+
+class _VideoWriter:
+    """Thread que escreve frames RGBA no stdin do ffmpeg (ou num .rgba cru)."""
+
+    def __init__(self, path_stem, width, height):
+        self.size = (width, height)
+        self.frames = 0
+        self.queue = queue.Queue(MAX_PENDING)
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg:
+            self.path = path_stem + ".mp4"
+            cmd = [ffmpeg, "-loglevel", "error", "-y",
+                   "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}",
+                   "-r", str(VIDEO_FPS), "-i", "-", "-vf", "vflip"] + FFMPEG_ARGS + [self.path]
+            self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+            self.out = self.process.stdin
+        else:
+            self.path = path_stem + ".rgba"
+            self.process = None
+            self.out = open(self.path, "wb")
+            with open(path_stem + ".json", "w") as f:
+                json.dump({"width": width, "height": height, "fps": VIDEO_FPS,
+                           "pix_fmt": "rgba", "rows": "bottom-up"}, f)
+        self.thread = threading.Thread(target=self._run, name="capture-video", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            data = self.queue.get()
+            if data is None:
+                break
+            try:
+                self.out.write(data)
+                self.frames += 1
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Video capture stopped: {e}")
+                break
+
+    def submit(self, data):
+        """False se a fila estiver cheia (o frame é descartado)."""
+        try:
+            self.queue.put_nowait(data)
+            return True
+        except queue.Full:
+            return False
+
+    def alive(self):
+        return self.thread.is_alive()
+
+    def close(self):
+        """Espera pelo que está na fila; com o encoder morto ou parado, descarta-o."""
+        if self.thread.is_alive():
+            try:
+                self.queue.put(None, timeout=CLOSE_TIMEOUT)
+            except queue.Full:
+                self._discard()
+                self.queue.put_nowait(None)
+            self.thread.join(CLOSE_TIMEOUT)
+        self._discard()
+        try:
+            self.out.close()
+        except OSError:
+            pass                    # pipe já partido: o ffmpeg saiu
+        if self.process is not None:
+            try:
+                self.process.wait(CLOSE_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+    def _discard(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+
+def _stamp():
+    return time.strftime("%Y%m%d-%H%M%S")
+
+
+# ---------------------------------------------------------
+# API (thread do GLUT)
+# ---------------------------------------------------------
+
+def screenshot():
+    """Pede um PNG do próximo frame."""
+    global _shots_pending
+    _shots_pending += 1
+
+
+def recording():
+    return _recording is not None
+
+
+def _stop_recording(drain):
+    global _recording
+    if isinstance(_recording, _VideoWriter):
+        if drain:
+            _drain()
+        _recording.close()
+        print(f"[CAPTURE] {_recording.frames} frames -> {_recording.path} ({dropped} dropped)")
+    _recording = None
+
+
+def toggle_recording():
+    global _recording
+    if _recording is None:
+        _recording = "start"        # o writer nasce no próximo frame, com o tamanho certo
+        return
+    _stop_recording(drain=True)
+
+
+def _ensure_pbos(width, height):
+    global _pbos, _size, _slots, _failed
+    if _pbos and _size == (width, height):
+        return True
+    if _failed:
+        return False
+    _drain()
+    try:
+        if _pbos:
+            glDeleteBuffers(len(_pbos), _pbos)
+        _pbos = list(np.atleast_1d(glGenBuffers(RING)))
+        for pbo in _pbos:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER, width * height * 4, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+    except Exception as e:
+        print(f"[WARN] PBO capture unavailable ({e})")
+        _failed = True
+        _pbos, _slots = [], []
+        return False
+    _size = (width, height)
+    _slots = [None] * RING
+    return True
+
+
+def _map(slot):
+    """Copia o conteúdo do PBO slot para bytes (a cópia da GPU já terminou)."""
+    width, height = _size
+    glBindBuffer(GL_PIXEL_PACK_BUFFER, _pbos[slot])
+    ptr = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+    data = None
+    if ptr:
+        data = ctypes.string_at(ptr, width * height * 4)
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+    glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+    return data
+
+
+def _deliver(targets, data):
+    global dropped, captured, _png_pool
+    width, height = _size
+    for target in targets:
+        if target == "video":
+            if isinstance(_recording, _VideoWriter) and _recording.size == (width, height):
+                if _recording.submit(data):
+                    captured += 1
+                else:
+                    dropped += 1
+            continue
+
+        # PNG
+        _png_futures[:] = [f for f in _png_futures if not f.done()]
+        if len(_png_futures) >= MAX_PENDING:
+            dropped += 1
+            continue
+        if _png_pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            _png_pool = ProcessPoolExecutor(max_workers=PNG_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        future = _png_pool.submit(_write_png, target, width, height, data)
+        future.add_done_callback(lambda f: print(f"[CAPTURE] Saved {f.result()}")
+                                 if f.exception() is None else
+                                 print(f"[WARN] Screenshot failed: {f.exception()}"))
+        _png_futures.append(future)
+        captured += 1
+
+
+def _drain():
+    """Entrega o que ainda está no anel (fim da gravação / mudança de tamanho)."""
+    for k in range(1, RING + 1):
+        slot = (_index + k) % RING
+        if _slots and _slots[slot]:
+            data = _map(slot)
+            if data is not None:
+                _deliver(_slots[slot], data)
+            _slots[slot] = None
+
+
+def frame_done(width, height):
+    """
+    Chamado antes do glutSwapBuffers (back buffer completo). Agenda a
+    leitura deste frame e entrega a do frame de há RING-1 frames.
+    """
+    global _recording, _index, _shots_pending
+    if _recording is None and not _shots_pending and not any(_slots):
+        return
+    if isinstance(_recording, _VideoWriter) and not _recording.alive():
+        _stop_recording(drain=False)        # encoder morreu: deixar de capturar (e de forçar frames)
+    if not _ensure_pbos(width, height):
+        _shots_pending = 0
+        if _recording is not None:
+            print("[WARN] Recording stopped: no PBO capture")
+            _stop_recording(drain=False)
+        return
+
+    if _recording == "start":
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        _recording = _VideoWriter(os.path.join(OUTPUT_DIR, f"video-{_stamp()}"), width, height)
+        print(f"[CAPTURE] Recording {width}x{height} -> {_recording.path}")
+
+    targets = []
+    if _recording is not None:
+        targets.append("video")
+    if _shots_pending:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        targets.append(os.path.join(OUTPUT_DIR, f"shot-{_stamp()}-{captured + dropped:05d}.png"))
+        _shots_pending -= 1
+
+    # Leitura deste frame: só agendada (destino = offset 0 do PBO)
+    if targets:
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, _pbos[_index])
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glReadBuffer(GL_BACK)
+        _read_pixels_raw(0, 0, width, height, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+    _slots[_index] = targets or None
+
+    # Frame mais antigo do anel: a cópia já acabou, mapear não bloqueia
+    _index = (_index + 1) % RING
+    if _slots[_index]:
+        data = _map(_index)
+        if data is not None:
+            _deliver(_slots[_index], data)
+        _slots[_index] = None
+
+
+def close():
+    """Fecho da janela (contexto GL ainda válido): entrega o anel e fecha a gravação."""
+    if _pbos:
+        _drain()
+    _stop_recording(drain=False)
+
+
+def shutdown():
+    """À saída, sem GL: fecha o writer (o que ficou no anel perde-se) e espera pelos PNGs."""
+    global _png_pool
+    _stop_recording(drain=False)
+    if _png_pool is not None:
+        _png_pool.shutdown(wait=True)
+        _png_pool = None
+
+
+atexit.register(shutdown)
+
+
+# ---------------------------------------------------------
+# BENCHMARK (precisa de janela)
+# ---------------------------------------------------------
+
+def benchmark(frames=240, width=1280, height=720):
+    """ms por frame de glReadPixels síncrono vs leitura pelo anel de PBOs."""
+    from OpenGL.GLUT import (glutInit, glutInitDisplayMode, glutInitWindowSize,
+                             glutCreateWindow, glutSwapBuffers, GLUT_DOUBLE, GLUT_RGB,
+                             GLUT_DEPTH)
+    global _recording
+    glutInit(sys.argv)
+    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
+    glutInitWindowSize(width, height)
+    glutCreateWindow(b"capture bench")
+
+    def fake_frame(i):
+        glClearColor((i % 60) / 60.0, 0.3, 0.5, 1.0)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+    results = {}
+    for mode in ("sync", "pbo"):
+        if mode == "pbo":
+            _recording = _NullWriter(width, height)
+        t0 = time.perf_counter()
+        for i in range(frames):
+            fake_frame(i)
+            if mode == "sync":
+                glReadPixels(0, 0, width, height, GL_RGBA, GL_UNSIGNED_BYTE)
+            else:
+                frame_done(width, height)
+            glutSwapBuffers()
+        glFinish()
+        results[mode] = (time.perf_counter() - t0) * 1000.0 / frames
+    _recording = None
+    print(f"[CAPTURE] {width}x{height}: glReadPixels {results['sync']:.2f} ms/frame, "
+          f"PBO ring {results['pbo']:.2f} ms/frame ({dropped} dropped)")
+
+
+class _NullWriter(_VideoWriter):
+    """Writer do benchmark: consome os frames sem os gravar."""
+
+    def __init__(self, width, height):
+        self.size = (width, height)
+        self.frames = 0
+        self.path = os.devnull
+        self.process = None
+        self.out = open(os.devnull, "wb")
+        self.queue = queue.Queue(MAX_PENDING)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        benchmark()
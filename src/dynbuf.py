@@ -0,0 +1,241 @@
+# dynbuf.py
+# ------------------------------------------------------------
+#  DADOS DINÂMICOS POR FRAME (ring buffer persistente + fences)
+# ------------------------------------------------------------
+#  Um só alocador para o que muda todos os frames (matrizes da frota,
+#  partículas, e o que vier: texto do HUD, linhas de debug, ...):
+#    block = dynbuf.alloc(n, 16)      # válido até ao fim do frame
+#    block.array[:] = ...             # vista numpy: escreve no buffer
+#    block.bind()                     # antes dos gl*Pointer
+#    glVertexAttribPointer(..., block.pointer(16 * k))
+#  Escrever sempre antes de bind(); depois do draw o bloco já não serve.
+#
+#  Persistente (GL 4.4 / ARB_buffer_storage): um buffer com FRAMES
+#  regiões, mapeado uma vez (PERSISTENT | COHERENT). Cada frame enche
+#  a sua região de forma linear e fecha-a com glFenceSync; a região só
+#  é reescrita FRAMES frames depois, depois de glClientWaitSync (que
+#  normalmente já encontra a fence sinalizada). Sem glBufferData por
+#  frame: nada de realocações nem cópias intermédias no driver.
+#  Fallback (contextos antigos ou --no-persistent): as vistas são de
+#  um array de CPU, o buffer é órfão no início do frame (glBufferData
+#  com None) e bind() envia o bloco com glBufferSubData.
+#  Um bloco que já não cabe na região vai para um buffer à parte,
+#  órfão a cada bind() (contado em stats["overflow"]).
+#
+#  python dynbuf.py   custo de CPU por frame dos dados da frota (sem GL)
+# ------------------------------------------------------------
+import ctypes
+import time
+
+import numpy as np
+from OpenGL.GL import *
+
+import transforms
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+persistent = None                # None = automático; False força o fallback
+
+FRAMES = 3                       # regiões no ring (frames em voo)
+REGION_BYTES = 8 << 20           # por frame (partículas cheias: 4 MB)
+ALIGN = 256                      # início de cada bloco (alinhamento de UBO/SSBO)
+FENCE_TIMEOUT_NS = 100_000_000   # espera máxima por uma região (100 ms)
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+_mode = None                     # None, "persistent" ou "orphan"
+_buffer = None
+_overflow_buffer = None
+_memory = None                   # uint8: vista do mapeamento ou array de CPU
+_fences = [None] * FRAMES
+_region = 0
+_head = 0
+
+# Estatísticas do último frame
+stats = {"mode": "-", "bytes": 0, "allocs": 0, "overflow": 0, "wait_ms": 0.0}
+
+
+class Allocation:
+    """Um bloco transitório: array (vista numpy) e onde está no buffer GL."""
+    __slots__ = ("array", "buffer", "offset", "nbytes", "_pending")
+
+    def __init__(self, raw, buffer, offset, pending):
+        self.array = raw
+        self.buffer = buffer
+        self.offset = offset
+        self.nbytes = raw.nbytes
+        self._pending = pending      # bytes por enviar (fallback / overflow)
+
+    def bind(self, target=GL_ARRAY_BUFFER):
+        glBindBuffer(target, self.buffer)
+        if self._pending is not None:
+            if self.buffer == _overflow_buffer:
+                glBufferData(target, self.nbytes, self._pending, GL_STREAM_DRAW)
+            else:
+                glBufferSubData(target, self.offset, self.nbytes, self._pending)
+            self._pending = None
+        return self
+
+    def pointer(self, byte_offset=0):
+        """Offset para gl*Pointer / glDrawElements com o buffer ligado."""
+        return ctypes.c_void_p(self.offset + byte_offset)
+
+
+def _check_persistent():
+    """glBufferStorage + fences: GL 4.4 ou ARB_buffer_storage."""
+    try:
+        version = glGetString(GL_VERSION) or b"0.0"
+        major, minor = (int(x) for x in version.split()[0].split(b".")[:2])
+        extensions = glGetString(GL_EXTENSIONS) or b""
+        return (major, minor) >= (4, 4) or b"GL_ARB_buffer_storage" in extensions
+    except Exception:
+        return False
+
+
+def _map_persistent(size):
+    """(buffer, vista uint8 do mapeamento) ou None."""
+    flags = GL_MAP_WRITE_BIT | GL_MAP_PERSISTENT_BIT | GL_MAP_COHERENT_BIT
+    buffer = glGenBuffers(1)
+    try:
+        glBindBuffer(GL_ARRAY_BUFFER, buffer)
+        glBufferStorage(GL_ARRAY_BUFFER, size, None, flags)
+        ptr = glMapBufferRange(GL_ARRAY_BUFFER, 0, size, flags)
+        address = getattr(ptr, "value", ptr)
+        if not address:
+            raise RuntimeError("glMapBufferRange returned NULL")
+    except Exception as e:
+        print(f"[WARN] Persistent mapping unavailable ({e})")
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glDeleteBuffers(1, [buffer])
+        return None
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    return buffer, np.ctypeslib.as_array((ctypes.c_ubyte * size).from_address(address))
+
+
+def _ensure():
+    global _mode, _buffer, _overflow_buffer, _memory
+    if _mode is not None:
+        return
+    mapped = None
+    if persistent is not False and _check_persistent():
+        mapped = _map_persistent(FRAMES * REGION_BYTES)
+    if mapped:
+        _buffer, _memory = mapped
+        _mode = "persistent"
+    else:
+        _buffer = glGenBuffers(1)
+        _memory = np.zeros(REGION_BYTES, dtype=np.uint8)
+        _mode = "orphan"
+    _overflow_buffer = glGenBuffers(1)
+    stats["mode"] = _mode
+    print(f"[DYNBUF] Per-frame buffers: {_mode} "
+          f"({FRAMES if _mode == 'persistent' else 1} x {REGION_BYTES >> 20} MB)")
+
+
+# ---------------------------------------------------------
+# API
+# ---------------------------------------------------------
+
+def begin_frame():
+    """Passa à região seguinte (esperando pela sua fence) ou torna o buffer órfão."""
+    global _region, _head
+    _ensure()
+    stats["allocs"] = stats["overflow"] = 0
+    _head = 0
+    if _mode == "persistent":
+        _region = (_region + 1) % FRAMES
+        fence = _fences[_region]
+        wait_ms = 0.0
+        if fence is not None:
+            t0 = time.perf_counter()
+            if glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, FENCE_TIMEOUT_NS) in (
+                    GL_TIMEOUT_EXPIRED, GL_WAIT_FAILED):
+                print("[WARN] Dynamic buffer region still in use by the GPU")
+            wait_ms = (time.perf_counter() - t0) * 1000.0
+            glDeleteSync(fence)
+            _fences[_region] = None
+        stats["wait_ms"] = wait_ms
+    else:
+        glBindBuffer(GL_ARRAY_BUFFER, _buffer)
+        glBufferData(GL_ARRAY_BUFFER, REGION_BYTES, None, GL_STREAM_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+
+def end_frame():
+    """Fence depois dos últimos comandos que leem a região deste frame."""
+    stats["bytes"] = _head
+    if _mode == "persistent":
+        _fences[_region] = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+
+
+def alloc(count, width=1, dtype=np.float32):
+    """Bloco (count, width) de dtype válido até ao fim do frame -> Allocation."""
+    global _head
+    _ensure()
+    dtype = np.dtype(dtype)
+    nbytes = count * width * dtype.itemsize
+    start = (_head + ALIGN - 1) // ALIGN * ALIGN
+    stats["allocs"] += 1
+
+    if start + nbytes <= REGION_BYTES:
+        _head = start + nbytes
+        if _mode == "persistent":
+            offset = _region * REGION_BYTES + start
+            raw = _memory[offset:offset + nbytes]
+            block = Allocation(raw, _buffer, offset, None)
+        else:
+            raw = _memory[start:start + nbytes]
+            block = Allocation(raw, _buffer, start, raw)
+    else:
+        stats["overflow"] += 1
+        raw = np.empty(nbytes, dtype=np.uint8)
+        block = Allocation(raw, _overflow_buffer, 0, raw)
+
+    array = raw.view(dtype)
+    block.array = array.reshape(count, width) if width > 1 else array
+    return block
+
+
+# ---------------------------------------------------------
+# BENCHMARK (sem GL)
+# ---------------------------------------------------------
+
+def benchmark(counts=(64, 1024, 16384), frames=300):
+    """
+    Matrizes de instância da frota, por frame: to_gl_batch + a cópia que
+    glBufferData faz, contra escrever a transposta direto no bloco (a
+    memória mapeada é simulada por um array de CPU).
+    """
+    global _mode, _memory, _buffer, _overflow_buffer, _head
+    _mode, _buffer, _overflow_buffer = "persistent", 0, -1
+    _memory = np.zeros(FRAMES * REGION_BYTES, dtype=np.uint8)
+    driver = np.empty(REGION_BYTES, dtype=np.uint8)
+
+    print(f"[DYNBUF] per-frame instance data, {frames} frames (CPU only)")
+    for n in counts:
+        mats = transforms.translate_batch(np.random.default_rng(n).random((n, 3)))
+
+        t0 = time.perf_counter()
+        for _ in range(frames):
+            data = transforms.to_gl_batch(mats)
+            driver[:data.nbytes] = data.view(np.uint8).reshape(-1)      # glBufferData
+        copy_ms = (time.perf_counter() - t0) * 1000.0 / frames
+
+        t0 = time.perf_counter()
+        for _ in range(frames):
+            _head = 0                   # begin_frame() sem a fence
+            block = alloc(n, 16)
+            block.array.reshape(n, 4, 4)[:] = mats.transpose(0, 2, 1)
+        ring_ms = (time.perf_counter() - t0) * 1000.0 / frames
+
+        print(f"  {n:6d} instances: bufferData {copy_ms:7.3f} ms   ring {ring_ms:7.3f} ms "
+              f"({copy_ms / ring_ms:4.1f}x)")
+    _mode = None
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,236 @@
+# dynres.py
+# ------------------------------------------------------------
+#  RESOLUÇÃO DINÂMICA (escala do render 3D para manter o frame time)
+# ------------------------------------------------------------
+#  A cena 3D é desenhada num FBO do tamanho da janela, mas só numa
+#  sub-região de (largura * escala) x (altura * escala); no fim essa
+#  região é ampliada para a janela com glBlitFramebuffer (filtro
+#  linear). Assim mudar a escala não realoca nada. O HUD é desenhado
+#  depois, diretamente na janela, à resolução nativa.
+#
+#  A escala é ajustada a cada frame por um controlador: o custo de
+#  preenchimento é proporcional a escala², por isso a escala desejada
+#  é escala * sqrt(alvo / medido), aplicada com ganho e zona morta
+#  para não oscilar. A medida é o tempo de GPU da cena (GL_TIME_ELAPSED,
+#  lido sem bloquear) ou, sem timer queries, o intervalo entre frames.
+# ------------------------------------------------------------
+import time
+from math import sqrt
+
+from OpenGL.GL import *
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+enabled = False
+
+TARGET_MS = 16.7          # frame time alvo
+MIN_SCALE = 0.5
+MAX_SCALE = 1.0
+GAIN = 0.25               # fração da correção aplicada por frame
+DEADBAND = 0.05           # erro relativo tolerado sem mexer na escala
+SMOOTH = 0.2              # média exponencial da medida
+
+QUERY_RING = 3            # timer queries em voo (resultados lidos 1-2 frames depois)
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+scale = 1.0
+frame_ms = TARGET_MS      # medida suavizada
+error_ms = 0.0            # frame_ms - TARGET_MS (HUD)
+source = "cpu"            # "gpu" (timer query) ou "cpu" (intervalo entre frames)
+
+_window = (1, 1)
+_fbo = None
+_color_rb = None
+_depth_rb = None
+_fbo_size = (0, 0)
+_failed = False
+
+_queries = []
+_query_pending = []
+_query_index = 0
+_timer_supported = None
+_last_frame_time = None
+_active = False           # begin_scene() ligou o FBO neste frame
+
+
+def resize(w, h):
+    """Tamanho da janela (chamado por scene.reshape)."""
+    global _window
+    _window = (max(1, w), max(1, h))
+
+
+def window_size():
+    """Tamanho do FBO (e da janela): o máximo que o viewport reduzido ocupa."""
+    return _window
+
+
+def toggle():
+    global enabled, scale
+    enabled = not enabled
+    scale = 1.0
+    print(f"[DYNRES] Dynamic resolution: {'ON' if enabled else 'OFF'} (target {TARGET_MS:.1f} ms)")
+
+
+def scaled_size():
+    w, h = _window
+    return max(1, int(w * scale)), max(1, int(h * scale))
+
+
+# ---------------------------------------------------------
+# CONTROLADOR
+# ---------------------------------------------------------
+
+def control(measured_ms):
+    """Atualiza a escala a partir de uma medida de frame time (ms)."""
+    global scale, frame_ms, error_ms
+    frame_ms += (measured_ms - frame_ms) * SMOOTH
+    error_ms = frame_ms - TARGET_MS
+    if abs(error_ms) <= DEADBAND * TARGET_MS:
+        return scale
+    desired = scale * sqrt(TARGET_MS / max(frame_ms, 1e-3))
+    scale = min(MAX_SCALE, max(MIN_SCALE, scale + (desired - scale) * GAIN))
+    return scale
+
+
+# ---------------------------------------------------------
+# RECURSOS GL
+# ---------------------------------------------------------
+
+def _ensure_fbo():
+    global _fbo, _color_rb, _depth_rb, _fbo_size, _failed
+    if _fbo_size == _window and _fbo is not None:
+        return True
+    try:
+        if _fbo is None:
+            _fbo = glGenFramebuffers(1)
+            _color_rb, _depth_rb = glGenRenderbuffers(2)
+        w, h = _window
+        glBindRenderbuffer(GL_RENDERBUFFER, _color_rb)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, w, h)
+        glBindRenderbuffer(GL_RENDERBUFFER, _depth_rb)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH24_STENCIL8, w, h)
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+        glBindFramebuffer(GL_FRAMEBUFFER, _fbo)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, _color_rb)
+        glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_STENCIL_ATTACHMENT, GL_RENDERBUFFER, _depth_rb)
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError(f"framebuffer incomplete (0x{status:x})")
+        _fbo_size = _window
+        return True
+    except Exception as e:
+        print(f"[WARN] Dynamic resolution unavailable: {e}")
+        _failed = True
+        return False
+
+
+def _ensure_queries():
+    global _timer_supported, _queries, _query_pending
+    if _timer_supported is None:
+        try:
+            _queries = list(glGenQueries(QUERY_RING))
+            _query_pending = [False] * QUERY_RING
+            _timer_supported = True
+        except Exception:
+            _timer_supported = False
+    return _timer_supported
+
+
+def _read_timers():
+    """Último tempo de GPU disponível (ms), sem esperar; None se nenhum pronto."""
+    result = None
+    for i, q in enumerate(_queries):
+        if _query_pending[i] and glGetQueryObjectuiv(q, GL_QUERY_RESULT_AVAILABLE):
+            result = glGetQueryObjectui64v(q, GL_QUERY_RESULT) / 1e6
+            _query_pending[i] = False
+    return result
+
+
+# ---------------------------------------------------------
+# FRAME
+# ---------------------------------------------------------
+
+def skip_interval():
+    """O próximo intervalo entre frames não conta (render a pedido a acordar)."""
+    global _last_frame_time
+    _last_frame_time = None
+
+
+def begin_scene():
+    """Antes do render 3D: liga o FBO com o viewport reduzido."""
+    global _active, _query_index, _last_frame_time, source
+    _active = False
+
+    now = time.perf_counter()
+    cpu_ms = None if _last_frame_time is None else (now - _last_frame_time) * 1000.0
+    _last_frame_time = now
+
+    if not enabled or _failed or not _ensure_fbo():
+        return
+
+    gpu_ms = _read_timers() if _ensure_queries() else None
+    if gpu_ms is not None:
+        source = "gpu"
+        control(gpu_ms)
+    elif cpu_ms is not None and not _timer_supported:
+        source = "cpu"
+        control(cpu_ms)
+
+    glBindFramebuffer(GL_FRAMEBUFFER, _fbo)
+    sw, sh = scaled_size()
+    glViewport(0, 0, sw, sh)
+
+    if _timer_supported and not _query_pending[_query_index]:
+        glBeginQuery(GL_TIME_ELAPSED, _queries[_query_index])
+        _active = "timed"
+    else:
+        _active = True
+
+
+def end_scene():
+    """Depois do render 3D: amplia a região para a janela e volta ao framebuffer 0."""
+    global _active, _query_index
+    if not _active:
+        return
+
+    if _active == "timed":
+        glEndQuery(GL_TIME_ELAPSED)
+        _query_pending[_query_index] = True
+        _query_index = (_query_index + 1) % QUERY_RING
+
+    w, h = _window
+    sw, sh = scaled_size()
+    glBindFramebuffer(GL_READ_FRAMEBUFFER, _fbo)
+    glBindFramebuffer(GL_DRAW_FRAMEBUFFER, 0)
+    glBlitFramebuffer(0, 0, sw, sh, 0, 0, w, h, GL_COLOR_BUFFER_BIT, GL_LINEAR)
+    glBindFramebuffer(GL_FRAMEBUFFER, 0)
+    glViewport(0, 0, w, h)
+    _active = False
+
+
+def hud_text():
+    if not enabled:
+        return "Resolucao: 100% (dinamica OFF)"
+    return (f"Resolucao: {scale * 100:.0f}%  {frame_ms:.1f} ms "
+            f"(erro {error_ms:+.1f} ms, {source})")
+
+
+# ---------------------------------------------------------
+# SIMULAÇÃO DO CONTROLADOR (sem GL)
+# ---------------------------------------------------------
+
+if __name__ == "__main__":
+    # Custo sintético: 4 ms fixos + 30 ms de preenchimento à escala 1
+    cost = lambda s: 4.0 + 30.0 * s * s
+    for frame in range(60):
+        control(cost(scale))
+        if frame % 6 == 0:
+            print(f"[DYNRES] frame {frame:2d}: scale {scale:.3f}  "
+                  f"{frame_ms:5.1f} ms  error {error_ms:+5.1f} ms")
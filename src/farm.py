@@ -1,41 +1,143 @@
 # farm.py
 from OpenGL.GL import *
 
+import numpy as np
+
+import occlusion
+import transforms
+
 # Lista de objetos estáticos:
-# { "meshes", "materials", "pos", "yaw", "scale" }
+# { "uid", "name", "meshes", "materials", "pos", "yaw", "scale",
+#   "occluder", "matrix", "bounds", "world_bounds", "lightmap" }
 _farm_objects = []
+_next_uid = 0
+
 
+def _local_bounds(meshes):
+    bounds = [mesh.bounds() for mesh in meshes.values()]
+    if not bounds:
+        return np.zeros(3), np.zeros(3)
+    return (np.min([b[0] for b in bounds], axis=0),
+            np.max([b[1] for b in bounds], axis=0))
 
-def add_object(meshes, materials, pos=(0.0, 0.0, 0.0), yaw=0.0, scale=1.0):
-    """Regista um OBJ estático na cena."""
-    _farm_objects.append({
+
+def add_object(meshes, materials, pos=(0.0, 0.0, 0.0), yaw=0.0, scale=1.0, name=None,
+               occluder=False):
+    """
+    Regista um OBJ estático na cena. Retorna o objeto (usado em remove_object).
+    Oclusores (objetos grandes, ex.: a casa) são desenhados antes dos restantes.
+    """
+    global _next_uid
+    matrix = transforms.object_matrix(pos, yaw, scale)
+    bounds = _local_bounds(meshes)
+    obj = {
+        "uid": _next_uid,
+        "name": name or "object",
         "meshes": meshes,
         "materials": materials,
         "pos": pos,
         "yaw": yaw,
         "scale": scale,
-    })
-
-
-def draw():
-    """Desenha todos os objetos registados na quinta."""
-    for obj in _farm_objects:
-        meshes    = obj["meshes"]
-        materials = obj["materials"]
-        x, y, z   = obj["pos"]
-        yaw       = obj["yaw"]
-        s         = obj["scale"]
-
-        glPushMatrix()
-        glTranslatef(x, y, z)
-        
-        if yaw != 0.0:
-            glRotatef(yaw, 0.0, 1.0, 0.0)
-        
-        if s != 1.0:
-            glScalef(s, s, s)
+        "occluder": occluder,
+        "matrix": matrix,
+        "bounds": bounds,
+        "world_bounds": occlusion.world_bounds(matrix, bounds),
+        "lightmap": None,
+    }
+    _next_uid += 1
+    _farm_objects.append(obj)
+    return obj
+
+
+def remove_object(obj):
+    """Retira da cena um objeto devolvido por add_object."""
+    # Comparação por identidade (os dicts contêm arrays numpy)
+    for i, o in enumerate(_farm_objects):
+        if o is obj:
+            del _farm_objects[i]
+            return
+
+
+def set_lightmap(obj, lm):
+    """Associa (ou retira, com None) o lightmap.Lightmap de um objeto."""
+    if obj["lightmap"] is not None:
+        obj["lightmap"].free_gl()
+    obj["lightmap"] = lm
+
+
+def replace_meshes(obj, meshes, materials):
+    """Troca a geometria de um objeto já registado (hot-reload)."""
+    set_lightmap(obj, None)     # o bake era da geometria antiga
+    obj["meshes"] = meshes
+    obj["materials"] = materials
+    obj["bounds"] = _local_bounds(meshes)
+    obj["world_bounds"] = occlusion.world_bounds(obj["matrix"], obj["bounds"])
+
+
+def pick_targets():
+    """(nome_objeto, nome_parte, mesh, matriz_mundo) de cada parte selecionável."""
+    for i, obj in enumerate(_farm_objects):
+        label = f"{obj['name']}#{i}"
+        for name, mesh in obj["meshes"].items():
+            yield label, name, mesh, obj["matrix"]
 
+
+def _draw_object(obj):
+    meshes    = obj["meshes"]
+    materials = obj["materials"]
+    x, y, z   = obj["pos"]
+    yaw       = obj["yaw"]
+    s         = obj["scale"]
+
+    glPushMatrix()
+    glTranslatef(x, y, z)
+    
+    if yaw != 0.0:
+        glRotatef(yaw, 0.0, 1.0, 0.0)
+    
+    if s != 1.0:
+        glScalef(s, s, s)
+
+    lm = obj["lightmap"]
+    if lm is None:
         for name, mesh in meshes.items():
             mesh.draw(materials)
+    else:
+        lm.begin()
+        for name, mesh in meshes.items():
+            if lm.covers(name):
+                lm.draw(name, mesh, materials)
+        lm.end()
+        for name, mesh in meshes.items():
+            if not lm.covers(name):
+                mesh.draw(materials)
+
+    glPopMatrix()
+
+
+def objects():
+    """Cópia da lista de objetos registados (lida por frame_pipeline noutra thread)."""
+    return tuple(_farm_objects)
+
+
+def draw(order=None):
+    """
+    Desenha todos os objetos registados na quinta (oclusores primeiro).
+    order: (oclusores, restantes) já filtrados pelo frustum e ordenados
+    por frame_pipeline; objetos entretanto retirados são ignorados.
+    """
+    if order is None:
+        occluders = [obj for obj in _farm_objects if obj["occluder"]]
+        others = [obj for obj in _farm_objects if not obj["occluder"]]
+    else:
+        live = {id(obj) for obj in _farm_objects}
+        occluders = [obj for obj in order[0] if id(obj) in live]
+        others = [obj for obj in order[1] if id(obj) in live]
+
+    for obj in occluders:
+        _draw_object(obj)
 
-        glPopMatrix()
\ No newline at end of file
+    visible = occlusion.test_objects(others)
+    for obj, vis in zip(others, visible):
+        if vis:
+            _draw_object(obj)
\ No newline at end of file
@@ -0,0 +1,416 @@
+# fleet.py
+# ------------------------------------------------------------
+#  FROTA DE TRATORES (struct-of-arrays, passo vetorizado em numpy)
+# ------------------------------------------------------------
+#  O estado de todos os veículos vive em arrays paralelos e é
+#  avançado de uma só vez, com a mesma física de tractor.update().
+#  O elemento 0 é o trator do jogador (espelhado de tractor.py);
+#  os restantes trabalham campos em vai-e-vem com um piloto
+#  automático. O desenho é instanciado: uma chamada por parte e
+#  material para a frota inteira.
+# ------------------------------------------------------------
+import sys
+import time
+
+import numpy as np
+from OpenGL.GL import *
+
+import dynbuf
+import tractor
+import transforms
+import gpu_mesh
+from gpu_mesh import GpuMesh
+from shaders import compile_program, Uniforms, LIT_FRAGMENT_SRC, DEQUANT_GLSL
+from tractor import (BASE_SPEED, MAX_STEER_DEG, STEER_SPEED_DEG, WHEEL_BASE,
+                     BACK_SPIN_PER_UNIT, FRONT_SPIN_PER_UNIT, DOOR_SPEED_DEG,
+                     DEG2RAD, RAD2DEG)
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+FIELD_LEG_TIME = 12.0       # segundos em linha reta antes de cada volta
+FIELD_SPACING = 14.0        # distância entre tratores na grelha inicial
+FIELD_ORIGIN = (-180.0, -180.0)
+
+# Localização dos atributos da matriz por instância (4 x vec4)
+INSTANCE_ATTRIB = 10
+
+
+class Fleet:
+    """Estado de N tratores em arrays (struct-of-arrays)."""
+
+    def __init__(self, n, seed=0):
+        self.n = n
+        self.ai = slice(1, None)    # simulados aqui; o 0 (jogador) vem de sync_player()
+
+        # Transformação mundo
+        self.pos_x = np.zeros(n)
+        self.pos_z = np.zeros(n)
+        self.dir_angle = np.full(n, 90.0)
+
+        # Rodas e direção
+        self.wheel_spin_back = np.zeros(n)
+        self.wheel_spin_front = np.zeros(n)
+        self.steer_angle = np.zeros(n)
+
+        # Portas
+        self.door_left_angle = np.zeros(n)
+        self.door_right_angle = np.zeros(n)
+        self.door_left_target = np.zeros(n)
+        self.door_right_target = np.zeros(n)
+
+        # Comandos (o que seriam as setas de cada trator)
+        self.forward = np.zeros(n, dtype=bool)
+        self.back = np.zeros(n, dtype=bool)
+        self.left = np.zeros(n, dtype=bool)
+        self.right = np.zeros(n, dtype=bool)
+
+        # Piloto automático
+        rng = np.random.default_rng(seed)
+        self._leg_timer = rng.uniform(0.0, FIELD_LEG_TIME, n)
+        self._turning = np.zeros(n, dtype=bool)
+        self._turn_start = np.zeros(n)
+        self._turn_sign = np.where(rng.random(n) < 0.5, -1.0, 1.0)
+
+        # Grelha de campos
+        cols = max(1, int(np.ceil(np.sqrt(n))))
+        idx = np.arange(n)
+        self.pos_x[:] = FIELD_ORIGIN[0] + (idx % cols) * FIELD_SPACING
+        self.pos_z[:] = FIELD_ORIGIN[1] + (idx // cols) * FIELD_SPACING
+
+    # ---------------------------------------------------------
+    # SIMULAÇÃO
+    # ---------------------------------------------------------
+
+    def autopilot(self, dt):
+        """Vai-e-vem: reta durante FIELD_LEG_TIME, volta de 180° a fundo, repetir."""
+        a = self.ai
+        turning, timer = self._turning[a], self._leg_timer[a]      # vistas
+        turn_start, turn_sign, dir_angle = self._turn_start[a], self._turn_sign[a], self.dir_angle[a]
+
+        straight = ~turning
+        timer[straight] -= dt
+
+        start = straight & (timer <= 0.0)
+        turning[start] = True
+        turn_start[start] = dir_angle[start]
+
+        done = turning & (np.abs(dir_angle - turn_start) >= 180.0)
+        turning[done] = False
+        timer[done] = FIELD_LEG_TIME
+        turn_sign[done] *= -1.0
+
+        self.forward[a] = True
+        self.back[a] = False
+        self.left[a] = turning & (turn_sign < 0.0)
+        self.right[a] = turning & (turn_sign > 0.0)
+
+    def step(self, dt):
+        """tractor.update() para todos os veículos (menos o jogador) de uma vez."""
+        a = self.ai
+        left, right = self.left[a], self.right[a]
+
+        # 1. Velocidade linear
+        v = BASE_SPEED * (self.forward[a].astype(np.float64) - self.back[a])
+        dist = v * dt
+
+        # 2. Direção (com auto-centrar)
+        steer_step = STEER_SPEED_DEG * dt
+        steer = self.steer_angle[a]
+        steer = np.where(left, np.maximum(steer - steer_step, -MAX_STEER_DEG), steer)
+        steer = np.where(right, np.minimum(steer + steer_step, MAX_STEER_DEG), steer)
+        center = ~left & ~right
+        steer = np.where(center & (steer > 0.0), np.maximum(0.0, steer - steer_step), steer)
+        steer = np.where(center & (steer < 0.0), np.minimum(0.0, steer + steer_step), steer)
+        self.steer_angle[a] = steer
+
+        # 3. Yaw (modelo de bicicleta)
+        turning = (np.abs(dist) > 1e-5) & (np.abs(steer) > 1e-3)
+        if WHEEL_BASE > 1e-4 and turning.any():
+            tan_steer = np.tan(np.where(turning, steer, 1.0) * DEG2RAD)
+            delta_yaw = dist * tan_steer / WHEEL_BASE
+            self.dir_angle[a] += np.where(turning, delta_yaw * RAD2DEG, 0.0)
+
+        # 4. Nova posição
+        heading = self.dir_angle[a] * DEG2RAD
+        self.pos_x[a] -= dist * np.cos(heading)
+        self.pos_z[a] -= dist * np.sin(heading)
+
+        # 5. Rotação das rodas
+        self.wheel_spin_back[a] += BACK_SPIN_PER_UNIT * dist
+        self.wheel_spin_front[a] += FRONT_SPIN_PER_UNIT * dist
+
+        # 6. Portas
+        door_step = DOOR_SPEED_DEG * dt
+        self.door_left_angle[a] = _approach(self.door_left_angle[a], self.door_left_target[a], door_step)
+        self.door_right_angle[a] = _approach(self.door_right_angle[a], self.door_right_target[a],
+                                             door_step)
+
+    def sync_player(self):
+        """Elemento 0 = estado atual de tractor.py."""
+        self.pos_x[0] = tractor.pos_x
+        self.pos_z[0] = tractor.pos_z
+        self.dir_angle[0] = tractor.dir_angle
+        self.steer_angle[0] = tractor.steer_angle
+        self.wheel_spin_back[0] = tractor.wheel_spin_back
+        self.wheel_spin_front[0] = tractor.wheel_spin_front
+        self.door_left_angle[0] = tractor.door_left_angle
+        self.door_right_angle[0] = tractor.door_right_angle
+
+    # ---------------------------------------------------------
+    # MATRIZES POR INSTÂNCIA
+    # ---------------------------------------------------------
+
+    def world_matrices(self):
+        """Igual a tractor.model_matrix(), para todos: (N, 4, 4)."""
+        n = self.n
+        pos = np.stack((self.pos_x, np.full(n, 4.0), self.pos_z), axis=1)
+        return (transforms.translate_batch(pos)
+                @ transforms.rotate(180.0, 1.0, 0.0, 0.0)
+                @ transforms.rotate_batch(self.dir_angle, 0.0, 1.0, 0.0))
+
+    def part_matrices(self, name):
+        """Igual a tractor.part_matrix(name), para todos; None = identidade."""
+        if tractor._is_left_door(name):
+            return transforms.about_pivot(tractor.LEFT_DOOR_PIVOT, transforms.rotate_batch(
+                tractor.LEFT_DOOR_SIGN * self.door_left_angle, 0.0, 1.0, 0.0))
+        if tractor._is_right_door(name):
+            return transforms.about_pivot(tractor.RIGHT_DOOR_PIVOT, transforms.rotate_batch(
+                tractor.RIGHT_DOOR_SIGN * self.door_right_angle, 0.0, 1.0, 0.0))
+        if "glass" in name.lower():
+            return None
+        if tractor._is_steering_wheel(name):
+            return transforms.about_pivot(tractor.STEERING_WHEEL_PIVOT, transforms.rotate_batch(
+                self.steer_angle * tractor.STEERING_WHEEL_FACTOR, *tractor.STEERING_AXIS))
+        if tractor._is_back_wheels(name):
+            return transforms.about_pivot(tractor.BACK_WHEELS_PIVOT, transforms.rotate_batch(
+                -self.wheel_spin_back, 0.0, 0.0, 1.0))
+        if tractor._is_front_wheels(name):
+            steer = transforms.about_pivot(tractor.FRONT_WHEELS_PIVOT, transforms.rotate_batch(
+                self.steer_angle, 0.0, 1.0, 0.0))
+            spin = transforms.about_pivot(tractor.FRONT_WHEELS_PIVOT, transforms.rotate_batch(
+                -self.wheel_spin_front, 0.0, 0.0, 1.0))
+            return steer @ spin
+        return None
+
+
+# Variáveis de pose (o que world_matrices / part_matrices leem)
+_POSE_FIELDS = ("pos_x", "pos_z", "dir_angle", "steer_angle", "wheel_spin_back",
+                "wheel_spin_front", "door_left_angle", "door_right_angle")
+
+
+class FleetPose:
+    """Cópia da pose da frota num passo (frame_pipeline: desenhar o snapshot)."""
+    __slots__ = ("n",) + _POSE_FIELDS
+
+    world_matrices = Fleet.world_matrices
+    part_matrices = Fleet.part_matrices
+
+    def __init__(self, fleet):
+        self.n = fleet.n
+        for name in _POSE_FIELDS:
+            setattr(self, name, getattr(fleet, name).copy())
+
+
+def _approach(value, target, step):
+    return np.where(value < target, np.minimum(value + step, target),
+                    np.maximum(value - step, target))
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL (frota ativa na cena)
+# ---------------------------------------------------------
+_fleet = None
+
+_program = None
+_uniforms = None
+_gpu_parts = {}             # nome da parte -> GpuMesh
+_gpu_source = None          # tractor_parts usado para criar _gpu_parts
+
+
+def init(n, seed=0):
+    """Ativa uma frota de n tratores (o elemento 0 é o jogador)."""
+    global _fleet
+    _fleet = Fleet(n, seed)
+    _fleet.sync_player()
+    print(f"[FLEET] {n} tractors")
+
+
+def parse_args(argv):
+    """--fleet N -> N, ou None sem a opção; um N em falta ou inválido mostra o uso e sai."""
+    if "--fleet" not in argv:
+        return None
+    i = argv.index("--fleet")
+    if i + 1 < len(argv) and argv[i + 1].isdigit() and int(argv[i + 1]) >= 1:
+        return int(argv[i + 1])
+    print("usage: python main.py --fleet N   (N = number of tractors, at least 1)")
+    sys.exit(2)
+
+
+def active():
+    return _fleet is not None and _fleet.n > 1
+
+
+def pose():
+    """FleetPose do passo atual, ou None sem frota."""
+    return FleetPose(_fleet) if active() else None
+
+
+def update(dt):
+    if _fleet is None:
+        return
+    _fleet.autopilot(dt)
+    _fleet.step(dt)
+    _fleet.sync_player()
+
+
+# ---------------------------------------------------------
+# DESENHO INSTANCIADO
+# ---------------------------------------------------------
+
+_INSTANCED_VERTEX_SRC = """
+#version 120
+attribute vec4 inst_m0;
+attribute vec4 inst_m1;
+attribute vec4 inst_m2;
+attribute vec4 inst_m3;
+
+varying vec3 v_normal;
+varying vec3 v_pos;
+varying vec2 v_uv;
+varying vec4 v_color;
+""" + DEQUANT_GLSL + """
+void main()
+{
+    mat4 model = mat4(inst_m0, inst_m1, inst_m2, inst_m3);
+    vec4 eye = gl_ModelViewMatrix * (model * dq_vertex());
+    v_pos = eye.xyz;
+    v_normal = gl_NormalMatrix * (mat3(model) * gl_Normal);
+    v_uv = gl_MultiTexCoord0.xy;
+    v_color = gl_Color;
+    gl_Position = gl_ProjectionMatrix * eye;
+}
+"""
+
+
+def _ensure_gpu():
+    global _program, _uniforms, _gpu_source
+    if _program is None:
+        attribs = {f"inst_m{k}": INSTANCE_ATTRIB + k for k in range(4)}
+        _program = compile_program(_INSTANCED_VERTEX_SRC, LIT_FRAGMENT_SRC, attribs)
+        _uniforms = Uniforms(_program)
+
+    # Malhas novas (hot-reload): recriar os VBOs
+    if _gpu_source is not tractor.tractor_parts:
+        for gpu in _gpu_parts.values():
+            gpu.delete()
+        _gpu_parts.clear()
+        _gpu_source = tractor.tractor_parts
+
+    if len(_gpu_parts) < len(tractor.tractor_parts):
+        for name, mesh in tractor.tractor_parts.items():
+            if name not in _gpu_parts:
+                _gpu_parts[name] = GpuMesh(mesh)
+        print(f"[QUANT] Fleet VBOs: {gpu_mesh.bytes_per_vertex()[0]:.0f} bytes/vertex "
+              f"({'quantized' if gpu_mesh.quantize else 'float'})")
+
+
+def _draw_part(name, world, state):
+    part = state.part_matrices(name)
+    mats = world if part is None else world @ part
+    # Column-major (como to_gl_batch) escrito direto no buffer dinâmico
+    block = dynbuf.alloc(len(mats), 16)
+    block.array.reshape(-1, 4, 4)[:] = mats.transpose(0, 2, 1)
+
+    gpu = _gpu_parts[name]
+    gpu.bind(_uniforms)
+
+    block.bind()
+    for k in range(4):
+        loc = INSTANCE_ATTRIB + k
+        glEnableVertexAttribArray(loc)
+        glVertexAttribPointer(loc, 4, GL_FLOAT, GL_FALSE, 64, block.pointer(16 * k))
+        glVertexAttribDivisor(loc, 1)
+
+    gpu.draw_ranges(tractor.tractor_materials, state.n, _uniforms["use_tex"])
+
+    for k in range(4):
+        glVertexAttribDivisor(INSTANCE_ATTRIB + k, 0)
+        glDisableVertexAttribArray(INSTANCE_ATTRIB + k)
+    gpu.unbind()
+
+
+def draw(pose=None):
+    """Desenha a frota inteira (incluindo o jogador) com instancing; pose: FleetPose do snapshot."""
+    if _fleet is None or not tractor.tractor_parts:
+        return
+    _ensure_gpu()
+
+    state = pose or _fleet
+    world = state.world_matrices()
+
+    glUseProgram(_program)
+    glUniform1i(_uniforms["tex"], 0)
+    glColor3f(1.0, 1.0, 1.0)
+
+    glass = [n for n in tractor.tractor_parts
+             if tractor._is_left_door(n) or tractor._is_right_door(n) or "glass" in n.lower()]
+    opaque = [n for n in tractor.tractor_parts if n not in glass]
+
+    for name in opaque:
+        _draw_part(name, world, state)
+
+    # Vidros: mesmo estado que tractor.draw()
+    if glass:
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glDepthMask(GL_FALSE)
+        glDisable(GL_CULL_FACE)
+        glColor4f(1.0, 1.0, 1.0, tractor.GLASS_ALPHA)
+
+        for name in glass:
+            _draw_part(name, world, state)
+
+        glColor3f(1.0, 1.0, 1.0)
+        glEnable(GL_CULL_FACE)
+        glDepthMask(GL_TRUE)
+        glDisable(GL_BLEND)
+
+    glUseProgram(0)
+
+
+# ---------------------------------------------------------
+# BENCHMARK: passos de simulação por segundo
+# ---------------------------------------------------------
+
+def benchmark(sizes=(1, 100, 10000), seconds=1.0, dt=1.0 / 60.0):
+    for n in sizes:
+        fleet = Fleet(n)
+        fleet.door_left_target[:] = 90.0      # exercitar a animação das portas
+        fleet.autopilot(dt)
+        fleet.step(dt)
+
+        steps = 0
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            fleet.autopilot(dt)
+            fleet.step(dt)
+            steps += 1
+        elapsed = time.perf_counter() - t0
+
+        print(f"[FLEET] {n:>6} vehicles: {steps / elapsed:10.1f} steps/s "
+              f"({steps * n / elapsed / 1e6:8.3f} M vehicle-steps/s)")
+
+    # Referência: o caminho escalar de tractor.update()
+    steps = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        tractor.update(True, False, steps % 200 < 100, False, dt)
+        steps += 1
+    elapsed = time.perf_counter() - t0
+    print(f"[FLEET] scalar tractor.update: {steps / elapsed:10.1f} steps/s")
+
+
+if __name__ == "__main__":
+    benchmark(seconds=float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
@@ -0,0 +1,342 @@
+# frame_pipeline.py
+# ------------------------------------------------------------
+#  PIPELINE DE FRAMES EM DUAS FASES (preparação numa thread)
+# ------------------------------------------------------------
+#  Sem pipeline, cada display() calcula a view, as matrizes das
+#  partes do trator e a lista de objetos da quinta e só depois faz
+#  as chamadas GL: frame = preparação + submissão.
+#
+#  Com pipeline, idle() entrega um snapshot do estado da simulação
+#  (tuplos, tirados depois de step()) a uma thread que prepara o
+#  FramePacket do frame N+1 enquanto a thread do GLUT submete o do
+#  frame N. O pacote é imutável: a thread do GLUT só lê o "pronto",
+#  a preparação escreve sempre um objeto novo e a troca é uma
+#  atribuição de referência (double buffering sem cópias).
+#  O frame passa a custar max(preparação, submissão), com o custo
+#  de mostrar o estado de um idle() antes (+1 frame de latência).
+#  Tudo o que display() desenha vem do mesmo snapshot: pose do
+#  trator (também para tractor_gpu), da frota, porta da garagem e
+#  vértices das partículas; senão o trator ia um passo à frente da
+#  câmara que o segue.
+#
+#  O GIL limita a sobreposição: a preparação só corre em paralelo
+#  com as partes da submissão que o largam (chamadas ctypes ao
+#  driver, glutSwapBuffers à espera do vsync, numpy).
+#
+#  [ N ] ligar / desligar     python main.py --pipeline
+#  python frame_pipeline.py --bench [--frames N] [--gl-ms X] [--objects N]
+# ------------------------------------------------------------
+import sys
+import threading
+import time
+
+import numpy as np
+
+import farm
+import fleet
+import garage
+import particles
+import tractor
+import tractor_gpu
+import transforms
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+enabled = False
+
+LAG = 1                         # frames entre o snapshot e a submissão
+WAIT_TIMEOUT = 0.1              # s; sem pacote a tempo, display() prepara o seu
+SMOOTH = 0.1                    # média exponencial das estatísticas
+FOVY, NEAR, FAR = 60.0, 0.1, 500.0     # os de scene.reshape
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+_cond = threading.Condition()
+_thread = None
+_pending = None                 # snapshot à espera da thread de preparação
+_ready = None                   # último FramePacket completo
+_submitted = 0                  # snapshots entregues (seq do mais recente)
+_current = None                 # pacote a ser submetido neste frame
+
+stats = {"build_ms": 0.0, "wait_ms": 0.0, "latency_ms": 0.0, "age": 0,
+         "skipped": 0, "culled": 0}
+
+
+class FramePacket:
+    """Tudo o que display() precisa de CPU, calculado a partir de um snapshot."""
+    __slots__ = ("seq", "time", "view", "view_gl", "eye", "camera_xz", "pose",
+                 "tractor", "farm", "fleet", "garage", "particles", "culled", "build_ms")
+
+    def __init__(self, seq, t, view, eye, camera_xz, pose, tractor_draw, farm_order,
+                 extras, culled, build_ms):
+        view.flags.writeable = False
+        self.seq = seq
+        self.time = t                   # perf_counter do snapshot
+        self.view = view
+        self.view_gl = transforms.to_gl(view)
+        self.eye = eye
+        self.camera_xz = camera_xz
+        self.pose = pose                # tractor.pose() (tractor_gpu.draw)
+        self.tractor = tractor_draw     # argumentos de tractor.draw_prepared (ou None)
+        self.farm = farm_order          # argumento de farm.draw
+        self.fleet, self.garage, self.particles = extras     # fleet / garage / particles.draw
+        self.culled = culled
+        self.build_ms = build_ms
+
+
+# ---------------------------------------------------------
+# PREPARAÇÃO (sem GL: corre na thread do pipeline)
+# ---------------------------------------------------------
+
+def snapshot():
+    """Estado da simulação em tuplos (thread do GLUT, depois de step())."""
+    import scene
+    # Classificação das partes só para tractor.draw_prepared (sem frota nem tractor_gpu)
+    cpu_tractor = not fleet.active() and not tractor_gpu.available()
+    return (_submitted + 1, time.perf_counter(), scene.camera_state(), tractor.pose(),
+            tractor.tractor_parts if cpu_tractor else None, farm.objects(), (scene.screen_width, scene.screen_height),
+            (fleet.pose(), garage.door_tilt(), particles.snapshot()))
+
+
+def _frustum_planes(clip):
+    """6 planos (a, b, c, d) normalizados de uma matriz proj @ view (Gribb-Hartmann)."""
+    rows = np.array([clip[3] + clip[0], clip[3] - clip[0],
+                     clip[3] + clip[1], clip[3] - clip[1],
+                     clip[3] + clip[2], clip[3] - clip[2]])
+    return rows / np.linalg.norm(rows[:, :3], axis=1)[:, None]
+
+
+def _visible(planes, lo, hi):
+    """(N,) bools: AABBs (N, 3) com algum ponto dentro do frustum."""
+    normals = planes[:, None, :3]
+    p = np.where(normals > 0.0, hi[None], lo[None])      # vértice mais à frente de cada plano
+    return np.all((p * normals).sum(axis=2) + planes[:, None, 3] >= 0.0, axis=0)
+
+
+def build_packet(state):
+    """Snapshot -> FramePacket (view, partes do trator, objetos visíveis por distância)."""
+    import scene
+    t0 = time.perf_counter()
+    seq, t, cam, pose, parts, objects, (width, height), extras = state
+
+    tx, tz, yaw = pose[:3]
+    eye, target = scene.camera_look(cam, tx, tz, yaw)
+    view = transforms.look_at(eye, target)
+    proj = transforms.perspective(FOVY, width / max(height, 1), NEAR, FAR)
+    eye = np.asarray(eye)
+    camera_xz = (cam[7][0], cam[7][2]) if cam[0] == scene.CAM_FREE else (tx, tz)
+
+    # Trator: classificação e matriz mundo de cada parte (None: desenhado na GPU)
+    tractor_draw = None
+    if parts is not None:
+        model = tractor.model_matrix(pose)
+        opaque, glass = [], []
+        for name, mesh in parts.items():
+            world = model @ tractor.part_matrix(name, pose)
+            entry = (name, mesh, world, transforms.to_gl(world))
+            (glass if tractor.is_glass(name) else opaque).append(entry)
+        tractor_draw = (parts, tuple(opaque), tuple(glass))
+
+    # Quinta: frustum culling e ordem da frente para trás (oclusores primeiro)
+    occluders, others, culled = [], [], 0
+    if objects:
+        lo = np.array([obj["world_bounds"][0] for obj in objects])
+        hi = np.array([obj["world_bounds"][1] for obj in objects])
+        visible = _visible(_frustum_planes(proj @ view), lo, hi)
+        dist = (((lo + hi) * 0.5 - eye) ** 2).sum(axis=1)
+        for i in np.argsort(dist, kind="stable"):
+            obj = objects[i]
+            if not visible[i]:
+                culled += 1
+            elif obj["occluder"]:
+                occluders.append(obj)
+            else:
+                others.append(obj)
+
+    return FramePacket(seq, t, view, eye, camera_xz, pose, tractor_draw,
+                       (tuple(occluders), tuple(others)), extras, culled,
+                       (time.perf_counter() - t0) * 1000.0)
+
+
+def _run():
+    global _pending, _ready
+    while True:
+        with _cond:
+            while _pending is None:
+                _cond.wait()
+            state, _pending = _pending, None
+        try:
+            packet = build_packet(state)
+        except Exception as e:
+            print(f"[WARN] Frame preparation failed: {e}")
+            continue
+        stats["build_ms"] += (packet.build_ms - stats["build_ms"]) * SMOOTH
+        with _cond:
+            _ready = packet
+            _cond.notify_all()
+
+
+# ---------------------------------------------------------
+# API (thread do GLUT)
+# ---------------------------------------------------------
+
+def start():
+    global enabled, _thread
+    if _thread is None:
+        _thread = threading.Thread(target=_run, name="frame-pipeline", daemon=True)
+        _thread.start()
+    enabled = True
+    submit()                    # o primeiro display() já tem um snapshot à espera
+
+
+def toggle():
+    global enabled, _ready, _current
+    if enabled:
+        enabled = False
+        _ready = _current = None
+    else:
+        start()
+    print(f"[PIPELINE] Frame pipeline: {'ON' if enabled else 'OFF'}")
+
+
+def submit():
+    """Fim de idle(): entrega o estado deste passo à preparação."""
+    global _pending, _submitted
+    if not enabled:
+        return
+    state = snapshot()
+    with _cond:
+        if _pending is not None:
+            stats["skipped"] += 1       # idle() mais rápido do que a preparação
+        _pending = state
+        _submitted = state[0]
+        _cond.notify_all()
+
+
+def acquire():
+    """
+    Início de display(): o pacote do snapshot de há LAG idle()s. Se a
+    preparação se atrasar mais de WAIT_TIMEOUT, o último pronto; None com
+    o pipeline desligado ou ainda sem pacote nenhum (caminho serial).
+    """
+    global _current
+    if not enabled or _submitted == 0:
+        return None
+    t0 = time.perf_counter()
+    with _cond:
+        _cond.wait_for(lambda: _ready is not None and _ready.seq >= _submitted - LAG,
+                       WAIT_TIMEOUT)
+        packet = _ready
+    stats["wait_ms"] += ((time.perf_counter() - t0) * 1000.0 - stats["wait_ms"]) * SMOOTH
+    if packet is not None:
+        stats["age"] = _submitted - packet.seq
+        stats["culled"] = packet.culled
+    _current = packet
+    return packet
+
+
+def frame_done():
+    """Depois do swap: tempo desde o snapshot mostrado até ao frame no ecrã."""
+    global _current
+    if _current is not None:
+        ms = (time.perf_counter() - _current.time) * 1000.0
+        stats["latency_ms"] += (ms - stats["latency_ms"]) * SMOOTH
+        _current = None
+
+
+def hud_text():
+    if not enabled:
+        return "Pipeline: OFF"
+    return (f"Pipeline: prep {stats['build_ms']:.2f} ms  espera {stats['wait_ms']:.2f} ms  "
+            f"latencia {stats['latency_ms']:.1f} ms (+{stats['age']} frame)")
+
+
+# ---------------------------------------------------------
+# BENCHMARK (sem janela)
+# ---------------------------------------------------------
+
+class _BenchMesh:
+    def __init__(self, size):
+        self.size = size
+
+    def bounds(self):
+        return np.zeros(3), np.full(3, self.size)
+
+
+_BENCH_PARTS = ["body", "cabin", "steering_wheel", "back_wheels", "front_wheels",
+                "left_door", "right_door", "glass_front", "glass_back", "exhaust",
+                "seat", "lights", "hood", "fenders", "hitch", "mirrors"]
+
+
+def _bench_submission(gl_ms, gil_share):
+    """
+    Custo da submissão GL: gil_share em Python (segura o GIL, como os
+    wrappers do PyOpenGL) e o resto à espera do driver / vsync (larga-o).
+    """
+    end = time.perf_counter() + gl_ms * gil_share / 1000.0
+    while time.perf_counter() < end:
+        pass
+    time.sleep(gl_ms * (1.0 - gil_share) / 1000.0)
+
+
+def benchmark(frames=300, gl_ms=8.0, gil_share=0.3, objects=400):
+    """frame time e latência: preparação serial vs na thread do pipeline."""
+    global _submitted
+    import scene
+    scene.headless = True
+    tractor_gpu.enabled = False         # sem GL: o trator é classificado na preparação
+    rng = np.random.default_rng(3)
+    for i in range(objects):
+        x, z = rng.uniform(-300.0, 300.0, 2)
+        farm.add_object({"m": _BenchMesh(rng.uniform(2.0, 12.0))}, {}, (x, 0.0, z),
+                        yaw=rng.uniform(0.0, 360.0), occluder=i % 25 == 0)
+    tractor.set_meshes({name: None for name in _BENCH_PARTS}, {})
+    dt = 1.0 / 60.0
+
+    def frame(i):
+        scene.free_yaw = (scene.free_yaw + 0.5) % 360.0
+        tractor.update(True, False, i % 120 < 60, False, dt)
+
+    results = {}
+    for mode in ("serial", "pipelined"):
+        if mode == "pipelined":
+            start()
+        times, latencies, builds = [], [], []
+        for i in range(frames):
+            t0 = time.perf_counter()
+            frame(i)
+            if mode == "serial":
+                packet = build_packet(snapshot())
+            else:
+                submit()
+                packet = acquire()
+            _bench_submission(gl_ms, gil_share)
+            t1 = time.perf_counter()
+            times.append((t1 - t0) * 1000.0)
+            latencies.append((t1 - packet.time) * 1000.0)
+            builds.append(packet.build_ms)
+        results[mode] = (np.median(times[10:]), np.median(latencies[10:]), np.median(builds[10:]))
+    toggle()
+
+    build = results["serial"][2]
+    print(f"[PIPELINE] {frames} frames, {objects} farm objects, {len(_BENCH_PARTS)} tractor parts, "
+          f"GL stage {gl_ms:.1f} ms ({gil_share * 100:.0f}% holding the GIL)")
+    print(f"  preparation {build:.2f} ms (serial), {results['pipelined'][2]:.2f} ms (worker thread)")
+    print(f"  sum of stages {build + gl_ms:.2f} ms, max of stages {max(build, gl_ms):.2f} ms")
+    for mode, (frame_ms, latency_ms, _) in results.items():
+        print(f"  {mode:<10} frame {frame_ms:6.2f} ms   snapshot -> frame end {latency_ms:6.2f} ms")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    def _opt(name, default, kind):
+        return kind(args[args.index(name) + 1]) if name in args else default
+
+    if "--bench" in args:
+        benchmark(_opt("--frames", 300, int), _opt("--gl-ms", 8.0, float),
+                  _opt("--gil-share", 0.3, float), _opt("--objects", 400, int))
@@ -1,6 +1,8 @@
 # garage.py
 from OpenGL.GL import *
 
+import transforms
+
 # ---------------------------------------------------------
 # CONSTANTES E CONFIGURAÇÕES
 # ---------------------------------------------------------
@@ -27,6 +29,7 @@ DEBUG_PIVOTS = True
 # ---------------------------------------------------------
 garage_meshes = {}
 garage_materials = {}
+garage_lightmap = None      # lightmap.Lightmap das malhas estáticas (sem a porta)
 
 # 0.0 = fechada, 1.0 = aberta
 garage_door_open     = 0.0
@@ -37,6 +40,14 @@ def set_meshes(meshes, materials):
     global garage_meshes, garage_materials
     garage_meshes = meshes
     garage_materials = materials
+    set_lightmap(None)
+
+
+def set_lightmap(lm):
+    global garage_lightmap
+    if garage_lightmap is not None:
+        garage_lightmap.free_gl()
+    garage_lightmap = lm
 
 
 # ---------------------------------------------------------
@@ -57,14 +68,16 @@ def toggle_door():
 
 
 def update(dt):
-    """Anima a abertura/fecho da porta."""
+    """Anima a abertura/fecho da porta; True se ainda estava a mexer."""
     global garage_door_open
+    moving = garage_door_open != garage_door_open_tgt
     if garage_door_open < garage_door_open_tgt:
         garage_door_open = min(garage_door_open + GARAGE_DOOR_OPEN_SPEED * dt,
                                garage_door_open_tgt)
     elif garage_door_open > garage_door_open_tgt:
         garage_door_open = max(garage_door_open - GARAGE_DOOR_OPEN_SPEED * dt,
                                garage_door_open_tgt)
+    return moving
 
 
 # ---------------------------------------------------------
@@ -77,7 +90,31 @@ def _compute_door_transform():
     return t * GARAGE_DOOR_MAX_TILT_DEG
 
 
-def draw_garage_door():
+def model_matrix():
+    return transforms.object_matrix((GARAGE_POS_X, GARAGE_POS_Y, GARAGE_POS_Z),
+                                    GARAGE_YAW, GARAGE_SCALE)
+
+
+def part_matrix(name):
+    """Transformação local (animação) de uma malha da garagem."""
+    if name != GARAGE_DOOR_MESH_NAME:
+        return transforms.identity()
+    hinge = (GARAGE_DOOR_HINGE_X, GARAGE_DOOR_HINGE_Y, GARAGE_DOOR_HINGE_Z)
+    return transforms.about_pivot(hinge, transforms.rotate(_compute_door_transform(), 0.0, 0.0, -1.0))
+
+
+def pick_targets():
+    model = model_matrix()
+    for name, mesh in garage_meshes.items():
+        yield "garage", name, mesh, model @ part_matrix(name)
+
+
+def door_tilt():
+    """Inclinação atual da porta (graus), para desenhar um frame preparado antes."""
+    return _compute_door_transform()
+
+
+def draw_garage_door(tilt_deg=None):
     door_mesh = garage_meshes.get(GARAGE_DOOR_MESH_NAME)
     if door_mesh is None:
         # Fallback se não encontrar o nome da malha
@@ -85,7 +122,8 @@ def draw_garage_door():
             mesh.draw(garage_materials)
         return
 
-    tilt_deg = _compute_door_transform()
+    if tilt_deg is None:
+        tilt_deg = _compute_door_transform()
 
     glPushMatrix()
     # 1. Mover para o pivô
@@ -105,8 +143,8 @@ def draw_garage_door():
     glPopMatrix()
 
 
-def draw():
-    """Desenha a garagem completa."""
+def draw(door_tilt_deg=None):
+    """Desenha a garagem completa (door_tilt_deg: porta do snapshot do pipeline)."""
     if not garage_meshes: return
 
     glPushMatrix()
@@ -116,13 +154,21 @@ def draw():
     if GARAGE_SCALE != 1.0:
         glScalef(GARAGE_SCALE, GARAGE_SCALE, GARAGE_SCALE)
 
-    # Malhas Estáticas
-    for name, mesh in garage_meshes.items():
-        if name == GARAGE_DOOR_MESH_NAME:
-            continue
-        mesh.draw(garage_materials)
+    # Malhas Estáticas (com lightmap pré-calculado, se houver)
+    static = [(name, mesh) for name, mesh in garage_meshes.items()
+              if name != GARAGE_DOOR_MESH_NAME]
+    lm = garage_lightmap
+    if lm is not None:
+        lm.begin()
+        for name, mesh in static:
+            if lm.covers(name):
+                lm.draw(name, mesh, garage_materials)
+        lm.end()
+    for name, mesh in static:
+        if lm is None or not lm.covers(name):
+            mesh.draw(garage_materials)
 
     # Malha Animada
-    draw_garage_door()
+    draw_garage_door(door_tilt_deg)
 
     glPopMatrix()
\ No newline at end of file
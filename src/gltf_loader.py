@@ -0,0 +1,707 @@
+# gltf_loader.py
+# ------------------------------------------------------------
+#  LOADER DE glTF BINÁRIO (.glb) SEM CÓPIAS
+# ------------------------------------------------------------
+#  Os modelos da quinta vieram de glTF (gltf_embedded_*.png); o OBJ de
+#  texto perde a compacidade e os mapas PBR. load_glb() devolve o mesmo
+#  (meshes, materials) que load_obj_multipart:
+#    - o ficheiro é mapeado (mmap) e cada accessor é uma vista numpy
+#      sobre o chunk BIN: nada é lido nem copiado no carregamento (as
+#      páginas só entram em memória quando alguém as usa);
+#    - upload(): um VBO por buffer view, enviado diretamente da zona
+#      mapeada (glBufferData com o ponteiro do mmap), partilhado pelas
+#      malhas do ficheiro; o desenho usa os offsets/strides dos
+#      accessors (glDrawElements com o índice no mesmo esquema);
+#    - as imagens embebidas são descodificadas em paralelo numa pool
+#      de threads (o PIL larga o GIL a descodificar) e só o envio para
+#      a GPU fica na thread do GLUT.
+#  Cópias só quando inevitáveis: atributos não float (quantizados) e
+#  cpu_data() (picking, lightmaps, VBOs de gpu_mesh).
+#  As UVs do glTF têm a origem em cima: as imagens sobem sem inverter
+#  as linhas (ao contrário de decode_texture), para não tocar nas UVs.
+#  Mapas PBR (normal, metallicRoughness, occlusion, emissive) ficam
+#  registados em GlbMaterial.maps; o render de pipeline fixa só usa a
+#  cor base. Sem hot-reload (.glb não é vigiado por hot_reload.py).
+#
+#  python gltf_loader.py --export modelo.obj [saida.glb]
+#  python gltf_loader.py --bench [ficheiros.obj]   OBJ vs GLB (mesmos modelos)
+# ------------------------------------------------------------
+import ctypes
+import glob
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from OpenGL.GL import *
+from PIL import Image
+
+import startup
+import telemetry
+import transforms
+from obj_loader import CompactMesh, Material, load_texture, unique_name
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+IMAGE_WORKERS = 4
+
+GLB_MAGIC = b"glTF"
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+MODE_TRIANGLES = 4
+
+# componentType -> (dtype numpy, tipo GL)
+COMPONENTS = {
+    5120: (np.int8, GL_BYTE),
+    5121: (np.uint8, GL_UNSIGNED_BYTE),
+    5122: (np.int16, GL_SHORT),
+    5123: (np.uint16, GL_UNSIGNED_SHORT),
+    5125: (np.uint32, GL_UNSIGNED_INT),
+    5126: (np.float32, GL_FLOAT),
+}
+WIDTHS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+PBR_MAPS = {"normal": "normalTexture", "occlusion": "occlusionTexture",
+            "emissive": "emissiveTexture"}
+
+
+# ---------------------------------------------------------
+# CLASSES
+# ---------------------------------------------------------
+
+class GlbMaterial(Material):
+    __slots__ = ("maps",)
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.maps = {}          # "normal" / "metallicRoughness" / ... -> rótulo da imagem
+
+
+class _Attrib:
+    """Um accessor: vista numpy e onde está no VBO (chave, offset, stride, tipo GL)."""
+    __slots__ = ("array", "key", "offset", "stride", "gl_type", "size", "count")
+
+    def __init__(self, array, key, offset=0, stride=0, gl_type=GL_FLOAT):
+        self.array = array
+        self.key = key              # ("view", índice) ou ("array", id) se foi convertido
+        self.offset = offset
+        self.stride = stride        # 0 = compacto (igual no glTF e no GL)
+        self.gl_type = gl_type
+        self.size = array.shape[1] if array.ndim > 1 else 1
+        self.count = len(array)
+
+
+class _GlbFile:
+    """O .glb aberto: JSON, buffers mapeados e os VBOs partilhados pelas suas malhas."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, length = struct.unpack_from("<4sII", self.mm, 0)
+        if magic != GLB_MAGIC or version != 2:
+            raise ValueError(f"{path}: not a glTF 2.0 binary")
+
+        self.json, bin_chunk = None, None
+        pos = 12
+        while pos + 8 <= length:
+            size, kind = struct.unpack_from("<II", self.mm, pos)
+            if kind == CHUNK_JSON:
+                self.json = json.loads(bytes(self.mm[pos + 8:pos + 8 + size]))
+            elif kind == CHUNK_BIN and bin_chunk is None:
+                bin_chunk = (pos + 8, size)
+            pos += 8 + size
+        if self.json is None:
+            raise ValueError(f"{path}: missing JSON chunk")
+
+        self.buffers = [self._buffer(b, bin_chunk) for b in self.json.get("buffers", [])]
+        self.accessors = {}
+        self.vbos = {}
+        self.users = set()
+
+    def _buffer(self, spec, bin_chunk):
+        """(objeto com buffer protocol, offset) de um buffer: o chunk BIN ou um .bin externo."""
+        uri = spec.get("uri")
+        if uri is None:
+            return self.mm, bin_chunk[0]
+        if uri.startswith("data:"):
+            import base64
+            return base64.b64decode(uri.split(",", 1)[1]), 0
+        with open(os.path.join(os.path.dirname(self.path), uri), "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), 0
+
+    def view_bytes(self, index):
+        """uint8 (byteLength,) sobre a buffer view, sem cópia."""
+        view = self.json["bufferViews"][index]
+        buf, base = self.buffers[view["buffer"]]
+        return np.frombuffer(buf, np.uint8, view["byteLength"], base + view.get("byteOffset", 0))
+
+    def accessor(self, index, as_float=False):
+        """_Attrib de um accessor (vista sem cópia; convertido para float32 se pedido)."""
+        key = (index, as_float)
+        if key in self.accessors:
+            return self.accessors[key]
+        acc = self.json["accessors"][index]
+        if "sparse" in acc:
+            raise ValueError(f"{self.path}: sparse accessors are not supported")
+        dtype, gl_type = COMPONENTS[acc["componentType"]]
+        width = WIDTHS[acc["type"]]
+        count = acc["count"]
+        item = np.dtype(dtype).itemsize * width
+
+        if "bufferView" not in acc:
+            array = np.zeros((count, width), dtype)
+            attrib = _Attrib(array, ("array", id(array)), gl_type=gl_type)
+        else:
+            view = self.json["bufferViews"][acc["bufferView"]]
+            stride = view.get("byteStride", 0)
+            raw = self.view_bytes(acc["bufferView"])
+            offset = acc.get("byteOffset", 0)
+            step = stride or item
+            span = raw[offset:offset + step * (count - 1) + item] if count else raw[:0]
+            if step == item:
+                array = span.view(dtype).reshape(count, width)
+            else:
+                # Vértices intercalados: vista com o stride do glTF, sem desentrelaçar
+                array = np.lib.stride_tricks.as_strided(
+                    span.view(dtype), shape=(count, width),
+                    strides=(step, np.dtype(dtype).itemsize), writeable=False)
+            attrib = _Attrib(array, ("view", acc["bufferView"]), offset, stride, gl_type)
+
+        if as_float and attrib.gl_type != GL_FLOAT:
+            # KHR_mesh_quantization / UVs normalizadas: o pipeline fixo quer floats
+            array = attrib.array.astype(np.float32)
+            if acc.get("normalized"):
+                array /= np.iinfo(dtype).max
+                if np.issubdtype(dtype, np.signedinteger):
+                    np.maximum(array, -1.0, out=array)     # -128 / 127 < -1 (spec: max(c / 127, -1))
+            attrib = _Attrib(array, ("array", id(array)))
+        if width == 1:
+            attrib.array = attrib.array.reshape(-1)
+        self.accessors[key] = attrib
+        return attrib
+
+    # --- GPU ---
+
+    def acquire(self, mesh):
+        """VBOs das buffer views (e arrays convertidos) que mesh usa; criados uma vez."""
+        self.users.add(mesh)
+        for attrib in mesh.attribs():
+            if attrib.key in self.vbos:
+                continue
+            if attrib.key[0] == "view":
+                data = self.view_bytes(attrib.key[1])
+            else:
+                data = np.ascontiguousarray(attrib.array)
+            vbo = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, vbo)
+            # Ponteiro direto para a zona mapeada: o driver copia do page cache
+            glBufferData(GL_ARRAY_BUFFER, data.nbytes, ctypes.c_void_p(data.ctypes.data),
+                         GL_STATIC_DRAW)
+            self.vbos[attrib.key] = vbo
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def release(self, mesh):
+        self.users.discard(mesh)
+        if not self.users and self.vbos:
+            glDeleteBuffers(len(self.vbos), list(self.vbos.values()))
+            self.vbos.clear()
+
+
+class GlbMesh(CompactMesh):
+    """
+    Uma malha glTF (as primitivas de um nó). Interface de CompactMesh
+    indexada: bounds() vem do min/max dos accessors e cpu_data() só
+    desindexa quando alguém pede os dados na CPU.
+    """
+    __slots__ = ("parts", "matrix", "_file", "_matrix_gl", "_uploaded")
+
+    def __init__(self, file, parts, matrix, bounds):
+        # Sem CompactMesh.__init__: não há arrays próprios para percorrer
+        self.positions = self.texcoords = self.normals = None
+        self.faces_by_material = {}
+        self.indexed = True
+        self.reload = None
+        self._display_list = None
+
+        self.parts = parts          # [(material, {semântica: _Attrib}, _Attrib | None)]
+        self.matrix = matrix        # 4x4 do nó, ou None (identidade)
+        self._matrix_gl = None if matrix is None else transforms.to_gl(matrix)
+        self._file = file
+        self._uploaded = False
+        self._bounds = bounds
+        self.triangle_count = sum((idx.count if idx is not None else attrs["POSITION"].count) // 3
+                                  for _, attrs, idx in parts)
+
+    def attribs(self):
+        for _, attrs, idx in self.parts:
+            yield from attrs.values()
+            if idx is not None:
+                yield idx
+
+    @property
+    def nbytes(self):
+        """Bytes das vistas (mapeados do ficheiro: páginas do page cache, não heap)."""
+        seen = {}
+        for attrib in self.attribs():
+            seen[id(attrib)] = attrib.array.nbytes
+        return sum(seen.values())
+
+    def cpu_data(self):
+        """Como CompactMesh.cpu_data (indexada, -1 onde falta uv/normal); copia."""
+        positions, texcoords, normals, faces = [], [], [], {}
+        bases = {}
+        total = 0
+        for mtl, attrs, idx in self.parts:
+            p, n, t = attrs["POSITION"], attrs.get("NORMAL"), attrs.get("TEXCOORD_0")
+            key = (id(p), id(n), id(t))
+            if key not in bases:
+                bases[key] = total
+                positions.append(p.array)
+                normals.append(n.array if n is not None else np.zeros((p.count, 3), np.float32))
+                texcoords.append(t.array if t is not None else np.zeros((p.count, 2), np.float32))
+                total += p.count
+            corner = (idx.array.astype(np.int32) if idx is not None
+                      else np.arange(p.count, dtype=np.int32)) + bases[key]
+            f = np.repeat(corner[:, None], 3, axis=1)
+            if t is None:
+                f[:, 1] = -1
+            if n is None:
+                f[:, 2] = -1
+            f = f.reshape(-1, 3, 3)
+            faces[mtl] = np.concatenate([faces[mtl], f]) if mtl in faces else f
+
+        positions = np.concatenate(positions).astype(np.float32)
+        normals = np.concatenate(normals).astype(np.float32)
+        texcoords = np.concatenate(texcoords).astype(np.float32)
+        if self.matrix is not None:
+            positions = transforms.transform_points(self.matrix, positions).astype(np.float32)
+            normals = normals @ np.linalg.inv(self.matrix[:3, :3]).astype(np.float32)
+        return positions, texcoords, normals, faces
+
+    def upload(self, materials=None):
+        if not self._uploaded:
+            self._file.acquire(self)
+            self._uploaded = True
+
+    def free_gl(self):
+        if self._uploaded:
+            self._file.release(self)
+            self._uploaded = False
+
+    def release(self):
+        pass                    # nada em heap: as vistas são do mmap
+
+    def _pointer(self, attrib):
+        glBindBuffer(GL_ARRAY_BUFFER, self._file.vbos[attrib.key])
+        return ctypes.c_void_p(attrib.offset)
+
+    def draw(self, materials=None):
+        self.upload(materials)
+        if self._matrix_gl is not None:
+            glPushMatrix()
+            glMultMatrixf(self._matrix_gl)
+        glEnableClientState(GL_VERTEX_ARRAY)
+
+        for mtl_name, attrs, idx in self.parts:
+            mat = materials.get(mtl_name) if materials else None
+            if mat and mat.texture_id:
+                glEnable(GL_TEXTURE_2D)
+                glBindTexture(GL_TEXTURE_2D, mat.texture_id)
+            else:
+                glDisable(GL_TEXTURE_2D)
+                glBindTexture(GL_TEXTURE_2D, 0)
+
+            n, t = attrs.get("NORMAL"), attrs.get("TEXCOORD_0")
+            if n is not None:
+                glEnableClientState(GL_NORMAL_ARRAY)
+                glNormalPointer(n.gl_type, n.stride, self._pointer(n))
+            if t is not None:
+                glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+                glTexCoordPointer(2, t.gl_type, t.stride, self._pointer(t))
+            p = attrs["POSITION"]
+            glVertexPointer(3, p.gl_type, p.stride, self._pointer(p))
+
+            if idx is not None:
+                glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._file.vbos[idx.key])
+                glDrawElements(GL_TRIANGLES, idx.count, idx.gl_type, ctypes.c_void_p(idx.offset))
+            else:
+                glDrawArrays(GL_TRIANGLES, 0, p.count)
+
+            if n is not None: glDisableClientState(GL_NORMAL_ARRAY)
+            if t is not None: glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_TEXTURE_2D)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        if self._matrix_gl is not None:
+            glPopMatrix()
+        telemetry.count(len(self.parts), self.triangle_count)
+
+
+# ---------------------------------------------------------
+# LEITURA
+# ---------------------------------------------------------
+
+def _node_matrix(node):
+    if "matrix" in node:
+        return np.asarray(node["matrix"], dtype=np.float64).reshape(4, 4).T
+    m = transforms.translate(*node.get("translation", (0.0, 0.0, 0.0)))
+    x, y, z, w = node.get("rotation", (0.0, 0.0, 0.0, 1.0))
+    r = np.eye(4)
+    r[:3, :3] = [[1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+                 [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+                 [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]]
+    return m @ r @ transforms.scale(*node.get("scale", (1.0, 1.0, 1.0)))
+
+
+def _mesh_parts(file, mesh, material_names):
+    parts = []
+    for prim in mesh["primitives"]:
+        if prim.get("mode", MODE_TRIANGLES) != MODE_TRIANGLES:
+            print(f"[WARN] {os.path.basename(file.path)}: skipping non-triangle primitive")
+            continue
+        attrs = {"POSITION": file.accessor(prim["attributes"]["POSITION"], as_float=True)}
+        for semantic in ("NORMAL", "TEXCOORD_0"):
+            if semantic in prim["attributes"]:
+                attrs[semantic] = file.accessor(prim["attributes"][semantic], as_float=True)
+        idx = file.accessor(prim["indices"]) if "indices" in prim else None
+        material = prim.get("material")
+        parts.append((None if material is None else material_names[material], attrs, idx))
+    return parts
+
+
+def _bounds(file, mesh, parts, matrix):
+    """AABB do min/max dos accessors POSITION (obrigatórios no glTF) sem ler vértices."""
+    lo, hi = [], []
+    for prim, (_, attrs, _) in zip(mesh["primitives"], parts):
+        acc = file.json["accessors"][prim["attributes"]["POSITION"]]
+        if "min" in acc and "max" in acc:
+            lo.append(acc["min"])
+            hi.append(acc["max"])
+        elif attrs["POSITION"].count:
+            lo.append(attrs["POSITION"].array.min(axis=0))
+            hi.append(attrs["POSITION"].array.max(axis=0))
+    if not lo:
+        return np.zeros(3), np.zeros(3)
+    lo, hi = np.min(lo, axis=0), np.max(hi, axis=0)
+    if matrix is not None:
+        corners = [(x, y, z) for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])]
+        pts = transforms.transform_points(matrix, corners)
+        lo, hi = pts.min(axis=0), pts.max(axis=0)
+    return np.asarray(lo, dtype=np.float64), np.asarray(hi, dtype=np.float64)
+
+
+def _image_label(file, index):
+    """Caminho (URI externa) ou "ficheiro.glb#imagemN" (embebida) de uma imagem."""
+    image = file.json["images"][index]
+    if "uri" in image and not image["uri"].startswith("data:"):
+        return os.path.join(os.path.dirname(file.path), image["uri"])
+    return f"{file.path}#image{index}"
+
+
+def _image_bytes(file, index):
+    image = file.json["images"][index]
+    if "bufferView" in image:
+        return file.view_bytes(image["bufferView"])
+    uri = image["uri"]
+    if uri.startswith("data:"):
+        import base64
+        return base64.b64decode(uri.split(",", 1)[1])
+    with open(os.path.join(os.path.dirname(file.path), uri), "rb") as f:
+        return f.read()
+
+
+def _decode(data):
+    """Imagem comprimida -> (largura, altura, RGBA) com a 1ª linha em cima (UVs glTF)."""
+    img = Image.open(io.BytesIO(data)).convert("RGBA")
+    return img.size[0], img.size[1], img.tobytes()
+
+
+def decode_images(file, indices, workers=IMAGE_WORKERS):
+    """{índice: (largura, altura, RGBA)} descodificadas em paralelo (threads)."""
+    indices = list(indices)
+    if not indices:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(indices))) as pool:
+        decoded = pool.map(lambda i: _decode(_image_bytes(file, i)), indices)
+        return dict(zip(indices, decoded))
+
+
+def _materials(file):
+    """({nome: GlbMaterial}, [nome por índice], {material: imagem da cor base})."""
+    materials, names, base_images = {}, [], {}
+    textures = file.json.get("textures", [])
+    for i, spec in enumerate(file.json.get("materials", [])):
+        name = unique_name(materials, spec.get("name") or f"material{i}")
+        mat = GlbMaterial(name)
+        pbr = spec.get("pbrMetallicRoughness", {})
+        refs = dict({k: spec[v] for k, v in PBR_MAPS.items() if v in spec},
+                    baseColor=pbr.get("baseColorTexture"),
+                    metallicRoughness=pbr.get("metallicRoughnessTexture"))
+        for role, ref in refs.items():
+            if ref is None or textures[ref["index"]].get("source") is None:
+                continue
+            image = textures[ref["index"]]["source"]
+            if role == "baseColor":
+                mat.texture_path = _image_label(file, image)
+                base_images[name] = image
+            else:
+                mat.maps[role] = _image_label(file, image)
+        materials[name] = mat
+        names.append(name)
+    return materials, names, base_images
+
+
+def load_glb(path, load_textures=True):
+    """Lê um .glb -> (meshes {nome: GlbMesh}, materiais {nome: GlbMaterial})."""
+    with startup.span(f"glb {os.path.basename(path)}"):
+        file = _GlbFile(path)
+        materials, names, base_images = _materials(file)
+
+        if load_textures and base_images:
+            decoded = decode_images(file, set(base_images.values()))
+            tex_ids = {i: load_texture(_image_label(file, i), d) for i, d in decoded.items()}
+            for name, image in base_images.items():
+                materials[name].texture_id = tex_ids[image]
+
+        gltf = file.json
+        scenes = gltf.get("scenes")
+        roots = (scenes[gltf.get("scene", 0)]["nodes"] if scenes
+                 else range(len(gltf.get("nodes", []))))
+        meshes, parts_cache = {}, {}
+        stack = [(i, None) for i in roots]
+        while stack:
+            index, parent = stack.pop()
+            node = gltf["nodes"][index]
+            matrix = _node_matrix(node) if parent is None else parent @ _node_matrix(node)
+            if "mesh" in node:
+                mesh = gltf["meshes"][node["mesh"]]
+                if node["mesh"] not in parts_cache:
+                    parts_cache[node["mesh"]] = _mesh_parts(file, mesh, names)
+                parts = parts_cache[node["mesh"]]
+                local = None if np.allclose(matrix, np.eye(4)) else matrix
+                name = unique_name(meshes, node.get("name") or mesh.get("name") or f"mesh{index}")
+                meshes[name] = GlbMesh(file, parts, local, _bounds(file, mesh, parts, local))
+            stack.extend((child, matrix) for child in reversed(node.get("children", [])))
+
+    startup.log(f"[GLB] {os.path.basename(path)}: {len(meshes)} meshes, "
+                f"{sum(m.triangle_count for m in meshes.values())} tris, {len(materials)} materials")
+    return meshes, materials
+
+
+# ---------------------------------------------------------
+# EXPORTAÇÃO (OBJ -> GLB, para comparar os dois caminhos)
+# ---------------------------------------------------------
+
+def export_glb(obj_path, out_path=None):
+    """O OBJ (via mesh_opt: indexado e otimizado) num .glb com as imagens embebidas."""
+    import mesh_opt
+    out_path = out_path or os.path.splitext(obj_path)[0] + ".glb"
+    meshes, materials = mesh_opt.load_obj_optimized(obj_path, load_textures=False)
+
+    blob = bytearray()
+    gltf = {"asset": {"version": "2.0", "generator": "gltf_loader.export_glb"},
+            "scene": 0, "scenes": [{"nodes": []}], "nodes": [], "meshes": [],
+            "materials": [], "textures": [], "images": [], "accessors": [],
+            "bufferViews": [], "buffers": []}
+
+    def add_view(data, target=None):
+        while len(blob) % 4:
+            blob.append(0)
+        view = {"buffer": 0, "byteOffset": len(blob), "byteLength": len(data)}
+        if target:
+            view["target"] = target
+        blob.extend(data)
+        gltf["bufferViews"].append(view)
+        return len(gltf["bufferViews"]) - 1
+
+    def add_accessor(array, kind, component, target, bounds=False):
+        array = np.ascontiguousarray(array)
+        acc = {"bufferView": add_view(array.tobytes(), target), "componentType": component,
+               "count": len(array), "type": kind}
+        if bounds:
+            acc["min"] = array.min(axis=0).tolist()
+            acc["max"] = array.max(axis=0).tolist()
+        gltf["accessors"].append(acc)
+        return len(gltf["accessors"]) - 1
+
+    material_index, texture_index = {}, {}
+    for name, mat in materials.items():
+        spec = {"name": name, "pbrMetallicRoughness": {"metallicFactor": 0.0}}
+        if mat.texture_path and os.path.isfile(mat.texture_path):
+            if mat.texture_path not in texture_index:
+                with open(mat.texture_path, "rb") as f:
+                    data = f.read()
+                mime = "image/png" if data[:4] == b"\x89PNG" else "image/jpeg"
+                gltf["images"].append({"bufferView": add_view(data), "mimeType": mime})
+                gltf["textures"].append({"source": len(gltf["images"]) - 1})
+                texture_index[mat.texture_path] = len(gltf["textures"]) - 1
+            spec["pbrMetallicRoughness"]["baseColorTexture"] = {"index": texture_index[mat.texture_path]}
+        material_index[name] = len(gltf["materials"])
+        gltf["materials"].append(spec)
+
+    for name, mesh in meshes.items():
+        positions, texcoords, normals, faces_by_material = mesh.cpu_data()
+        corners = [f for f in faces_by_material.values() if len(f)]
+        if not corners:
+            continue
+        corners = np.concatenate(corners).reshape(-1, 3)
+        attributes = {"POSITION": add_accessor(positions.astype(np.float32), "VEC3", 5126,
+                                               GL_ARRAY_BUFFER, bounds=True)}
+        if len(normals) and (corners[:, 2] >= 0).all():
+            attributes["NORMAL"] = add_accessor(normals.astype(np.float32), "VEC3", 5126,
+                                                GL_ARRAY_BUFFER)
+        if len(texcoords) and (corners[:, 1] >= 0).all():
+            uv = texcoords.astype(np.float32).copy()
+            uv[:, 1] = 1.0 - uv[:, 1]       # origem do glTF em cima
+            attributes["TEXCOORD_0"] = add_accessor(uv, "VEC2", 5126, GL_ARRAY_BUFFER)
+
+        small = len(positions) < 65536
+        primitives = []
+        for mtl, faces in faces_by_material.items():
+            if not len(faces):
+                continue
+            idx = faces[:, :, 0].reshape(-1).astype(np.uint16 if small else np.uint32)
+            prim = {"attributes": attributes, "mode": MODE_TRIANGLES,
+                    "indices": add_accessor(idx, "SCALAR", 5123 if small else 5125,
+                                            GL_ELEMENT_ARRAY_BUFFER)}
+            if mtl in material_index:
+                prim["material"] = material_index[mtl]
+            primitives.append(prim)
+        gltf["meshes"].append({"name": name, "primitives": primitives})
+        gltf["nodes"].append({"name": name, "mesh": len(gltf["meshes"]) - 1})
+        gltf["scenes"][0]["nodes"].append(len(gltf["nodes"]) - 1)
+
+    while len(blob) % 4:
+        blob.append(0)
+    gltf["buffers"].append({"byteLength": len(blob)})
+    for key in ("materials", "textures", "images"):
+        if not gltf[key]:
+            del gltf[key]
+    text = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    text += b" " * (-len(text) % 4)
+
+    with open(out_path, "wb") as f:
+        f.write(struct.pack("<4sII", GLB_MAGIC, 2, 12 + 8 + len(text) + 8 + len(blob)))
+        f.write(struct.pack("<II", len(text), CHUNK_JSON) + text)
+        f.write(struct.pack("<II", len(blob), CHUNK_BIN) + bytes(blob))
+    return out_path
+
+
+# ---------------------------------------------------------
+# BENCHMARK (sem GL)
+# ---------------------------------------------------------
+
+def _best_ms(fn, repeats=3):
+    best = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        ms = (time.perf_counter() - t0) * 1000.0
+        best = ms if best is None else min(best, ms)
+    return best
+
+
+def _read_views(meshes):
+    """
+    Copia o que acquire() mandaria para os VBOs (as vistas do mmap são
+    lidas de facto) -> bytes. O glBufferData em si fica de fora (sem GL).
+    """
+    seen, total = set(), 0
+    for mesh in meshes.values():
+        for attrib in mesh.attribs():
+            if attrib.key in seen:
+                continue
+            seen.add(attrib.key)
+            data = (mesh._file.view_bytes(attrib.key[1]) if attrib.key[0] == "view"
+                    else attrib.array)
+            total += np.array(data, copy=True).nbytes
+    return total
+
+
+def _load_glb_read(path):
+    meshes, _ = load_glb(path, load_textures=False)
+    _read_views(meshes)
+
+
+def _load_glb_cpu(path):
+    meshes, _ = load_glb(path, load_textures=False)
+    for mesh in meshes.values():
+        mesh.cpu_data()
+
+
+def benchmark(obj_paths, out_dir=None):
+    """
+    Geometria (OBJ texto / .meshcache.npz / GLB) e imagens (série / threads)
+    por modelo. O GLB aparece em três colunas: só metadados (as vistas não
+    são lidas), + leitura do que iria para os VBOs, e + cpu_data(); o OBJ
+    já tem tudo lido e desindexado no fim do parse. O envio para a GPU não
+    entra em nenhum dos lados (sem contexto GL).
+    """
+    import tempfile
+    import tracemalloc
+    import mesh_opt
+    from obj_loader import decode_texture, load_obj_multipart
+
+    out_dir = out_dir or tempfile.mkdtemp(prefix="glb-bench-")
+    startup.quiet = True
+    print(f"[GLB] load times, best of 3 (no GL; GLB written to {out_dir})")
+    print(f"  {'model':<14}{'OBJ text':>10}{'meshcache':>11}{'GLB meta':>9}{'+read':>8}"
+          f"{'+cpu_data':>10}{'GLB heap':>10}"
+          f"{'images x1':>11}{'images x' + str(IMAGE_WORKERS):>11}{'OBJ MB':>8}{'GLB MB':>8}")
+    for obj_path in obj_paths:
+        name = os.path.splitext(os.path.basename(obj_path))[0]
+        glb_path = export_glb(obj_path, os.path.join(out_dir, name + ".glb"))
+        mesh_opt.load_obj_optimized(obj_path, load_textures=False)     # cache em disco
+
+        t_obj = _best_ms(lambda: load_obj_multipart(obj_path, load_textures=False))
+        t_cache = _best_ms(lambda: mesh_opt.load_obj_optimized(obj_path, load_textures=False))
+        t_glb = _best_ms(lambda: load_glb(glb_path, load_textures=False))
+        t_read = _best_ms(lambda: _load_glb_read(glb_path))
+        t_cpu = _best_ms(lambda: _load_glb_cpu(glb_path))
+
+        tracemalloc.start()
+        kept = load_glb(glb_path, load_textures=False)
+        heap = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+
+        _, materials = load_obj_multipart(obj_path, load_textures=False)
+        paths = sorted({m.texture_path for m in materials.values()
+                        if m.texture_path and os.path.isfile(m.texture_path)})
+        t_serial = _best_ms(lambda: [decode_texture(p) for p in paths], 1)
+        file = _GlbFile(glb_path)
+        t_threads = _best_ms(lambda: decode_images(file, range(len(file.json.get("images", [])))), 1)
+
+        obj_mb = sum(os.path.getsize(p) for p in [obj_path] + paths) / (1 << 20)
+        print(f"  {name[:13]:<14}{t_obj:9.1f} {t_cache:10.1f} {t_glb:8.2f} {t_read:7.2f} "
+              f"{t_cpu:9.1f} {heap / 1024:8.0f}KB"
+              f"{t_serial:10.1f} {t_threads:10.1f} {obj_mb:7.1f} "
+              f"{os.path.getsize(glb_path) / (1 << 20):7.1f}")
+    print("  (ms; GLB meta = header/JSON/accessor views only, the mapped data is not read;\n"
+          "   +read = also copying every view a VBO would get; +cpu_data = also de-indexing\n"
+          "   like the OBJ parse; no column includes the GL upload; page cache warm after\n"
+          "   the first of 3 runs; OBJ MB includes its textures; GLB heap = Python\n"
+          "   allocations of one metadata-only load)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--export" in args:
+        i = args.index("--export")
+        out = args[i + 2] if len(args) > i + 2 else None
+        print(f"[GLB] Wrote {export_glb(args[i + 1], out)}")
+    elif "--bench" in args:
+        here = os.path.dirname(os.path.abspath(__file__))
+        paths = [a for a in args if a.endswith(".obj")] or \
+            sorted(glob.glob(os.path.join(here, "..", "assets", "models", "farm", "*.obj")))
+        benchmark(paths)
@@ -0,0 +1,364 @@
+# gpu_mesh.py
+# ------------------------------------------------------------
+#  MALHAS EM VBO (posição + normal + uv intercalados)
+# ------------------------------------------------------------
+#  Alternativa às display lists para quem precisa de desenhar a mesma
+#  geometria com shaders (instancing, animação na GPU, ...). Cada
+#  material ocupa um intervalo contíguo do VBO.
+#
+#  Com quantize = True (python main.py --quantize) o vértice passa de
+#  32 para 16 bytes:
+#    posição  3 x int16 (+2 de alinhamento), relativa à AABB da malha
+#    normal   GL_INT_2_10_10_10_REV (normalizada pelo GL, vai direta
+#             para gl_Normal)
+#    uv       2 x half float
+#  A posição é reconstruída no vertex shader (DEQUANT_GLSL) com
+#  pos_offset + pos_scale * gl_Vertex.xyz; os parâmetros são por malha
+#  e enviados em bind(uniforms). Cada malha é verificada contra os
+#  floats originais e fica em float se o erro passar os limites.
+#  Tempo de frame com/sem: gravar uma vez (replay.py) e reproduzir com
+#  --label float e com --quantize --label quantized.
+#
+#  python gpu_mesh.py         erro da quantização por modelo (sem GL)
+#  python gpu_mesh.py --gpu   + tempo de GPU float vs quantizado das malhas maiores
+# ------------------------------------------------------------
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+import telemetry
+from obj_loader import CompactMesh
+
+FLOATS_PER_VERTEX = 8          # x y z | nx ny nz | u v
+STRIDE = FLOATS_PER_VERTEX * 4
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+quantize = False               # formato compacto nos GpuMesh criados a seguir
+
+QUANT_STRIDE = 16
+MAX_POS_ERROR = 1e-4           # fração da maior dimensão da AABB
+MAX_NORMAL_ERROR_DEG = 0.5
+MAX_UV_ERROR = 1.0 / 1024.0    # 1 texel a 1024 (half: passo 2^-11 entre 1 e 2)
+
+# Layout quantizado (numpy) com os mesmos offsets que bind() usa
+QUANT_DTYPE = np.dtype([("pos", "<i2", 4), ("normal", "<u4"), ("uv", "<f2", 2)])
+
+# Totais dos GpuMesh criados (relatório de bytes por vértice)
+stats = {"vertices": 0, "bytes": 0, "float_bytes": 0, "fallbacks": 0}
+
+
+# ---------------------------------------------------------
+# CONVERSÃO DE MALHAS
+# ---------------------------------------------------------
+
+def _obj_face_indices(faces):
+    """Lista de faces ObjMesh -> int64 (T*3, 3) com -1 onde falta o índice."""
+    flat = [-1 if c is None else c for face in faces for corner in face for c in corner]
+    return np.asarray(flat, dtype=np.int64).reshape(-1, 3)
+
+
+def material_arrays(mesh):
+    """
+    Desindexa a malha por material:
+    {material: (posições (n,3), normais (n,3) | None, uvs (n,2) | None)}, float32.
+    """
+    if isinstance(mesh, CompactMesh):
+        pos, uv, nrm, faces_by_material = mesh.cpu_data()
+        groups = {m: f.reshape(-1, 3) for m, f in faces_by_material.items()}
+    else:
+        pos = np.asarray(mesh.vertices, dtype=np.float32).reshape(-1, 3)
+        uv = np.asarray(mesh.texcoords, dtype=np.float32).reshape(-1, 2)
+        nrm = np.asarray(mesh.normals, dtype=np.float32).reshape(-1, 3)
+        groups = {m: _obj_face_indices(f) for m, f in mesh.faces_by_material.items()}
+
+    out = {}
+    for mtl, idx in groups.items():
+        has_n = len(nrm) > 0 and bool((idx[:, 2] >= 0).all())
+        has_t = len(uv) > 0 and bool((idx[:, 1] >= 0).all())
+        out[mtl] = (pos[idx[:, 0]],
+                    nrm[idx[:, 2]] if has_n else None,
+                    uv[idx[:, 1]] if has_t else None)
+    return out
+
+
+def interleave(groups):
+    """material_arrays() -> (float32 (V, 8), [(material, primeiro, contagem)])."""
+    total = sum(len(p) for p, _, _ in groups.values())
+    data = np.zeros((total, FLOATS_PER_VERTEX), dtype=np.float32)
+    data[:, 4] = 1.0            # normal por omissão (0, 1, 0)
+
+    ranges = []
+    first = 0
+    for mtl, (p, n, t) in groups.items():
+        count = len(p)
+        data[first:first + count, 0:3] = p
+        if n is not None:
+            data[first:first + count, 3:6] = n
+        if t is not None:
+            data[first:first + count, 6:8] = t
+        ranges.append((mtl, first, count))
+        first += count
+    return data, ranges
+
+
+# ---------------------------------------------------------
+# QUANTIZAÇÃO
+# ---------------------------------------------------------
+
+def _pack_normals(n):
+    """(V, 3) float -> uint32 GL_INT_2_10_10_10_REV (x nos bits 0-9, w = 0)."""
+    q = np.round(np.clip(n, -1.0, 1.0) * 511.0).astype(np.int32) & 0x3FF
+    return (q[:, 0] | (q[:, 1] << 10) | (q[:, 2] << 20)).astype(np.uint32)
+
+
+def _unpack_normals(packed):
+    fields = [(packed >> shift) & 0x3FF for shift in (0, 10, 20)]
+    q = np.stack(fields, axis=1).astype(np.int32)
+    q = np.where(q >= 512, q - 1024, q)
+    return np.maximum(q / 511.0, -1.0)
+
+
+def quantize_vertices(data):
+    """
+    data (V, 8) float32 -> (array QUANT_DTYPE, pos_offset (3,), pos_scale (3,)).
+    Posição = pos_offset + pos_scale * int16, por eixo dentro da AABB.
+    """
+    pos = data[:, 0:3].astype(np.float64)
+    if len(pos):
+        lo, hi = pos.min(axis=0), pos.max(axis=0)
+    else:
+        lo = hi = np.zeros(3)
+    offset = (lo + hi) / 2.0
+    scale = np.maximum((hi - lo) / 2.0, 1e-12) / 32767.0
+
+    out = np.zeros(len(data), dtype=QUANT_DTYPE)
+    out["pos"][:, 0:3] = np.clip(np.round((pos - offset) / scale), -32767, 32767)
+    out["normal"] = _pack_normals(data[:, 3:6])
+    out["uv"] = data[:, 6:8].astype(np.float16)
+    return out, offset.astype(np.float32), scale.astype(np.float32)
+
+
+def quantization_error(data, quant, offset, scale):
+    """Erro máximo de (posição / maior dimensão, normal em graus, uv) face aos floats."""
+    if len(data) == 0:
+        return 0.0, 0.0, 0.0
+    pos = offset + scale * quant["pos"][:, 0:3].astype(np.float64)
+    extent = max(float(np.ptp(data[:, 0:3], axis=0).max()), 1e-12)
+    pos_err = float(np.abs(pos - data[:, 0:3]).max()) / extent
+
+    n0 = data[:, 3:6].astype(np.float64)
+    n1 = _unpack_normals(quant["normal"])
+    len0 = np.linalg.norm(n0, axis=1)
+    len1 = np.linalg.norm(n1, axis=1)
+    ok = (len0 > 1e-6) & (len1 > 1e-6)
+    cos = np.sum(n0[ok] * n1[ok], axis=1) / (len0[ok] * len1[ok])
+    normal_err = float(np.degrees(np.arccos(np.clip(cos, -1.0, 1.0))).max()) if ok.any() else 0.0
+
+    uv_err = float(np.abs(quant["uv"].astype(np.float64) - data[:, 6:8]).max())
+    return pos_err, normal_err, uv_err
+
+
+def _within_limits(errors):
+    pos_err, normal_err, uv_err = errors
+    return (pos_err <= MAX_POS_ERROR and normal_err <= MAX_NORMAL_ERROR_DEG
+            and uv_err <= MAX_UV_ERROR)
+
+
+# ---------------------------------------------------------
+# GPU MESH
+# ---------------------------------------------------------
+
+class GpuMesh:
+    """Uma malha (ObjMesh/CompactMesh) num único VBO, com intervalos por material."""
+
+    def __init__(self, mesh=None, data=None, ranges=None):
+        """mesh, ou dados já intercalados (data (V, 8) + ranges) via interleave()."""
+        if mesh is not None:
+            data, ranges = interleave(material_arrays(mesh))
+        self.ranges = ranges
+        self.vertex_count = len(data)
+
+        # Desquantização da posição (identidade em float)
+        self.quantized = False
+        self.pos_offset = (0.0, 0.0, 0.0)
+        self.pos_scale = (1.0, 1.0, 1.0)
+
+        upload = data
+        if quantize:
+            quant, offset, scale = quantize_vertices(data)
+            errors = quantization_error(data, quant, offset, scale)
+            if _within_limits(errors):
+                upload = quant
+                self.quantized = True
+                self.pos_offset, self.pos_scale = tuple(offset), tuple(scale)
+            else:
+                stats["fallbacks"] += 1
+                print(f"[WARN] Quantization error too high (pos {errors[0]:.2e}, "
+                      f"normal {errors[1]:.2f} deg, uv {errors[2]:.2e}); keeping floats")
+        self.nbytes = upload.nbytes
+
+        stats["vertices"] += self.vertex_count
+        stats["bytes"] += self.nbytes
+        stats["float_bytes"] += data.nbytes
+
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, upload.nbytes, upload, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def bind(self, uniforms=None):
+        """Liga o VBO; uniforms (shaders.Uniforms com DEQUANT_GLSL) recebe pos_offset/pos_scale."""
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        if self.quantized:
+            glVertexPointer(3, GL_SHORT, QUANT_STRIDE, ctypes.c_void_p(0))
+            glNormalPointer(GL_INT_2_10_10_10_REV, QUANT_STRIDE, ctypes.c_void_p(8))
+            glTexCoordPointer(2, GL_HALF_FLOAT, QUANT_STRIDE, ctypes.c_void_p(12))
+        else:
+            glVertexPointer(3, GL_FLOAT, STRIDE, ctypes.c_void_p(0))
+            glNormalPointer(GL_FLOAT, STRIDE, ctypes.c_void_p(12))
+            glTexCoordPointer(2, GL_FLOAT, STRIDE, ctypes.c_void_p(24))
+        if uniforms is not None:
+            glUniform3f(uniforms["pos_offset"], *self.pos_offset)
+            glUniform3f(uniforms["pos_scale"], *self.pos_scale)
+
+    def unbind(self):
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_NORMAL_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw_ranges(self, materials, instances=0, use_tex_loc=None, ranges=None):
+        """
+        Desenha os intervalos (todos, ou só ranges; assume bind() feito). Com
+        instances > 0 usa glDrawArraysInstanced; use_tex_loc é o uniform
+        "use_tex" do shader.
+        """
+        for mtl_name, first, count in (self.ranges if ranges is None else ranges):
+            mat = materials.get(mtl_name) if materials else None
+            textured = bool(mat and mat.texture_id)
+            if textured:
+                glEnable(GL_TEXTURE_2D)
+                glBindTexture(GL_TEXTURE_2D, mat.texture_id)
+            else:
+                glDisable(GL_TEXTURE_2D)
+                glBindTexture(GL_TEXTURE_2D, 0)
+            if use_tex_loc is not None:
+                glUniform1i(use_tex_loc, 1 if textured else 0)
+
+            if instances:
+                glDrawArraysInstanced(GL_TRIANGLES, first, count, instances)
+            else:
+                glDrawArrays(GL_TRIANGLES, first, count)
+            telemetry.count(1, count // 3 * max(instances, 1))
+
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_TEXTURE_2D)
+
+    def delete(self):
+        if self.vbo is not None:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = None
+
+
+def bytes_per_vertex():
+    """(bytes por vértice atuais, em float) sobre todos os GpuMesh criados."""
+    v = max(stats["vertices"], 1)
+    return stats["bytes"] / v, stats["float_bytes"] / v
+
+
+# ---------------------------------------------------------
+# RELATÓRIO
+# ---------------------------------------------------------
+
+def gpu_time(meshes, uniforms, repeats=50):
+    """ms de GPU para desenhar cada GpuMesh repeats vezes (GL_TIME_ELAPSED), com o shader ligado."""
+    query = glGenQueries(1)[0]
+    out = []
+    for mesh in meshes:
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        mesh.bind(uniforms)
+        mesh.draw_ranges({}, use_tex_loc=uniforms["use_tex"])      # aquecer
+        glFinish()
+        glBeginQuery(GL_TIME_ELAPSED, query)
+        for _ in range(repeats):
+            mesh.draw_ranges({}, use_tex_loc=uniforms["use_tex"])
+        glEndQuery(GL_TIME_ELAPSED)
+        mesh.unbind()
+        out.append(glGetQueryObjectui64v(query, GL_QUERY_RESULT) / 1e6)
+    return out
+
+
+def _gpu_report(parts, heaviest=3, repeats=50):
+    """As malhas maiores em float e quantizadas, com o shader de tractor_gpu/fleet (LIT_*)."""
+    global quantize
+    import sys
+    from OpenGL.GLU import gluPerspective, gluLookAt
+    from OpenGL.GLUT import glutInit, glutInitDisplayMode, glutCreateWindow, GLUT_RGB, GLUT_DEPTH
+    from shaders import compile_program, Uniforms, LIT_VERTEX_SRC, LIT_FRAGMENT_SRC
+
+    glutInit(sys.argv)
+    glutInitDisplayMode(GLUT_RGB | GLUT_DEPTH)
+    glutCreateWindow(b"gpu_mesh")
+    glEnable(GL_DEPTH_TEST)
+    program = compile_program(LIT_VERTEX_SRC, LIT_FRAGMENT_SRC)
+    glUseProgram(program)
+    uniforms = Uniforms(program)
+
+    parts.sort(key=lambda p: -len(p[1]))
+    for name, data, ranges in parts[:heaviest]:
+        lo, hi = data[:, 0:3].min(axis=0), data[:, 0:3].max(axis=0)
+        center, radius = (lo + hi) / 2.0, float(np.linalg.norm(hi - lo)) / 2.0 or 1.0
+        glMatrixMode(GL_PROJECTION)
+        glLoadIdentity()
+        gluPerspective(45.0, 1.0, radius * 0.1, radius * 10.0)
+        glMatrixMode(GL_MODELVIEW)
+        glLoadIdentity()
+        gluLookAt(center[0], center[1], center[2] + radius * 2.5, *center, 0.0, 1.0, 0.0)
+
+        meshes = []
+        for quantize in (False, True):          # global: formato dos GpuMesh criados
+            meshes.append(GpuMesh(data=data, ranges=ranges))
+        ms_float, ms_quant = gpu_time(meshes, uniforms, repeats)
+        for mesh in meshes:
+            mesh.delete()
+        print(f"[QUANT] GPU {name[:28]:<28} {len(data) // 3:7d} tris: float {ms_float:.2f} ms, "
+              f"quantized {ms_quant:.2f} ms ({repeats} draws"
+              + (", kept as float)" if not meshes[1].quantized else ")"))
+    quantize = False
+
+
+if __name__ == "__main__":
+    import glob
+    import os
+    import sys
+    import obj_loader
+    obj_loader.load_texture = lambda path: None
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    gpu_parts = []
+    for path in sorted(glob.glob(os.path.join(here, "..", "assets", "models", "**", "*.obj"),
+                                 recursive=True)):
+        meshes, _ = obj_loader.load_obj_multipart(path, load_textures=False)
+        worst = np.zeros(3)
+        vertices = fallbacks = 0
+        for name, mesh in meshes.items():
+            data, ranges = interleave(material_arrays(mesh))
+            gpu_parts.append((f"{os.path.basename(path)}:{name}", data, ranges))
+            quant, offset, scale = quantize_vertices(data)
+            errors = quantization_error(data, quant, offset, scale)
+            worst = np.maximum(worst, errors)
+            vertices += len(data)
+            fallbacks += not _within_limits(errors)
+        print(f"[QUANT] {os.path.basename(path):<18} {vertices:7d} verts  "
+              f"{STRIDE} -> {QUANT_DTYPE.itemsize} B/vert  "
+              f"({vertices * STRIDE >> 10} -> {vertices * QUANT_DTYPE.itemsize >> 10} KB)  "
+              f"max err: pos {worst[0]:.1e}  normal {worst[1]:.2f} deg  uv {worst[2]:.1e}"
+              + (f"  ({fallbacks} parts kept as float)" if fallbacks else ""))
+    if "--gpu" in sys.argv:
+        _gpu_report(gpu_parts)
@@ -0,0 +1,299 @@
+# hot_reload.py
+# ------------------------------------------------------------
+#  HOT-RELOAD INCREMENTAL DE ASSETS (OBJ / MTL / TEXTURAS)
+# ------------------------------------------------------------
+#  1. Uma thread vigia assets/ (inotify em Linux, senão polling de
+#     mtimes) e regista os ficheiros alterados.
+#  2. Ao fim de DEBOUNCE segundos sem novas escritas, o ficheiro é
+#     lido e descodificado num processo à parte (o parse em Python não
+#     disputa o GIL com o render).
+#  3. Entre frames (poll(), chamado pelo idle) aplica-se no máximo um
+#     resultado: envia-se o novo para a GPU, troca-se, e só depois se
+#     apagam os objetos GL antigos.
+#  Só os modelos carregados que usam o ficheiro são recarregados; uma
+#  textura é re-especificada no mesmo id (as display lists que a usam
+#  continuam válidas).
+# ------------------------------------------------------------
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import threading
+import time
+
+from OpenGL.GL import *
+
+import mesh_opt
+import obj_loader
+import scene_loader
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+POLL_INTERVAL = 0.5          # fallback sem inotify (segundos)
+DEBOUNCE = 0.3               # espera após a última escrita (editores gravam aos bocados)
+
+MODEL_EXTS = (".obj", ".mtl")
+TEXTURE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".tga")
+
+# inotify(7)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_ISDIR = 0x40000000
+_IN_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT = struct.Struct("iIII")
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+backend = None               # "inotify" | "polling" | None (desligado)
+
+_changes = queue.Queue()     # caminhos alterados (thread de vigia -> render)
+_pending = {}                # caminho -> instante da última alteração
+_jobs = []                   # _Job em curso no processo auxiliar
+_pool = None
+_watcher = None
+_stop = threading.Event()
+
+
+class _Job:
+    def __init__(self, kind, target, path, future):
+        self.kind = kind         # "model" | "texture"
+        self.target = target     # _Model, ou lista de tex_ids
+        self.path = path
+        self.future = future
+        self.started = time.perf_counter()
+
+
+# ---------------------------------------------------------
+# VIGIA DE FICHEIROS
+# ---------------------------------------------------------
+
+class _InotifyWatcher(threading.Thread):
+    def __init__(self, root):
+        super().__init__(daemon=True, name="hot-reload-inotify")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}          # watch descriptor -> diretório
+        for d, _, _ in os.walk(root):
+            self._add(d)
+
+    def _add(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _IN_MASK)
+        if wd >= 0:
+            self._dirs[wd] = directory
+
+    def run(self):
+        while not _stop.is_set():
+            ready, _, _ = select.select([self._fd], [], [], 0.5)
+            if not ready:
+                continue
+            data = os.read(self._fd, 64 * 1024)
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+
+                path = os.path.join(self._dirs.get(wd, ""), name)
+                if mask & _IN_ISDIR:
+                    self._add(path)      # diretório novo: vigiar também
+                else:
+                    _changes.put(path)
+        os.close(self._fd)
+
+
+class _PollingWatcher(threading.Thread):
+    def __init__(self, root):
+        super().__init__(daemon=True, name="hot-reload-polling")
+        self._root = root
+
+    def _scan(self):
+        found = {}
+        for d, _, files in os.walk(self._root):
+            for f in files:
+                path = os.path.join(d, f)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                found[path] = (st.st_mtime_ns, st.st_size)
+        return found
+
+    def run(self):
+        previous = self._scan()
+        while not _stop.wait(POLL_INTERVAL):
+            current = self._scan()
+            for path, sig in current.items():
+                if previous.get(path) != sig:
+                    _changes.put(path)
+            previous = current
+
+
+def start(root):
+    """Começa a vigiar root (normalmente assets/)."""
+    global backend, _watcher, _pool
+    # Só aqui: com --fast-start isto corre depois do primeiro frame
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    try:
+        _watcher = _InotifyWatcher(root)
+        backend = "inotify"
+    except (OSError, AttributeError) as e:
+        print(f"[WARN] inotify unavailable ({e}); polling every {POLL_INTERVAL}s")
+        _watcher = _PollingWatcher(root)
+        backend = "polling"
+
+    _pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+    _watcher.start()
+    print(f"[RELOAD] Watching {root} ({backend})")
+
+
+def stop():
+    global backend
+    _stop.set()
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    backend = None
+
+
+# ---------------------------------------------------------
+# TRABALHO NO PROCESSO AUXILIAR (sem GL)
+# ---------------------------------------------------------
+
+def _parse_model(path, loader, optimize):
+    """OBJ + MTL + imagens -> (CompactMesh por parte, materiais, {caminho: imagem})."""
+    if loader == "stream":
+        stream = obj_loader.ObjStream(path, load_textures=False)
+        meshes = {}
+        for name, mesh in stream:
+            meshes[obj_loader.unique_name(meshes, name)] = mesh
+        materials = stream.materials
+    elif optimize:
+        meshes, materials = mesh_opt.load_obj_optimized(path, load_textures=False)
+    else:
+        parsed, materials = obj_loader.load_obj_multipart(path, load_textures=False)
+        meshes = {name: obj_loader.compact_mesh(m) for name, m in parsed.items()}
+
+    images = {m.texture_path: obj_loader.decode_texture(m.texture_path)
+              for m in materials.values() if m.texture_path}
+    return meshes, materials, images
+
+
+def _decode_texture(path):
+    return obj_loader.decode_texture(path)
+
+
+# ---------------------------------------------------------
+# FRAME A FRAME (thread de render)
+# ---------------------------------------------------------
+
+def _same_file(a, b):
+    return os.path.normcase(os.path.abspath(a)) == os.path.normcase(os.path.abspath(b))
+
+
+def _busy(target):
+    return any(job.target is target for job in _jobs)
+
+
+def _submit(path):
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext in MODEL_EXTS:
+        for model in scene_loader.loaded_models_using(path):
+            if _busy(model):
+                _pending[path] = time.monotonic()     # tentar de novo depois
+                continue
+            future = _pool.submit(_parse_model, scene_loader.model_path(model), model.loader,
+                                  model.optimize)
+            _jobs.append(_Job("model", model, path, future))
+
+    elif ext in TEXTURE_EXTS:
+        tex_ids = [tid for tid, p in obj_loader.texture_paths.items() if _same_file(p, path)]
+        if tex_ids:
+            _jobs.append(_Job("texture", tex_ids, path, _pool.submit(_decode_texture, path)))
+
+
+def _respecify_texture(tex_id, decoded):
+    """Nova imagem no mesmo id de textura (mipmaps refeitos se o filtro os usar)."""
+    width, height, data = decoded
+    glBindTexture(GL_TEXTURE_2D, tex_id)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, data)
+    min_filter = glGetTexParameteriv(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER)
+    if min_filter not in (GL_NEAREST, GL_LINEAR):
+        glGenerateMipmap(GL_TEXTURE_2D)
+    glBindTexture(GL_TEXTURE_2D, 0)
+    obj_loader.texture_bytes[tex_id] = width * height * 4
+
+
+def _apply(job):
+    try:
+        result = job.future.result()
+    except Exception as e:
+        print(f"[WARN] Reload of {job.path} failed: {e}")
+        return
+    parse_ms = (time.perf_counter() - job.started) * 1000.0
+
+    t0 = time.perf_counter()
+    if job.kind == "texture":
+        if result is None:
+            return
+        for tex_id in job.target:
+            if tex_id in obj_loader.texture_paths:      # pode ter sido libertada entretanto
+                _respecify_texture(tex_id, result)
+        label = os.path.basename(job.path)
+    else:
+        meshes, materials, images = result
+        model = job.target
+        # Novo primeiro na GPU; replace_model só apaga o antigo depois da troca
+        for m in materials.values():
+            if m.texture_path:
+                m.texture_id = obj_loader.load_texture(m.texture_path, images.get(m.texture_path))
+        for mesh in meshes.values():
+            mesh.upload(materials)
+            if model.loader == "stream":
+                mesh.release()       # como load_obj_streaming
+        if not scene_loader.replace_model(model, meshes, materials):
+            # Descarregado enquanto era lido: deitar fora
+            for mesh in meshes.values():
+                mesh.free_gl()
+            obj_loader.free_materials(materials)
+            return
+        label = model.id
+
+    print(f"[RELOAD] {label}: read {parse_ms:.0f} ms (background), "
+          f"swap {(time.perf_counter() - t0) * 1000.0:.1f} ms")
+
+
+def poll():
+    """Chamado uma vez por frame: agenda alterações e aplica no máximo um resultado (True)."""
+    if backend is None:
+        return False
+
+    now = time.monotonic()
+    while True:
+        try:
+            _pending[_changes.get_nowait()] = now
+        except queue.Empty:
+            break
+
+    for path, changed in list(_pending.items()):
+        if now - changed >= DEBOUNCE:
+            del _pending[path]
+            _submit(path)
+
+    for job in _jobs:
+        if job.future.done():
+            _jobs.remove(job)
+            _apply(job)
+            return True
+    return False
@@ -0,0 +1,138 @@
+# input_bench.py
+# ------------------------------------------------------------
+#  CUSTO DO INPUT COM RATOS DE 1000 Hz (sem janela)
+# ------------------------------------------------------------
+#  Gera movimento de rato a RATE_HZ e frames a FPS e compara:
+#    - antes: cada evento suavizava, rodava a câmara, fazia
+#      glutWarpPointer + glutPostRedisplay, e o warp gerava um
+#      evento sintético que voltava a passar pelo handler;
+#    - agora: scene.mouse_motion só guarda a posição e
+#      scene._apply_mouse suaviza / faz o warp uma vez por passo.
+#  Sem janela os warps e redisplays não chegam ao GLUT: o tempo
+#  medido é só o do Python, e as contagens por segundo dizem quantas
+#  idas ao servidor de janelas cada versão faria.
+#
+#  python input_bench.py [--rate 1000] [--fps 60] [--seconds 5]
+# ------------------------------------------------------------
+import sys
+import time
+
+import numpy as np
+
+import replay
+import scene
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+RATE_HZ = 1000
+FPS = 60
+SECONDS = 5.0
+SPEED_PX = 1.5                  # deslocamento médio por evento
+
+
+def _motion(rate_hz, seconds, seed=1):
+    """(N, 2) deltas inteiros por evento (um gesto lento com ruído)."""
+    rng = np.random.default_rng(seed)
+    n = int(rate_hz * seconds)
+    t = np.arange(n) / rate_hz
+    base = np.stack([np.cos(t * 0.7), np.sin(t * 1.3) * 0.4], axis=1) * SPEED_PX
+    return np.rint(base + rng.normal(scale=0.6, size=(n, 2))).astype(int)
+
+
+class _Legacy:
+    """O handler antigo (por evento), com o mesmo estado de câmara."""
+
+    def __init__(self):
+        self.warping = False
+        self.sx = self.sy = 0.0
+        self.yaw = scene.free_yaw
+        self.pitch = scene.free_pitch
+        self.events = self.warps = self.redisplays = 0
+
+    def motion(self, x, y):
+        self.events += 1
+        if self.warping:
+            self.warping = False
+            return
+        dx = x - scene.center_x
+        dy = y - scene.center_y
+        alpha = scene.MOUSE_SMOOTH
+        self.sx = self.sx * (1 - alpha) + dx * alpha
+        self.sy = self.sy * (1 - alpha) + dy * alpha
+        self.yaw = (self.yaw - self.sx * scene.MOUSE_SENS) % 360.0
+        self.pitch = max(-89.0, min(89.0, self.pitch - self.sy * scene.MOUSE_SENS))
+        self.warping = True
+        self.warps += 1
+        self.redisplays += 1
+
+
+def _run_legacy(deltas, rate_hz, fps):
+    legacy = _Legacy()
+    cx, cy = scene.center_x, scene.center_y
+    per_frame = rate_hz / fps
+    t0 = time.perf_counter()
+    for i, (dx, dy) in enumerate(deltas):
+        legacy.motion(cx + dx, cy + dy)
+        legacy.motion(cx, cy)           # evento sintético do warp
+        if (i + 1) % per_frame < 1.0:
+            legacy.redisplays += 1      # o do idle
+    elapsed = time.perf_counter() - t0
+    return elapsed, legacy.events, legacy.warps, legacy.redisplays, legacy.yaw
+
+
+def _run_coalesced(deltas, rate_hz, fps):
+    handler = replay.recorded(replay.MOTION, scene.mouse_motion)   # como em main.py
+    cx, cy = scene.center_x, scene.center_y
+    per_frame = rate_hz / fps
+    scene.motion_events = scene.pointer_warps = 0
+    x, y = cx, cy
+    frames = 0
+    t_events = t_frames = 0.0
+    for i, (dx, dy) in enumerate(deltas):
+        x += dx
+        y += dy
+        t0 = time.perf_counter()
+        handler(x, y)
+        t_events += time.perf_counter() - t0
+        if (i + 1) % per_frame < 1.0:
+            t0 = time.perf_counter()
+            warps = scene.pointer_warps
+            scene._apply_mouse()
+            t_frames += time.perf_counter() - t0
+            if scene.pointer_warps != warps:
+                x, y = cx, cy
+                handler(x, y)           # evento sintético do warp
+            frames += 1
+    return t_events + t_frames, scene.motion_events, scene.pointer_warps, frames, scene.free_yaw
+
+
+def benchmark(rate_hz=RATE_HZ, fps=FPS, seconds=SECONDS):
+    scene.headless = True
+    scene.cam_mode = scene.CAM_FREE
+    yaw0, pitch0 = scene.free_yaw, scene.free_pitch
+    deltas = _motion(rate_hz, seconds)
+
+    old_s, old_events, old_warps, old_redisplays, old_yaw = _run_legacy(deltas, rate_hz, fps)
+    new_s, new_events, new_warps, new_redisplays, new_yaw = _run_coalesced(deltas, rate_hz, fps)
+    scene.free_yaw, scene.free_pitch = yaw0, pitch0
+
+    print(f"[INPUT] {rate_hz} Hz mouse, {fps} fps, {seconds:.0f} s ({len(deltas)} motion events)")
+    for label, s, events, warps, redisplays in (
+            ("per-event", old_s, old_events, old_warps, old_redisplays),
+            ("coalesced", new_s, new_events, new_warps, new_redisplays)):
+        print(f"  {label:<10} {events / seconds:7.0f} handler calls/s  "
+              f"{warps / seconds:6.0f} warps/s  {redisplays / seconds:6.0f} redisplays/s  "
+              f"{s / seconds * 1000:6.2f} ms CPU/s  ({s / max(events, 1) * 1e6:.2f} us/call)")
+    turned = abs(yaw0 - old_yaw), abs(yaw0 - new_yaw)
+    print(f"  yaw change: per-event {turned[0]:.2f} deg, coalesced {turned[1]:.2f} deg")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    def _opt(name, default, kind):
+        return kind(args[args.index(name) + 1]) if name in args else default
+
+    benchmark(_opt("--rate", RATE_HZ, int), _opt("--fps", FPS, int), _opt("--seconds", SECONDS, float))
@@ -0,0 +1,536 @@
+# lightmap.py
+# ------------------------------------------------------------
+#  LIGHTMAPS PRÉ-CALCULADOS (dia / noite) + OCLUSÃO AMBIENTE
+# ------------------------------------------------------------
+#  Os objetos estáticos (casa, árvores, vacas, garagem sem a porta)
+#  são iluminados offline por um ray tracer numpy sobre o BVH da
+#  própria malha (bvh.MeshBVH.occluded):
+#    - sol / lua: N·L com raio de sombra;
+#    - ambiente: AO com raios no hemisfério (peso cosseno);
+#    - lâmpada da garagem (só à noite): spot com atenuação e sombra.
+#  As constantes das luzes são as de lighting.update().
+#
+#  Segundo conjunto de UVs: cada triângulo recebe uma célula própria
+#  de CELL x CELL texels num atlas em grelha, com os cantos nos
+#  centros dos texels (o filtro bilinear nunca sai da célula). Os
+#  texels fora do triângulo ficam com o ponto mais próximo da aresta,
+#  o que faz de margem contra costuras.
+#
+#  O resultado fica ao lado da cache de malhas, um ficheiro por
+#  instância (<nome>.lightmap.<chave>.npz), invalidado pela data/
+#  tamanho do OBJ. Em jogo só se lê a cache: os objetos com lightmap
+#  são desenhados sem GL_LIGHTING (textura base x lightmap na unidade
+#  1) e a tecla F troca o conjunto dia/noite.
+#
+#  python lightmap.py [--workers N] [--cell N]   bake de toda a cena
+# ------------------------------------------------------------
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+from OpenGL.GL import *
+
+import lighting
+import startup
+import telemetry
+import transforms
+from bvh import MeshBVH
+from obj_loader import CompactMesh, texture_bytes
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+CELL = 4                        # texels por lado da célula de cada triângulo
+MAX_ATLAS = 2048                # lado máximo do atlas (reduz CELL se preciso)
+AO_SAMPLES = 8                  # raios de AO por texel
+AO_DISTANCE = 0.10              # alcance da AO (fração da diagonal do objeto)
+RAY_OFFSET = 1e-3               # afastamento da superfície (fração da diagonal)
+RAY_BATCH = 2048                # raios por chamada a MeshBVH.occluded
+CHUNK_TEXELS = 4096             # texels por tarefa do pool
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".lightmap.%s.npz"
+
+# Luzes (as mesmas de lighting.update(); o ambiente global é o do GL, 0.2)
+GLOBAL_AMBIENT = 0.2
+SUN_DIR = np.array([0.3, 1.0, 0.4]) / np.linalg.norm([0.3, 1.0, 0.4])
+DAY_DIFFUSE = np.array([1.0, 0.95, 0.8])
+DAY_AMBIENT = np.array([0.4, 0.4, 0.4])
+NIGHT_DIFFUSE = np.array([0.15, 0.15, 0.25])
+NIGHT_AMBIENT = np.array([0.02, 0.02, 0.05])
+
+LAMP_POS = np.array([0.0, 12.0, -36.0])
+LAMP_DIR = np.array([0.0, -1.0, 0.2]) / np.linalg.norm([0.0, -1.0, 0.2])
+LAMP_COLOR = np.array([1.0, 0.7, 0.3])
+LAMP_CUTOFF_DEG = 45.0
+LAMP_EXPONENT = 10.0
+LAMP_ATTENUATION = (0.2, 0.01, 0.001)
+LAMP_MIN = 1.0 / 512.0          # contribuições abaixo disto não lançam raio
+
+SETS = ("day", "night", "night_lamp")
+
+
+# ---------------------------------------------------------
+# GEOMETRIA (triângulos em espaço do mundo, pela ordem de desenho)
+# ---------------------------------------------------------
+
+def _parts(meshes, skip=()):
+    """[(nome, cpu_data, [triângulos por material])] das malhas com lightmap."""
+    parts = []
+    for name, mesh in meshes.items():
+        if name in skip or not isinstance(mesh, CompactMesh):
+            continue
+        data = mesh.cpu_data()
+        if data[0] is None:
+            continue
+        parts.append((name, data, [len(f) for f in data[3].values()]))
+    return parts
+
+
+def _world_triangles(parts, matrix):
+    """(T,3,3) posições e (T,3,3) normais por canto, já transformadas por matrix."""
+    tris, nrms = [], []
+    for _, (positions, _, normals, faces_by_material), _ in parts:
+        for faces in faces_by_material.values():
+            if len(faces) == 0:
+                continue
+            p = positions[faces[:, :, 0]].astype(np.float64)
+            if len(normals) and (faces[:, :, 2] >= 0).all():
+                n = normals[faces[:, :, 2]].astype(np.float64)
+            else:
+                n = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])[:, None, :].repeat(3, axis=1)
+            tris.append(p)
+            nrms.append(n)
+    if not tris:
+        return np.zeros((0, 3, 3)), np.zeros((0, 3, 3))
+    tris = transforms.transform_points(matrix, np.concatenate(tris))
+    nrms = np.concatenate(nrms) @ matrix[:3, :3].T
+    nrms /= np.maximum(np.linalg.norm(nrms, axis=-1, keepdims=True), 1e-12)
+    return tris, nrms
+
+
+# ---------------------------------------------------------
+# ATLAS (segundo conjunto de UVs)
+# ---------------------------------------------------------
+
+def atlas_layout(count, cell=CELL):
+    """(cell, colunas, linhas) do atlas para count triângulos."""
+    cols = max(1, int(np.ceil(np.sqrt(count))))
+    cell = max(2, min(cell, MAX_ATLAS // cols))
+    rows = max(1, -(-count // cols))
+    return cell, cols, rows
+
+
+def _texel_barycentrics(cell):
+    """(cell*cell, 3) pesos (A, B, C) de cada texel da célula, presos ao triângulo."""
+    j, i = np.mgrid[0:cell, 0:cell]
+    u = i.ravel() / (cell - 1.0)
+    v = j.ravel() / (cell - 1.0)
+    s = u + v
+    over = s > 1.0
+    u[over] /= s[over]
+    v[over] /= s[over]
+    return np.stack([1.0 - u - v, u, v], axis=1)
+
+
+def lightmap_uvs(count, cell, cols, rows):
+    """(T,3,2) UVs no atlas dos cantos (A, B, C) de cada triângulo."""
+    k = np.arange(count)
+    x0 = (k % cols) * cell
+    y0 = (k // cols) * cell
+    w, h = cols * cell, rows * cell
+    lo, hi = 0.5, cell - 0.5
+    uv = np.empty((count, 3, 2), dtype=np.float32)
+    uv[:, 0] = np.stack([(x0 + lo) / w, (y0 + lo) / h], axis=1)
+    uv[:, 1] = np.stack([(x0 + hi) / w, (y0 + lo) / h], axis=1)
+    uv[:, 2] = np.stack([(x0 + lo) / w, (y0 + hi) / h], axis=1)
+    return uv
+
+
+def _to_atlas(values, cell, cols, rows):
+    """(T, cell*cell, C) por triângulo -> imagem (H, W, C) do atlas."""
+    count, _, channels = values.shape
+    grid = np.zeros((rows * cols, cell, cell, channels), dtype=values.dtype)
+    grid[:count] = values.reshape(count, cell, cell, channels)
+    grid = grid.reshape(rows, cols, cell, cell, channels).transpose(0, 2, 1, 3, 4)
+    return grid.reshape(rows * cell, cols * cell, channels)
+
+
+# ---------------------------------------------------------
+# RAY TRACING (corre nos processos do pool)
+# ---------------------------------------------------------
+_worker_bvh = None
+_worker_lamp = False
+
+
+def _init_worker(tris, lamp):
+    global _worker_bvh, _worker_lamp
+    _worker_bvh = MeshBVH(tris)
+    _worker_lamp = lamp
+
+
+def _occluded(origins, directions, t_max):
+    hit = np.zeros(len(origins), dtype=bool)
+    t_max = np.broadcast_to(np.asarray(t_max, dtype=np.float64), hit.shape)
+    for i in range(0, len(origins), RAY_BATCH):
+        s = slice(i, i + RAY_BATCH)
+        hit[s] = _worker_bvh.occluded(origins[s], directions[s], t_max[s])
+    return hit
+
+
+def _hemisphere(normals, rng):
+    """Uma direção por normal, distribuída pelo cosseno no hemisfério."""
+    u1 = rng.random(len(normals))
+    u2 = rng.random(len(normals)) * 2.0 * np.pi
+    r = np.sqrt(u1)
+    helper = np.where(np.abs(normals[:, :1]) > 0.9, [[0.0, 1.0, 0.0]], [[1.0, 0.0, 0.0]])
+    t = np.cross(normals, helper)
+    t /= np.linalg.norm(t, axis=1, keepdims=True)
+    b = np.cross(normals, t)
+    return (t * (r * np.cos(u2))[:, None] + b * (r * np.sin(u2))[:, None]
+            + normals * np.sqrt(1.0 - u1)[:, None])
+
+
+def _shade(job):
+    """(sol, ao, lâmpada) por texel: N·L x visibilidade, fração do hemisfério livre, spot."""
+    points, normals, offset, ao_distance, seed = job
+    rng = np.random.default_rng(seed)
+    origins = points + normals * offset
+
+    ndl = normals @ SUN_DIR
+    sun = np.maximum(ndl, 0.0)
+    lit = sun > 0.0
+    sun[lit] *= ~_occluded(origins[lit], np.broadcast_to(SUN_DIR, (lit.sum(), 3)), np.inf)
+
+    free = np.zeros(len(points))
+    for _ in range(AO_SAMPLES):
+        free += ~_occluded(origins, _hemisphere(normals, rng), ao_distance)
+    ao = free / AO_SAMPLES
+
+    lamp = np.zeros(len(points))
+    if _worker_lamp:
+        to_lamp = LAMP_POS - points
+        d = np.linalg.norm(to_lamp, axis=1)
+        to_lamp /= np.maximum(d, 1e-12)[:, None]
+        cos_spot = -(to_lamp @ LAMP_DIR)
+        spot = np.where(cos_spot >= np.cos(np.radians(LAMP_CUTOFF_DEG)),
+                        np.maximum(cos_spot, 0.0) ** LAMP_EXPONENT, 0.0)
+        kc, kl, kq = LAMP_ATTENUATION
+        lamp = spot * np.maximum((normals * to_lamp).sum(axis=1), 0.0) / (kc + kl * d + kq * d * d)
+        lit = lamp * LAMP_COLOR.max() > LAMP_MIN
+        lamp[lit] *= ~_occluded(origins[lit], to_lamp[lit], d[lit])
+        lamp[~lit] = 0.0
+    return sun, ao, lamp
+
+
+# ---------------------------------------------------------
+# BAKE
+# ---------------------------------------------------------
+
+def _lamp_reaches(tris):
+    """A lâmpada só entra nos objetos dentro do alcance (spot + atenuação)."""
+    to = tris.reshape(-1, 3) - LAMP_POS
+    d = np.linalg.norm(to, axis=1)
+    cos_spot = (to @ LAMP_DIR) / np.maximum(d, 1e-12)
+    kc, kl, kq = LAMP_ATTENUATION
+    att = 1.0 / (kc + kl * d + kq * d * d)
+    # Folga de um terço do cone: um triângulo pode atravessá-lo sem ter cantos dentro
+    inside = cos_spot >= np.cos(np.radians(min(LAMP_CUTOFF_DEG * 1.33, 89.0)))
+    return bool((inside & (att * LAMP_COLOR.max() > LAMP_MIN)).any())
+
+
+def _compose(sun, ao, lamp, use_lamp):
+    """Imagens RGB (uint8) de cada conjunto; a AO já vem multiplicada no ambiente."""
+    def encode(rgb):
+        return np.clip(rgb * 255.0 + 0.5, 0.0, 255.0).astype(np.uint8)
+
+    sun = sun[..., None]
+    ao = ao[..., None]
+    images = {
+        "day": encode((GLOBAL_AMBIENT + DAY_AMBIENT) * ao + DAY_DIFFUSE * sun),
+        "night": encode((GLOBAL_AMBIENT + NIGHT_AMBIENT) * ao + NIGHT_DIFFUSE * sun),
+    }
+    if use_lamp:
+        images["night_lamp"] = encode((GLOBAL_AMBIENT + NIGHT_AMBIENT) * ao + NIGHT_DIFFUSE * sun
+                                      + LAMP_COLOR * lamp[..., None])
+    return images
+
+
+def bake(obj_path, meshes, matrix, skip=(), workers=None, cell=CELL):
+    """Calcula e grava os lightmaps de uma instância; devolve o Lightmap."""
+    parts = _parts(meshes, skip)
+    tris, nrms = _world_triangles(parts, matrix)
+    count = len(tris)
+    if count == 0:
+        return None
+    t0 = time.perf_counter()
+
+    cell, cols, rows = atlas_layout(count, cell)
+    bary = _texel_barycentrics(cell)
+    points = np.einsum("sk,tkc->tsc", bary, tris).reshape(-1, 3)
+    normals = np.einsum("sk,tkc->tsc", bary, nrms).reshape(-1, 3)
+    normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+
+    diag = float(np.linalg.norm(tris.reshape(-1, 3).max(axis=0) - tris.reshape(-1, 3).min(axis=0)))
+    use_lamp = _lamp_reaches(tris)
+    jobs = [(points[i:i + CHUNK_TEXELS], normals[i:i + CHUNK_TEXELS],
+             RAY_OFFSET * diag, AO_DISTANCE * diag, i)
+            for i in range(0, len(points), CHUNK_TEXELS)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(tris, use_lamp)) as pool:
+            results = list(pool.map(_shade, jobs))
+    else:
+        _init_worker(tris, use_lamp)
+        results = [_shade(job) for job in jobs]
+
+    sun, ao, lamp = (np.concatenate(r).reshape(count, cell * cell) for r in zip(*results))
+    images = {name: _to_atlas(img, cell, cols, rows)
+              for name, img in _compose(sun, ao, lamp, use_lamp).items()}
+    ao_map = _to_atlas(np.clip(ao * 255.0 + 0.5, 0, 255).astype(np.uint8)[..., None],
+                       cell, cols, rows)[..., 0]
+
+    uvs = lightmap_uvs(count, cell, cols, rows)
+    save_cache(obj_path, matrix, skip, parts, cell, uvs, images, ao_map)
+    print(f"[LIGHTMAP] {os.path.basename(obj_path)}: {count} tris, atlas "
+          f"{cols * cell}x{rows * cell} ({cell}x{cell}/tri), {len(points)} texels, "
+          f"lamp {'yes' if use_lamp else 'no'} in {time.perf_counter() - t0:.1f} s "
+          f"({workers} workers)")
+    return Lightmap(parts, uvs, images)
+
+
+# ---------------------------------------------------------
+# CACHE (ao lado da cache de malhas)
+# ---------------------------------------------------------
+
+def _instance_key(matrix, skip):
+    h = hashlib.sha1(np.round(np.asarray(matrix, dtype=np.float64), 4).tobytes())
+    h.update(",".join(sorted(skip)).encode("utf-8"))
+    return h.hexdigest()[:10]
+
+
+def cache_path(obj_path, matrix, skip=()):
+    return os.path.splitext(obj_path)[0] + CACHE_SUFFIX % _instance_key(matrix, skip)
+
+
+def _source_key(obj_path):
+    st = os.stat(obj_path)
+    return {"version": CACHE_VERSION, "ao_samples": AO_SAMPLES,
+            "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def _part_list(parts):
+    return [[name, counts] for name, _, counts in parts]
+
+
+def save_cache(obj_path, matrix, skip, parts, cell, uvs, images, ao_map):
+    header = dict(_source_key(obj_path), cell=cell, parts=_part_list(parts),
+                  sets=sorted(images))
+    arrays = {"uv": uvs, "ao": ao_map}
+    arrays.update(images)
+    arrays["header"] = np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8)
+
+    path = cache_path(obj_path, matrix, skip)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+def load(obj_path, meshes, matrix, skip=()):
+    """Lightmap da cache para esta instância, ou None (sem bake ou desatualizado)."""
+    path = cache_path(obj_path, matrix, skip)
+    if not os.path.isfile(path):
+        startup.log(f"[LIGHTMAP] {os.path.basename(obj_path)}: not baked "
+                    f"(python lightmap.py); using dynamic lighting")
+        return None
+    parts = _parts(meshes, skip)
+    try:
+        with np.load(path) as data:
+            header = json.loads(data["header"].tobytes().decode("utf-8"))
+            key = _source_key(obj_path)
+            if any(header.get(k) != v for k, v in key.items()) or \
+                    header["parts"] != _part_list(parts):
+                print(f"[WARN] Stale lightmap {path}; using dynamic lighting")
+                return None
+            images = {name: data[name] for name in header["sets"]}
+            uvs = data["uv"]
+    except (OSError, KeyError, ValueError) as e:
+        print(f"[WARN] Ignoring lightmap {path}: {e}")
+        return None
+    startup.log(f"[LIGHTMAP] {os.path.basename(obj_path)}: {len(uvs)} tris, "
+                f"sets {', '.join(sorted(images))}")
+    return Lightmap(parts, uvs, images)
+
+
+# ---------------------------------------------------------
+# DESENHO
+# ---------------------------------------------------------
+
+class Lightmap:
+    """
+    Lightmaps de uma instância. As display lists (uma por parte) só
+    ligam a textura base na unidade 0; o lightmap da unidade 1 é ligado
+    em begin(), por isso trocar dia/noite não recompila nada.
+    """
+
+    def __init__(self, parts, uvs, images):
+        self.images = images
+        self.textures = {}
+        self._lists = {}
+        self._uvs = {}
+        start = 0
+        for name, _, counts in parts:
+            per_material = []
+            for n in counts:
+                per_material.append(np.ascontiguousarray(uvs[start:start + n].reshape(-1, 2)))
+                start += n
+            self._uvs[name] = per_material
+
+    def covers(self, name):
+        return name in self._uvs
+
+    def current_set(self):
+        if lighting.sun_enabled:
+            return "day"
+        if lighting.garage_light_enabled and "night_lamp" in self.images:
+            return "night_lamp"
+        return "night"
+
+    def _upload(self):
+        for name, img in self.images.items():
+            h, w, _ = img.shape
+            tex = glGenTextures(1)
+            glBindTexture(GL_TEXTURE_2D, tex)
+            glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, w, h, 0, GL_RGB, GL_UNSIGNED_BYTE,
+                         np.ascontiguousarray(img))
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+            self.textures[name] = tex
+            texture_bytes[tex] = w * h * 3
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def begin(self):
+        """Estado comum: sem iluminação por pixel, lightmap na unidade 1."""
+        if not self.textures:
+            self._upload()
+        glPushAttrib(GL_ENABLE_BIT | GL_TEXTURE_BIT | GL_CURRENT_BIT)
+        glDisable(GL_LIGHTING)
+        glColor3f(1.0, 1.0, 1.0)
+        glActiveTexture(GL_TEXTURE1)
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self.textures[self.current_set()])
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+        glActiveTexture(GL_TEXTURE0)
+
+    def end(self):
+        glPopAttrib()
+
+    def _compile(self, name, mesh, materials):
+        positions, texcoords, _, faces_by_material = mesh.cpu_data()
+        display_list = glGenLists(1)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glClientActiveTexture(GL_TEXTURE1)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glClientActiveTexture(GL_TEXTURE0)
+        glNewList(display_list, GL_COMPILE)
+
+        for (mtl_name, faces), uv2 in zip(faces_by_material.items(), self._uvs[name]):
+            if len(faces) == 0:
+                continue
+            idx = faces.reshape(-1, 3)
+            mat = materials.get(mtl_name) if materials else None
+            has_t = len(texcoords) > 0 and bool((idx[:, 1] >= 0).all())
+            if mat and mat.texture_id and has_t:
+                glEnable(GL_TEXTURE_2D)
+                glBindTexture(GL_TEXTURE_2D, mat.texture_id)
+                glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+                glTexCoordPointer(2, GL_FLOAT, 0, np.ascontiguousarray(texcoords[idx[:, 1]]))
+            else:
+                glDisable(GL_TEXTURE_2D)
+                glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+
+            glClientActiveTexture(GL_TEXTURE1)
+            glTexCoordPointer(2, GL_FLOAT, 0, uv2)
+            glClientActiveTexture(GL_TEXTURE0)
+            glVertexPointer(3, GL_FLOAT, 0, np.ascontiguousarray(positions[idx[:, 0]]))
+            glDrawArrays(GL_TRIANGLES, 0, len(idx))
+
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glEndList()
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glClientActiveTexture(GL_TEXTURE1)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glClientActiveTexture(GL_TEXTURE0)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        if mesh.reload is not None:
+            mesh.release()      # como CompactMesh.upload: a lista já tem tudo
+        return display_list
+
+    def draw(self, name, mesh, materials):
+        """Desenha uma parte (entre begin() e end())."""
+        if name not in self._lists:
+            self._lists[name] = self._compile(name, mesh, materials)
+        glCallList(self._lists[name])
+        telemetry.count(1, mesh.triangle_count)
+
+    def free_gl(self):
+        for display_list in self._lists.values():
+            glDeleteLists(display_list, 1)
+        self._lists = {}
+        if self.textures:
+            glDeleteTextures(list(self.textures.values()))
+            for tex in self.textures.values():
+                texture_bytes.pop(tex, None)
+            self.textures = {}
+
+
+# ---------------------------------------------------------
+# BAKE OFFLINE DA CENA
+# ---------------------------------------------------------
+
+def bake_scene(scene_path, workers=None, cell=CELL):
+    """Bake de todas as instâncias estáticas de assets/scene.json."""
+    import garage
+    import mesh_opt
+
+    base_dir = os.path.dirname(scene_path)
+    with open(scene_path, "r", encoding="utf-8") as f:
+        scene = json.load(f)
+
+    for model_id, spec in scene.get("models", {}).items():
+        instances = [i for i in scene.get("instances", []) if i.get("model") == model_id]
+        instances = [i for i in instances if i.get("role") != "tractor"]
+        if not instances or not spec.get("lightmap", True) or spec.get("loader") == "stream":
+            continue
+        path = os.path.join(base_dir, spec["path"])
+        meshes, _ = mesh_opt.load_obj_optimized(path, load_textures=False)
+        for inst in instances:
+            if inst.get("role") == "garage":
+                bake(path, meshes, garage.model_matrix(), (garage.GARAGE_DOOR_MESH_NAME,),
+                     workers, cell)
+            else:
+                matrix = transforms.object_matrix(tuple(inst.get("pos", (0.0, 0.0, 0.0))),
+                                                  float(inst.get("yaw", 0.0)),
+                                                  float(inst.get("scale", 1.0)))
+                bake(path, meshes, matrix, (), workers, cell)
+
+
+if __name__ == "__main__":
+    here = os.path.dirname(os.path.abspath(__file__))
+    args = sys.argv[1:]
+    workers = int(args[args.index("--workers") + 1]) if "--workers" in args else None
+    cell = int(args[args.index("--cell") + 1]) if "--cell" in args else CELL
+    bake_scene(os.path.join(here, "..", "assets", "scene.json"), workers, cell)
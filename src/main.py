@@ -1,5 +1,10 @@
 # main.py
 import sys
+
+# Perfil do arranque / --fast-start: antes de qualquer outro import
+import startup
+startup.configure(sys.argv)
+
 import os
 from PIL import Image
 
@@ -7,13 +12,20 @@ from OpenGL.GL import *
 from OpenGL.GLU import *
 from OpenGL.GLUT import *
 
-# Módulos do projeto
+# Módulos do projeto (os opcionais importam-se junto da sua opção, em main())
 import tractor
 import scene
 import farm
 import garage
 import lighting
-from obj_loader import load_obj_multipart
+import picking
+import scene_loader
+import dynbuf
+import gpu_mesh
+import replay
+import hot_reload
+import capture
+from obj_loader import texture_paths
 
 
 def load_texture(path, repeat=True):
@@ -40,8 +52,9 @@ def load_texture(path, repeat=True):
     
     glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, img_data)
     glGenerateMipmap(GL_TEXTURE_2D)
+    texture_paths[tex_id] = path   # hot-reload
     
-    print(f"[TEX] Loaded: {path} -> ID {tex_id}")
+    startup.log(f"[TEX] Loaded: {path} -> ID {tex_id}")
     return tex_id
 
 
@@ -77,88 +90,119 @@ def setup_opengl():
     glTexEnvf(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
 
 
-def load_assets():
-    """Carrega modelos 3D e texturas."""
+def parse_scene_arg(argv):
+    """--scene ficheiro.json -> caminho, ou None sem a opção; em falta ou inexistente mostra o uso e sai."""
+    if "--scene" not in argv:
+        return None
+    i = argv.index("--scene")
+    if i + 1 < len(argv) and os.path.isfile(argv[i + 1]):
+        return argv[i + 1]
+    print("usage: python main.py --scene scene.json   (e.g. generated by stress_scene.py)")
+    sys.exit(2)
+
+
+def load_assets(scene_path=None):
+    """Carrega a cena declarada em assets/scene.json, ou scene_path (modelos em streaming)."""
     base_dir = os.path.dirname(os.path.abspath(__file__))
     assets_dir = os.path.join(base_dir, "..", "assets")
-    models_dir = os.path.join(assets_dir, "models")
-    tex_dir    = os.path.join(assets_dir, "textures")
-
-    # --- TRACTOR ---
-    try:
-        tractor_path = os.path.join(models_dir, "Lambo", "Lambo.obj")
-        parts, mats = load_obj_multipart(tractor_path)
-        tractor.set_meshes(parts, mats)
-        print("[ASSET] Tractor Loaded")
-    except Exception as e: 
-        print(f"[WARN] Tractor failed: {e}")
-
-    # --- FARM PROPS ---
-    farm_models = os.path.join(models_dir, "farm")
-    
-    # Garage
-    try:
-        g_path = os.path.join(farm_models, "garage.obj")
-        g_parts, g_mats = load_obj_multipart(g_path)
-        garage.set_meshes(g_parts, g_mats)
-    except: 
-        print("[WARN] Garage missing")
 
-    # House
-    try:
-        h_path = os.path.join(farm_models, "House.obj")
-        h_parts, h_mats = load_obj_multipart(h_path)
-        farm.add_object(h_parts, h_mats, pos=(-50, -17, -15), yaw=90, scale=2.0)
-    except: 
-        print("[WARN] House missing")
+    # Spawn: câmara livre e trator
+    spawn = [(scene.free_pos[0], scene.free_pos[2]), tractor.get_position()]
 
-    # Cows
-    try:
-        c_path = os.path.join(farm_models, "cow.obj")
-        c_parts, c_mats = load_obj_multipart(c_path)
-        farm.add_object(c_parts, c_mats, pos=(25, 0, 5), yaw=90, scale=0.3)
-        farm.add_object(c_parts, c_mats, pos=(30, 0, 0), yaw=120, scale=0.3)
-    except: 
-        print("[WARN] Cow missing")
-
-    # Trees
-    try:
-        t_path = os.path.join(farm_models, "tree.obj")
-        t_parts, t_mats = load_obj_multipart(t_path)
-        farm.add_object(t_parts, t_mats, pos=(-40, 6.2, -30), yaw=20, scale=2.0)
-        farm.add_object(t_parts, t_mats, pos=(-30, 6.2, -35), yaw=-10, scale=2.2)
-        farm.add_object(t_parts, t_mats, pos=(40, 6.2, -30), yaw=-30, scale=2.0)
-    except: 
-        print("[WARN] Tree missing")
+    if scene_path is None:
+        scene_path = os.path.join(assets_dir, "scene.json")
+    with startup.span("load_scene"):
+        scene_loader.load_scene(scene_path, spawn,
+                                preload=not startup.fast)
 
     # --- TEXTURES ---
-    grass_id = load_texture(os.path.join(tex_dir, "grass4.jpg"))
-    dirt_id  = load_texture(os.path.join(tex_dir, "dirt.jpg"))
+    grass_path, dirt_path = scene_loader.ground_textures()
+    with startup.span("ground textures"):
+        grass_id = load_texture(grass_path) if grass_path else None
+        dirt_id  = load_texture(dirt_path) if dirt_path else None
     scene.set_ground_textures(grass_id, dirt_id)
 
+    # Recarregar assets alterados sem reiniciar
+    startup.defer(lambda: hot_reload.start(assets_dir))
+
+
+def _on_close():
+    """Janela a fechar: o que ainda precisa do contexto GL acaba aqui."""
+    capture.close()
+    replay.stop_recording()             # END + digest da gravação sem --frames
+
 
 def main():
-    glutInit(sys.argv)
-    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
-    glutInitWindowSize(800, 600)
-    glutCreateWindow(b"CG Tractor Farm Final")
+    # Opções com valor: validadas antes de abrir a janela e de carregar o que quer que seja
+    # Outra cena (ex.: gerada por stress_scene.py): python main.py --scene ficheiro.json
+    scene_path = parse_scene_arg(sys.argv)
+    replay_opts = replay.parse_args(sys.argv)
+    fleet_size = None
+    if "--fleet" in sys.argv:
+        import fleet
+        fleet_size = fleet.parse_args(sys.argv)
+
+    with startup.span("GL context (glutInit + window)"):
+        glutInit(sys.argv)
+        glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
+        glutInitWindowSize(800, 600)
+        glutCreateWindow(b"CG Tractor Farm Final")
     
     # Configuração inicial da cena
     scene._lock_cursor()
     scene.cam_mode = scene.CAM_FREE
 
-    setup_opengl()
-    load_assets()
+    with startup.span("setup_opengl"):
+        setup_opengl()
+    with startup.span("load_assets"):
+        load_assets(scene_path)
+    startup.defer(picking.prepare)     # BVHs: só no primeiro clique precisam de existir
+
+    # Vértices quantizados nos VBOs (16 em vez de 32 bytes): python main.py --quantize
+    gpu_mesh.quantize = "--quantize" in sys.argv
+
+    # Métricas em localhost (JSON / Prometheus): python main.py --telemetry [porta]
+    if "--telemetry" in sys.argv:
+        import telemetry
+        telemetry.start(telemetry.parse_args(sys.argv))
+
+    # Buffers dinâmicos sem mapeamento persistente (orphaning): python main.py --no-persistent
+    if "--no-persistent" in sys.argv:
+        dynbuf.persistent = False
+
+    # Preparação do frame numa thread (ver frame_pipeline.py): python main.py --pipeline
+    if "--pipeline" in sys.argv:
+        import frame_pipeline
+        frame_pipeline.start()
+
+    # Só redesenhar quando algo muda (portáteis a bateria): python main.py --on-demand
+    scene.on_demand = "--on-demand" in sys.argv
+
+    # Frota opcional: python main.py --fleet N
+    if fleet_size is not None:
+        fleet.init(fleet_size)
+
+    # Gravação / reprodução de input (ver replay.py)
+    if "replay" in replay_opts:
+        replay.start_replay(replay_opts["replay"], replay_opts.get("label", ""))
+    elif "record" in replay_opts:
+        replay.start_recording(replay_opts["record"], replay_opts.get("frames"),
+                               replay_opts.get("fixed_dt"))
 
     # Callbacks GLUT
-    glutDisplayFunc(scene.display)
-    glutReshapeFunc(scene.reshape)
-    glutKeyboardFunc(scene.keyboard)
-    glutKeyboardUpFunc(scene.keyboard_up)
-    glutSpecialFunc(scene.special_keys)
-    glutSpecialUpFunc(scene.special_keys_up)
+    glutDisplayFunc(replay.timed(scene.display))
+    glutReshapeFunc(replay.recorded(replay.RESHAPE, scene.reshape))
+    glutKeyboardFunc(replay.recorded(replay.KEY, scene.keyboard))
+    glutKeyboardUpFunc(replay.recorded(replay.KEY_UP, scene.keyboard_up))
+    glutSpecialFunc(replay.recorded(replay.SPECIAL, scene.special_keys))
+    glutSpecialUpFunc(replay.recorded(replay.SPECIAL_UP, scene.special_keys_up))
     glutIdleFunc(scene.idle)
-    glutPassiveMotionFunc(scene.mouse_motion)
+    glutPassiveMotionFunc(replay.recorded(replay.MOTION, scene.mouse_motion))
+    glutMouseFunc(replay.recorded(replay.BUTTON, scene.mouse_button))
+    try:
+        glutCloseFunc(_on_close)        # freeglut; noutros GLUT só fica o atexit
+    except Exception:
+        pass
 
     glutMainLoop()
 
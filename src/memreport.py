@@ -0,0 +1,171 @@
+# memreport.py
+# ------------------------------------------------------------
+#  RELATÓRIO DE MEMÓRIA DOS ASSETS (tracemalloc + RSS)
+# ------------------------------------------------------------
+#  Carrega os modelos de assets/scene.json (sem janela, texturas só
+#  medidas) em três representações e compara:
+#    objmesh   ObjMesh: listas de tuplos Python (load_obj_multipart)
+#    compact   CompactMesh de mesh_opt, com a cópia de CPU presa
+#    released  o mesmo depois de upload(): arrays libertados, relidos
+#              da .meshcache.npz só quando alguém os pede (cpu_data)
+#  Cada modo corre num processo próprio, duas vezes: com tracemalloc
+#  (bytes por modelo) e sem (RSS, que o tracemalloc inflacionaria).
+#
+#  python memreport.py [--mode objmesh|compact|released]
+# ------------------------------------------------------------
+import gc
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+from PIL import Image
+
+import mesh_opt
+import telemetry
+from obj_loader import CompactMesh, load_obj_multipart
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+MODES = ("objmesh", "compact", "released")
+TOP_MESHES = 8                  # malhas mais pesadas listadas por modo
+
+
+def _deep_size(obj, seen=None):
+    """Bytes de um objeto Python e do que contém (listas, tuplos, dicts, arrays)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if hasattr(obj, "nbytes"):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_size(v, seen) for v in obj)
+    return size
+
+
+def mesh_bytes(mesh, seen=None):
+    """Memória de CPU de uma malha (as partes de um ObjMesh partilham a pool)."""
+    if isinstance(mesh, CompactMesh):
+        return mesh.nbytes
+    seen = set() if seen is None else seen
+    return sum(_deep_size(getattr(mesh, a), seen)
+               for a in ("vertices", "texcoords", "normals", "faces_by_material"))
+
+
+def texture_sizes(materials):
+    """{caminho: (largura, altura)} das texturas (só o cabeçalho da imagem)."""
+    sizes = {}
+    for m in materials.values():
+        if m.texture_path and os.path.isfile(m.texture_path) and m.texture_path not in sizes:
+            with Image.open(m.texture_path) as img:
+                sizes[m.texture_path] = img.size
+    return sizes
+
+
+def _scene_models(scene_path):
+    base_dir = os.path.dirname(scene_path)
+    with open(scene_path, "r", encoding="utf-8") as f:
+        scene = json.load(f)
+    models = []
+    for model_id, spec in scene.get("models", {}).items():
+        path = os.path.join(base_dir, spec["path"])
+        if os.path.isfile(path):
+            models.append((model_id, path))
+        else:
+            print(f"[WARN] {model_id}: {path} not found", file=sys.stderr)
+    return models
+
+
+def _load(path, mode):
+    if mode == "objmesh":
+        return load_obj_multipart(path, load_textures=False)
+    meshes, materials = mesh_opt.load_obj_optimized(path, load_textures=False)
+    if mode == "released":
+        for mesh in meshes.values():
+            if mesh.reload is not None:
+                mesh.release()      # o que CompactMesh.upload() faz depois da display list
+    return meshes, materials
+
+
+def measure(scene_path, mode, trace):
+    """Um modo, neste processo: dict com RSS, bytes por modelo, malhas e texturas."""
+    models = _scene_models(scene_path)
+    gc.collect()
+    rss0 = telemetry.rss_bytes()
+    if trace:
+        tracemalloc.start()
+
+    kept, per_model, meshes_out, textures = [], {}, [], {}
+    for model_id, path in models:
+        before = tracemalloc.get_traced_memory()[0] if trace else 0
+        meshes, materials = _load(path, mode)
+        kept.append((meshes, materials))
+        gc.collect()
+        if trace:
+            per_model[model_id] = tracemalloc.get_traced_memory()[0] - before
+        seen = set()
+        for name, mesh in meshes.items():
+            meshes_out.append((model_id, name, mesh_bytes(mesh, seen)))
+        for tex, (w, h) in texture_sizes(materials).items():
+            textures[os.path.basename(tex)] = (model_id, w, h)
+
+    gc.collect()
+    result = {"mode": mode, "rss": telemetry.rss_bytes() - rss0,
+              "models": per_model, "meshes": meshes_out, "textures": textures}
+    if trace:
+        result["traced"] = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+    return result
+
+
+def _run(mode, trace):
+    """measure() num processo limpo (o RSS de um modo não contamina o seguinte)."""
+    cmd = [sys.executable, os.path.abspath(__file__), "--mode", mode, "--json"]
+    if trace:
+        cmd.append("--trace")
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def report(scene_path, modes=MODES):
+    runs = {m: (_run(m, trace=True), _run(m, trace=False)) for m in modes}
+    mb = 1.0 / (1 << 20)
+
+    print(f"[MEM] {os.path.basename(scene_path)}: CPU memory of the loaded models")
+    print(f"  {'':<22}" + "".join(f"{m:>12}" for m in modes))
+    print(f"  {'RSS (MB)':<22}" + "".join(f"{runs[m][1]['rss'] * mb:12.1f}" for m in modes))
+    print(f"  {'tracemalloc (MB)':<22}" + "".join(f"{runs[m][0]['traced'] * mb:12.1f}" for m in modes))
+    for model_id in runs[modes[0]][0]["models"]:
+        print(f"  {'  ' + model_id:<22}" +
+              "".join(f"{runs[m][0]['models'].get(model_id, 0) * mb:12.2f}" for m in modes))
+
+    for m in modes:
+        heavy = sorted(runs[m][0]["meshes"], key=lambda r: -r[2])[:TOP_MESHES]
+        print(f"  heaviest meshes ({m}):")
+        for model_id, name, size in heavy:
+            print(f"    {model_id + '/' + name[:32]:<44} {size * mb:8.2f} MB")
+
+    textures = runs[modes[0]][0]["textures"]
+    total = sum(w * h * 4 for _, w, h in textures.values())
+    print(f"  textures (GPU RGBA8, also the transient CPU decode): {total * mb:.1f} MB")
+    for name, (model_id, w, h) in sorted(textures.items(), key=lambda t: -t[1][1] * t[1][2]):
+        print(f"    {model_id + '/' + name[:32]:<44} {w}x{h} {w * h * 4 * mb:8.2f} MB")
+
+
+if __name__ == "__main__":
+    here = os.path.dirname(os.path.abspath(__file__))
+    scene_path = os.path.join(here, "..", "assets", "scene.json")
+    args = sys.argv[1:]
+    if "--json" in args:
+        print(json.dumps(measure(scene_path, args[args.index("--mode") + 1], "--trace" in args)))
+    elif "--mode" in args:
+        report(scene_path, (args[args.index("--mode") + 1],))
+    else:
+        report(scene_path)
@@ -0,0 +1,518 @@
+# mesh_opt.py
+# ------------------------------------------------------------
+#  OTIMIZAÇÃO DE MALHAS (cache de vértices, overdraw, vertex fetch)
+# ------------------------------------------------------------
+#  A ordem dos triângulos que vem do exportador é má para a cache
+#  pós-transformação e para o early-Z. Cada parte passa por:
+#    1. weld: um vértice por combinação (v, vt, vn) distinta, para
+#       poder ser desenhada indexada (glDrawElements);
+#    2. Tipsify (Sander, Nehab & Barczak, 2007): reordena os
+#       triângulos de cada material para a cache de vértices;
+#    3. overdraw: corta essa ordem em clusters (onde a cache "reinicia",
+#       e onde a ACMR do cluster já está perto da do conjunto) e desenha
+#       primeiro os que estão virados para fora da malha;
+#    4. vertex fetch: renumera os vértices pela ordem do primeiro uso.
+#  O resultado fica numa cache binária ao lado do OBJ
+#  (<nome>.meshcache.npz), invalidada pela data/tamanho do OBJ.
+#  Depois do upload a cópia de CPU é relida da cache só se esta ainda
+#  tiver a chave e as partes da malha carregada; senão é refeita a
+#  partir do OBJ (se este não mudou) ou cpu_data() falha.
+#
+#  python mesh_opt.py [ficheiros.obj]   ACMR/ATVR antes/depois (e cache)
+#  python mesh_opt.py --gpu              + tempo de GPU das malhas maiores
+# ------------------------------------------------------------
+import glob
+import json
+from functools import partial
+import os
+import sys
+import time
+
+import numpy as np
+
+import startup
+from obj_loader import CompactMesh, compact_mesh, load_obj_multipart, load_mtl
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+CACHE_SIZE = 16                 # entradas da cache FIFO simulada (e alvo do Tipsify)
+OVERDRAW_THRESHOLD = 1.05       # perda de ACMR aceite para ordenar por overdraw
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".meshcache.npz"
+REPORT_MIN_TRIANGLES = 64       # partes mais pequenas só contam para o total
+
+
+# ---------------------------------------------------------
+# MÉTRICAS
+# ---------------------------------------------------------
+
+def cache_misses(indices, cache_size=CACHE_SIZE):
+    """Vértices transformados por uma cache FIFO de cache_size entradas."""
+    stamp = {}
+    misses = 0
+    for v in indices.tolist():
+        if misses - stamp.get(v, -cache_size - 1) > cache_size:
+            stamp[v] = misses
+            misses += 1
+    return misses
+
+
+def acmr(indices, cache_size=CACHE_SIZE):
+    """Average cache miss ratio: vértices transformados por triângulo (0.5 .. 3)."""
+    tris = len(indices) // 3
+    return cache_misses(indices, cache_size) / tris if tris else 0.0
+
+
+def atvr(indices, vertex_count, cache_size=CACHE_SIZE):
+    """Average transform to vertex ratio: 1.0 = cada vértice transformado uma vez."""
+    return cache_misses(indices, cache_size) / vertex_count if vertex_count else 0.0
+
+
+# ---------------------------------------------------------
+# WELD
+# ---------------------------------------------------------
+
+def _gather(pool, idx, width):
+    out = np.zeros((len(idx), width), dtype=np.float32)
+    if len(pool):
+        ok = idx >= 0
+        out[ok] = pool[idx[ok]]
+    return out
+
+
+def weld(mesh):
+    """
+    CompactMesh -> CompactMesh indexada: uma entrada nos três arrays por
+    canto (v, vt, vn) distinto, e as três colunas das faces a apontar para
+    ela (-1 onde o OBJ não tinha uv/normal).
+    """
+    if not isinstance(mesh, CompactMesh):
+        mesh = compact_mesh(mesh)
+    names = list(mesh.faces_by_material.keys())
+    if not names:
+        return mesh
+
+    corners = np.concatenate([mesh.faces_by_material[m].reshape(-1, 3) for m in names])
+    uniq, inv = np.unique(corners, axis=0, return_inverse=True)
+    inv = inv.reshape(-1)
+
+    faces = np.repeat(inv[:, None], 3, axis=1).astype(np.int32)
+    faces[corners[:, 1] < 0, 1] = -1
+    faces[corners[:, 2] < 0, 2] = -1
+
+    split = np.cumsum([len(mesh.faces_by_material[m]) * 3 for m in names])[:-1]
+    by_mtl = {m: f.reshape(-1, 3, 3) for m, f in zip(names, np.split(faces, split))}
+
+    welded = CompactMesh(mesh.positions[uniq[:, 0]],
+                         _gather(mesh.texcoords, uniq[:, 1], 2),
+                         _gather(mesh.normals, uniq[:, 2], 3),
+                         by_mtl)
+    welded.indexed = True
+    return welded
+
+
+# ---------------------------------------------------------
+# TIPSIFY
+# ---------------------------------------------------------
+
+def tipsify(tris, vertex_count, cache_size=CACHE_SIZE):
+    """
+    Ordem dos triângulos (índices em tris, int (T, 3)) otimizada para uma
+    cache de cache_size vértices. Linear no tamanho da malha.
+    """
+    tri_count = len(tris)
+    if tri_count == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Adjacência vértice -> triângulos (CSR)
+    flat = tris.reshape(-1)
+    order = np.argsort(flat, kind="stable")
+    adj = (order // 3).tolist()
+    live = np.bincount(flat, minlength=vertex_count)
+    start = np.concatenate(([0], np.cumsum(live))).tolist()
+    live = live.tolist()
+    tri_list = tris.tolist()
+
+    stamp = [0] * vertex_count
+    emitted = [False] * tri_count
+    dead_end = []
+    out = []
+
+    time_now = cache_size + 1
+    cursor = 0
+    fan = int(flat[0])
+    while fan >= 0:
+        candidates = set()
+        for t in adj[start[fan]:start[fan + 1]]:
+            if emitted[t]:
+                continue
+            emitted[t] = True
+            out.append(t)
+            for v in tri_list[t]:
+                dead_end.append(v)
+                candidates.add(v)
+                live[v] -= 1
+                if time_now - stamp[v] > cache_size:
+                    stamp[v] = time_now
+                    time_now += 1
+
+        # Próximo leque: o candidato que ainda estará na cache, mais antigo primeiro
+        fan, best = -1, -1
+        for v in candidates:
+            if live[v] > 0:
+                priority = 0
+                if time_now - stamp[v] + 2 * live[v] <= cache_size:
+                    priority = time_now - stamp[v]
+                if priority > best:
+                    fan, best = v, priority
+
+        if fan < 0:
+            # Beco sem saída: o vértice recente com triângulos por emitir, ou o próximo livre
+            while dead_end:
+                v = dead_end.pop()
+                if live[v] > 0:
+                    fan = v
+                    break
+            else:
+                while cursor < vertex_count and live[cursor] == 0:
+                    cursor += 1
+                fan = cursor if cursor < vertex_count else -1
+
+    return np.asarray(out, dtype=np.int64)
+
+
+# ---------------------------------------------------------
+# OVERDRAW
+# ---------------------------------------------------------
+
+def _clusters(tris, cache_size, threshold):
+    """Inícios dos clusters: onde a cache recomeça e onde a ACMR local já chega."""
+    flat = tris.reshape(-1).tolist()
+    hard = [0]
+    stamp = {}
+    misses = 0
+    for t in range(len(tris)):
+        before = misses
+        for v in flat[3 * t:3 * t + 3]:
+            if misses - stamp.get(v, -cache_size - 1) > cache_size:
+                stamp[v] = misses
+                misses += 1
+        if misses - before == 3 and t > 0:
+            hard.append(t)
+    hard.append(len(tris))
+
+    bounds = []
+    for a, b in zip(hard, hard[1:]):
+        target = acmr(tris[a:b].reshape(-1), cache_size) * threshold
+        start = a
+        stamp, misses = {}, 0
+        for t in range(a, b):
+            for v in flat[3 * t:3 * t + 3]:
+                if misses - stamp.get(v, -cache_size - 1) > cache_size:
+                    stamp[v] = misses
+                    misses += 1
+            if t + 1 < b and misses / (t + 1 - start) <= target:
+                bounds.append(start)
+                start = t + 1
+                stamp, misses = {}, 0
+        bounds.append(start)
+    return bounds + [len(tris)]
+
+
+def optimize_overdraw(tris, positions, cache_size=CACHE_SIZE, threshold=OVERDRAW_THRESHOLD):
+    """
+    Reordena clusters de tris (já em ordem de cache) de fora para dentro.
+    Devolve a permutação dos triângulos (identidade se a ACMR piorar mais
+    do que threshold).
+    """
+    identity = np.arange(len(tris))
+    if len(tris) < 2:
+        return identity
+    bounds = _clusters(tris, cache_size, threshold)
+    if len(bounds) <= 2:
+        return identity
+
+    p = positions[tris].astype(np.float64)                  # (T, 3, 3)
+    area_n = np.cross(p[:, 1] - p[:, 0], p[:, 2] - p[:, 0])  # normal * 2 área
+    centers = p.mean(axis=1)
+    center = centers.mean(axis=0)
+
+    keys = []
+    for a, b in zip(bounds, bounds[1:]):
+        n = area_n[a:b].sum(axis=0)
+        length = np.linalg.norm(n)
+        c = centers[a:b].mean(axis=0)
+        keys.append(float(np.dot(c - center, n / length)) if length > 0 else 0.0)
+
+    perm = np.concatenate([np.arange(bounds[i], bounds[i + 1])
+                           for i in np.argsort(keys)[::-1]])
+    if acmr(tris[perm].reshape(-1), cache_size) > acmr(tris.reshape(-1), cache_size) * threshold:
+        return identity
+    return perm
+
+
+# ---------------------------------------------------------
+# VERTEX FETCH + MALHA COMPLETA
+# ---------------------------------------------------------
+
+def optimize_vertex_fetch(mesh):
+    """Renumera os vértices de uma malha indexada pela ordem do primeiro uso (no sítio)."""
+    names = list(mesh.faces_by_material.keys())
+    if not names:
+        return mesh
+    flat = np.concatenate([mesh.faces_by_material[m][:, :, 0].reshape(-1) for m in names])
+    uniq, first = np.unique(flat, return_index=True)
+    order = uniq[np.argsort(first)]
+    remap = np.full(len(mesh.positions) + 1, -1, dtype=np.int32)
+    remap[order] = np.arange(len(order), dtype=np.int32)
+
+    mesh.positions = mesh.positions[order]
+    mesh.texcoords = mesh.texcoords[order]
+    mesh.normals = mesh.normals[order]
+    for faces in mesh.faces_by_material.values():
+        faces[:] = remap[faces]      # -1 -> remap[-1] = -1
+    return mesh
+
+
+def optimize(mesh, cache_size=CACHE_SIZE):
+    """ObjMesh/CompactMesh -> CompactMesh indexada com as três passagens aplicadas."""
+    mesh = weld(mesh)
+    vertex_count = len(mesh.positions)
+    for mtl, faces in mesh.faces_by_material.items():
+        tris = faces[:, :, 0].astype(np.int64)
+        order = tipsify(tris, vertex_count, cache_size)
+        order = order[optimize_overdraw(tris[order], mesh.positions, cache_size)]
+        mesh.faces_by_material[mtl] = faces[order]
+    return optimize_vertex_fetch(mesh)
+
+
+def mesh_stats(mesh, cache_size=CACHE_SIZE):
+    """(triângulos, vértices, ACMR, ATVR) de uma malha indexada, todos os materiais seguidos."""
+    faces = [f[:, :, 0].reshape(-1) for f in mesh.faces_by_material.values()]
+    indices = np.concatenate(faces) if faces else np.zeros(0, dtype=np.int32)
+    vertex_count = len(np.unique(indices))
+    return (len(indices) // 3, vertex_count,
+            acmr(indices, cache_size), atvr(indices, vertex_count, cache_size))
+
+
+# ---------------------------------------------------------
+# CACHE BINÁRIA
+# ---------------------------------------------------------
+
+def cache_path(obj_path):
+    return os.path.splitext(obj_path)[0] + CACHE_SUFFIX
+
+
+def _source_key(obj_path):
+    st = os.stat(obj_path)
+    return {"version": CACHE_VERSION, "cache_size": CACHE_SIZE,
+            "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+def _mtllib(obj_path):
+    """Último mtllib do OBJ (o mesmo que load_obj_multipart acaba por usar)."""
+    found = None
+    with open(obj_path, "r") as f:
+        for line in f:
+            if line.startswith("mtllib"):
+                parts = line.split()
+                if len(parts) > 1:
+                    found = parts[1]
+    return found
+
+
+def save_cache(obj_path, meshes, mtllib):
+    header = dict(_source_key(obj_path), mtllib=mtllib, parts=[])
+    arrays = {}
+    for i, (name, mesh) in enumerate(meshes.items()):
+        header["parts"].append({"name": name, "materials": list(mesh.faces_by_material.keys())})
+        arrays[f"p{i}_pos"] = mesh.positions
+        arrays[f"p{i}_uv"] = mesh.texcoords
+        arrays[f"p{i}_nrm"] = mesh.normals
+        for j, faces in enumerate(mesh.faces_by_material.values()):
+            arrays[f"p{i}_m{j}"] = faces
+    arrays["header"] = np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8)
+
+    # Escrever ao lado e trocar: um leitor nunca vê um ficheiro a meio
+    path = cache_path(obj_path)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+def _load_part(obj_path, index, key, name, materials):
+    """
+    Arrays da parte index (CompactMesh.reload, depois de release()).
+    key, name e materials são os da malha carregada: uma cache reescrita
+    entretanto (outro OBJ, outra versão) não serve, e a parte é refeita
+    a partir do OBJ se este ainda for o mesmo.
+    """
+    path = cache_path(obj_path)
+    try:
+        with np.load(path) as data:
+            header = json.loads(data["header"].tobytes().decode("utf-8"))
+            part = header["parts"][index]
+            if (all(header.get(k) == v for k, v in key.items())
+                    and part["name"] == name and part["materials"] == materials):
+                faces = {m: data[f"p{index}_m{j}"] for j, m in enumerate(materials)}
+                return data[f"p{index}_pos"], data[f"p{index}_uv"], data[f"p{index}_nrm"], faces
+    except (OSError, KeyError, IndexError, ValueError) as e:
+        print(f"[WARN] Could not reload {path} part {index}: {e}")
+
+    try:
+        unchanged = _source_key(obj_path) == key
+    except OSError:
+        unchanged = False
+    if not unchanged:
+        raise RuntimeError(f"{obj_path} changed since part '{name}' was uploaded")
+    parsed, _ = load_obj_multipart(obj_path, load_textures=False)
+    mesh = optimize(parsed[name])
+    return mesh.positions, mesh.texcoords, mesh.normals, mesh.faces_by_material
+
+
+def _attach_reload(obj_path, meshes):
+    """A cópia de CPU passa a poder ser libertada depois do upload."""
+    key = _source_key(obj_path)
+    for i, (name, mesh) in enumerate(meshes.items()):
+        mesh.reload = partial(_load_part, obj_path, i, key, name,
+                              list(mesh.faces_by_material.keys()))
+
+
+def load_cache(obj_path):
+    """(meshes, mtllib) da cache, ou None se não existir ou estiver desatualizada."""
+    path = cache_path(obj_path)
+    if not os.path.isfile(path):
+        return None
+    try:
+        with np.load(path) as data:
+            header = json.loads(data["header"].tobytes().decode("utf-8"))
+            key = _source_key(obj_path)
+            if any(header.get(k) != v for k, v in key.items()):
+                return None
+            meshes = {}
+            for i, part in enumerate(header["parts"]):
+                faces = {m: data[f"p{i}_m{j}"] for j, m in enumerate(part["materials"])}
+                mesh = CompactMesh(data[f"p{i}_pos"], data[f"p{i}_uv"], data[f"p{i}_nrm"], faces)
+                mesh.indexed = True
+                meshes[part["name"]] = mesh
+    except (OSError, KeyError, ValueError) as e:
+        print(f"[WARN] Ignoring mesh cache {path}: {e}")
+        return None
+    _attach_reload(obj_path, meshes)
+    return meshes, header["mtllib"]
+
+
+def load_obj_optimized(path, load_textures=True):
+    """load_obj_multipart com malhas otimizadas (CompactMesh indexadas), via cache."""
+    with startup.span(f"load_obj_optimized {os.path.basename(path)}"):
+        cached = load_cache(path)
+        if cached is not None:
+            meshes, mtllib = cached
+            materials = {}
+            if mtllib:
+                materials = load_mtl(os.path.join(os.path.dirname(path), mtllib), load_textures)
+            startup.log(f"[MESHOPT] {os.path.basename(path)}: cache hit")
+            return meshes, materials
+
+        t0 = time.perf_counter()
+        parsed, materials = load_obj_multipart(path, load_textures)
+        meshes = {name: optimize(mesh) for name, mesh in parsed.items()}
+        try:
+            save_cache(path, meshes, _mtllib(path))
+            _attach_reload(path, meshes)
+        except OSError as e:
+            print(f"[WARN] Could not write mesh cache for {path}: {e}")
+        startup.log(f"[MESHOPT] {os.path.basename(path)}: optimized "
+                    f"{sum(m.triangle_count for m in meshes.values())} triangles in "
+                    f"{(time.perf_counter() - t0) * 1000:.0f} ms")
+        return meshes, materials
+
+
+# ---------------------------------------------------------
+# RELATÓRIO (offline)
+# ---------------------------------------------------------
+
+def report(path):
+    """Otimiza um OBJ (e grava a cache); imprime ACMR/ATVR antes/depois por parte."""
+    parsed, _ = load_obj_multipart(path, load_textures=False)
+    before, after = {}, {}
+    totals = np.zeros(4)
+    t0 = time.perf_counter()
+    for name, mesh in parsed.items():
+        before[name] = weld(mesh)
+        after[name] = optimize(mesh)
+    opt_ms = (time.perf_counter() - t0) * 1000.0
+    save_cache(path, after, _mtllib(path))
+
+    print(f"[MESHOPT] {path} ({opt_ms:.0f} ms)")
+    for name in parsed:
+        tris, verts, acmr0, atvr0 = mesh_stats(before[name])
+        _, _, acmr1, atvr1 = mesh_stats(after[name])
+        totals += (tris, tris * acmr0, tris * acmr1, verts)
+        if tris < REPORT_MIN_TRIANGLES:
+            continue
+        print(f"  {name[:28]:<28} {tris:7d} tris {verts:7d} verts  "
+              f"ACMR {acmr0:.3f} -> {acmr1:.3f}  ATVR {atvr0:.3f} -> {atvr1:.3f}")
+    if totals[0]:
+        print(f"  {'TOTAL':<28} {int(totals[0]):7d} tris {int(totals[3]):7d} verts  "
+              f"ACMR {totals[1] / totals[0]:.3f} -> {totals[2] / totals[0]:.3f}")
+    return before, after
+
+
+def gpu_time(meshes, repeats=50):
+    """ms de GPU para desenhar cada malha repeats vezes (GL_TIME_ELAPSED)."""
+    from OpenGL.GL import (glGenQueries, glBeginQuery, glEndQuery, glGetQueryObjectui64v,
+                           glClear, glFinish, GL_TIME_ELAPSED, GL_QUERY_RESULT,
+                           GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT)
+    query = glGenQueries(1)[0]
+    out = []
+    for mesh in meshes:
+        mesh.upload({})
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        mesh.draw({})       # aquecer
+        glFinish()
+        glBeginQuery(GL_TIME_ELAPSED, query)
+        for _ in range(repeats):
+            mesh.draw({})
+        glEndQuery(GL_TIME_ELAPSED)
+        out.append(glGetQueryObjectui64v(query, GL_QUERY_RESULT) / 1e6)
+        mesh.free_gl()
+    return out
+
+
+def _gpu_report(results, heaviest=3):
+    from OpenGL.GL import glEnable, glMatrixMode, glLoadIdentity, GL_DEPTH_TEST, GL_PROJECTION
+    from OpenGL.GLU import gluPerspective, gluLookAt
+    from OpenGL.GLUT import glutInit, glutInitDisplayMode, glutCreateWindow, GLUT_RGB, GLUT_DEPTH
+
+    glutInit(sys.argv)
+    glutInitDisplayMode(GLUT_RGB | GLUT_DEPTH)
+    glutCreateWindow(b"mesh_opt")
+    glEnable(GL_DEPTH_TEST)
+
+    parts = [(before[n], after[n], n) for before, after in results for n in before]
+    parts.sort(key=lambda p: -p[1].triangle_count)
+    for before, after, name in parts[:heaviest]:
+        lo, hi = after.bounds()
+        center, radius = (lo + hi) / 2.0, float(np.linalg.norm(hi - lo)) / 2.0 or 1.0
+        glMatrixMode(GL_PROJECTION)
+        glLoadIdentity()
+        gluPerspective(45.0, 1.0, radius * 0.1, radius * 10.0)
+        gluLookAt(center[0], center[1], center[2] + radius * 2.5, *center, 0.0, 1.0, 0.0)
+        ms_before, ms_after = gpu_time([before, after])
+        print(f"[MESHOPT] GPU {name[:28]:<28} {after.triangle_count:7d} tris: "
+              f"{ms_before:.2f} ms -> {ms_after:.2f} ms (50 draws)")
+
+
+if __name__ == "__main__":
+    here = os.path.dirname(os.path.abspath(__file__))
+    paths = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not paths:
+        paths = sorted(glob.glob(os.path.join(here, "..", "assets", "models", "**", "*.obj"),
+                                 recursive=True))
+    results = [report(p) for p in paths]
+    if "--gpu" in sys.argv:
+        _gpu_report(results)
@@ -3,16 +3,30 @@
 #  OBJ LOADER (multipart + materials + textures)
 # ------------------------------------------------------------
 import os
+import weakref
+from array import array
 from typing import Optional
+import numpy as np
 from OpenGL.GL import *
 from PIL import Image
 
+import startup
+import telemetry
+
+
+# Memória de GPU ocupada por cada textura carregada: tex_id -> bytes
+texture_bytes = {}
+# Ficheiro de origem de cada textura (hot-reload): tex_id -> caminho
+texture_paths = {}
+
 
 # ---------------------------------------------------------
 # CLASSES
 # ---------------------------------------------------------
 
 class Material:
+    __slots__ = ("name", "texture_path", "texture_id")
+
     def __init__(self, name: str):
         self.name: str = name
         self.texture_path: Optional[str] = None
@@ -20,6 +34,10 @@ class Material:
 
 
 class ObjMesh:
+    # __weakref__: picking/oit guardam caches em WeakKeyDictionary por malha
+    __slots__ = ("vertices", "texcoords", "normals", "faces_by_material",
+                 "_display_list", "_bounds", "__weakref__")
+
     def __init__(self):
         self.vertices = []      # list[(x,y,z)]
         self.texcoords = []     # list[(u,v)]
@@ -31,12 +49,33 @@ class ObjMesh:
 
         # Display List cache
         self._display_list = None
+        self._bounds = None
 
     def add_face(self, face, material_name):
         if material_name not in self.faces_by_material:
             self.faces_by_material[material_name] = []
         self.faces_by_material[material_name].append(face)
 
+    def bounds(self):
+        """AABB local (min, max) dos vértices usados pela malha."""
+        if self._bounds is None:
+            tris = self.triangle_positions().reshape(-1, 3)
+            if len(tris) == 0:
+                self._bounds = (np.zeros(3), np.zeros(3))
+            else:
+                self._bounds = (tris.min(axis=0), tris.max(axis=0))
+        return self._bounds
+
+    def triangle_positions(self):
+        """Array (T, 3, 3) com os vértices de cada triângulo, pela ordem dos materiais."""
+        idx = [v[0] for faces in self.faces_by_material.values()
+                    for face in faces
+                    for v in face]
+        if not idx:
+            return np.zeros((0, 3, 3))
+        verts = np.asarray(self.vertices, dtype=np.float64)
+        return verts[np.asarray(idx, dtype=np.int64)].reshape(-1, 3, 3)
+
     def _build_display_list(self, materials):
         if self._display_list is not None:
             return 
@@ -73,8 +112,19 @@ class ObjMesh:
         glDisable(GL_TEXTURE_2D)
         glEndList()
 
+    def upload(self, materials):
+        """Compila já a display list (em vez de no primeiro draw)."""
+        self._build_display_list(materials)
+
+    def free_gl(self):
+        """Apaga a display list (a mesh pode voltar a ser desenhada depois)."""
+        if self._display_list is not None:
+            glDeleteLists(self._display_list, 1)
+            self._display_list = None
+
     def draw(self, materials=None):
         """Desenha a mesh usando Display Lists (ou fallback imediato)."""
+        telemetry.count(1, sum(len(f) for f in self.faces_by_material.values()))
         if materials is not None:
             if self._display_list is None:
                 self._build_display_list(materials)
@@ -91,19 +141,167 @@ class ObjMesh:
             glEnd()
 
 
+class CompactMesh:
+    """
+    Malha em arrays numpy compactos (float32 / int32), produzida pelo
+    loader em streaming. Mesma interface de desenho que ObjMesh; depois
+    de upload() os dados de CPU podem ser libertados com release().
+    Com indexed=True (mesh_opt.weld) as três colunas das faces apontam
+    para o mesmo vértice e a malha é desenhada com glDrawElements.
+
+    Com reload (mesh_opt: lê a parte da .meshcache.npz) a cópia de CPU
+    é libertada logo a seguir ao upload; quem ainda precisa dela
+    (picking, lightmaps, VBOs) pede-a com cpu_data(), que a relê sem
+    a voltar a prender à malha.
+    """
+    __slots__ = ("positions", "texcoords", "normals", "faces_by_material",
+                 "triangle_count", "indexed", "reload", "_bounds", "_display_list",
+                 "__weakref__")
+
+    def __init__(self, positions, texcoords, normals, faces_by_material):
+        self.positions = positions            # float32 (V, 3)
+        self.texcoords = texcoords            # float32 (Vt, 2)
+        self.normals = normals                # float32 (Vn, 3)
+
+        # material_name -> int32 (T, 3, 3) com (vi, ti, ni); -1 = ausente
+        self.faces_by_material = faces_by_material
+        self.triangle_count = sum(len(f) for f in faces_by_material.values())
+        self.indexed = False
+        self.reload = None      # () -> (positions, texcoords, normals, faces_by_material)
+
+        # Guardada à parte: continua disponível depois de release()
+        if len(positions):
+            self._bounds = (positions.min(axis=0).astype(np.float64),
+                            positions.max(axis=0).astype(np.float64))
+        else:
+            self._bounds = (np.zeros(3), np.zeros(3))
+
+        self._display_list = None
+
+    def bounds(self):
+        return self._bounds
+
+    @property
+    def nbytes(self):
+        if self.positions is None:
+            return 0
+        return (self.positions.nbytes + self.texcoords.nbytes + self.normals.nbytes
+                + sum(f.nbytes for f in self.faces_by_material.values()))
+
+    def cpu_data(self):
+        """(positions, texcoords, normals, faces_by_material), relidos se já libertados."""
+        if self.positions is None and self.reload is not None:
+            return self.reload()
+        return self.positions, self.texcoords, self.normals, self.faces_by_material
+
+    def triangle_positions(self):
+        positions, _, _, faces_by_material = self.cpu_data()
+        if positions is None:
+            return np.zeros((0, 3, 3))
+        faces = [f[:, :, 0] for f in faces_by_material.values()]
+        if not faces:
+            return np.zeros((0, 3, 3))
+        return positions[np.concatenate(faces)].astype(np.float64)
+
+    def upload(self, materials):
+        """Compila a display list (vertex arrays por material; indexados se indexed)."""
+        if self._display_list is not None:
+            return
+        positions, texcoords, normals, faces_by_material = self.cpu_data()
+
+        self._display_list = glGenLists(1)
+
+        # O estado dos client arrays não é compilado: ativar fora da lista
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glNewList(self._display_list, GL_COMPILE)
+
+        for mtl_name, faces in faces_by_material.items():
+            mat = materials.get(mtl_name) if materials else None
+            if mat and mat.texture_id:
+                glEnable(GL_TEXTURE_2D)
+                glBindTexture(GL_TEXTURE_2D, mat.texture_id)
+            else:
+                glDisable(GL_TEXTURE_2D)
+                glBindTexture(GL_TEXTURE_2D, 0)
+
+            idx = faces.reshape(-1, 3)
+            has_n = len(normals) > 0 and bool((idx[:, 2] >= 0).all())
+            has_t = len(texcoords) > 0 and bool((idx[:, 1] >= 0).all())
+
+            if self.indexed:
+                # Mesmos arrays para todos os materiais; a ordem é a dos índices
+                if has_n:
+                    glEnableClientState(GL_NORMAL_ARRAY)
+                    glNormalPointer(GL_FLOAT, 0, normals)
+                if has_t:
+                    glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+                    glTexCoordPointer(2, GL_FLOAT, 0, texcoords)
+                glVertexPointer(3, GL_FLOAT, 0, positions)
+                glDrawElements(GL_TRIANGLES, len(idx), GL_UNSIGNED_INT,
+                               np.ascontiguousarray(idx[:, 0], dtype=np.uint32))
+            else:
+                if has_n:
+                    glEnableClientState(GL_NORMAL_ARRAY)
+                    glNormalPointer(GL_FLOAT, 0, np.ascontiguousarray(normals[idx[:, 2]]))
+                if has_t:
+                    glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+                    glTexCoordPointer(2, GL_FLOAT, 0, np.ascontiguousarray(texcoords[idx[:, 1]]))
+
+                glVertexPointer(3, GL_FLOAT, 0, np.ascontiguousarray(positions[idx[:, 0]]))
+                glDrawArrays(GL_TRIANGLES, 0, len(idx))
+
+            if has_n: glDisableClientState(GL_NORMAL_ARRAY)
+            if has_t: glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glDisable(GL_TEXTURE_2D)
+        glEndList()
+        glDisableClientState(GL_VERTEX_ARRAY)
+        if self.reload is not None:
+            self.release()
+
+    def free_gl(self):
+        if self._display_list is not None:
+            glDeleteLists(self._display_list, 1)
+            self._display_list = None
+
+    def release(self):
+        """Liberta a cópia de CPU (a display list continua válida)."""
+        self.positions = self.texcoords = self.normals = None
+        self.faces_by_material = {}
+
+    def draw(self, materials=None):
+        if self._display_list is None:
+            self.upload(materials)
+        glCallList(self._display_list)
+        telemetry.count(1, self.triangle_count)
+
+
 # ---------------------------------------------------------
 # LOADERS AUXILIARES
 # ---------------------------------------------------------
 
-def load_texture(path):
-    """Carrega imagem para textura OpenGL."""
+def decode_texture(path):
+    """Lê a imagem para (largura, altura, bytes RGBA) sem tocar no GL."""
     if not os.path.isfile(path):
         print(f"[WARN] Texture file not found: {path}")
         return None
 
     img = Image.open(path).convert("RGBA")
-    img_data = img.tobytes("raw", "RGBA", 0, -1)
-    width, height = img.size
+    return img.size[0], img.size[1], img.tobytes("raw", "RGBA", 0, -1)
+
+
+def load_texture(path, decoded=None):
+    """Carrega imagem para textura OpenGL (decoded: resultado de decode_texture)."""
+    with startup.span(f"texture {os.path.basename(path)}"):
+        return _load_texture(path, decoded)
+
+
+def _load_texture(path, decoded):
+    decoded = decoded or decode_texture(path)
+    if decoded is None:
+        return None
+    width, height, img_data = decoded
 
     tex_id = glGenTextures(1)
     glBindTexture(GL_TEXTURE_2D, tex_id)
@@ -115,12 +313,24 @@ def load_texture(path):
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
     glBindTexture(GL_TEXTURE_2D, 0)
+    texture_bytes[tex_id] = width * height * 4
+    texture_paths[tex_id] = path
     
-    print(f"[TEX] Loaded texture {path} -> id {tex_id}")
+    startup.log(f"[TEX] Loaded texture {path} -> id {tex_id}")
     return tex_id
 
 
-def load_mtl(mtl_path):
+def free_materials(materials):
+    """Apaga da GPU as texturas de um conjunto de materiais."""
+    for m in materials.values():
+        if m.texture_id:
+            glDeleteTextures([m.texture_id])
+            texture_bytes.pop(m.texture_id, None)
+            texture_paths.pop(m.texture_id, None)
+            m.texture_id = None
+
+
+def load_mtl(mtl_path, load_textures=True):
     """Lê ficheiro .mtl e carrega texturas associadas."""
     materials = {}
     current = None
@@ -154,18 +364,36 @@ def load_mtl(mtl_path):
 
     # Carregar texturas para GPU
     for m in materials.values():
-        if m.texture_path:
+        if m.texture_path and load_textures:
             m.texture_id = load_texture(m.texture_path)
 
     return materials
 
 
+def mtllib_paths(obj_path):
+    """Caminhos dos .mtl que o OBJ refere (linhas mtllib), como os loaders os resolvem."""
+    base_dir = os.path.dirname(obj_path)
+    paths = []
+    with open(obj_path, "rb") as f:
+        for line in f:
+            if line.startswith(b"mtllib"):
+                words = line.split(None, 1)
+                if len(words) > 1:
+                    paths.append(os.path.join(base_dir, words[1].strip().decode("utf-8", "replace")))
+    return paths
+
+
 # ---------------------------------------------------------
 # MAIN OBJ LOADER FUNCTION
 # ---------------------------------------------------------
 
-def load_obj_multipart(path):
+def load_obj_multipart(path, load_textures=True):
     """Lê OBJ Multipart + MTL e retorna (meshes, materials)."""
+    with startup.span(f"load_obj_multipart {os.path.basename(path)}"):
+        return _load_obj_multipart(path, load_textures)
+
+
+def _load_obj_multipart(path, load_textures):
     meshes = {}
     current_name = None
     current_mesh = None
@@ -197,8 +425,8 @@ def load_obj_multipart(path):
             if tag == "mtllib":
                 mtl_file = parts[1]
                 mtl_path = os.path.join(base_dir, mtl_file)
-                print(f"[MTL] Loading material library: {mtl_path}")
-                materials = load_mtl(mtl_path)
+                startup.log(f"[MTL] Loading material library: {mtl_path}")
+                materials = load_mtl(mtl_path, load_textures)
 
             elif tag in ("o", "g"):
                 name = parts[1] if len(parts) > 1 else "unnamed"
@@ -246,4 +474,366 @@ def load_obj_multipart(path):
         mesh.texcoords = texs
         mesh.normals = norms
 
-    return meshes, materials
\ No newline at end of file
+    return meshes, materials
+
+def compact_mesh(mesh):
+    """ObjMesh -> CompactMesh só com os vértices que a parte usa."""
+    faces = {}
+    for mtl, flist in mesh.faces_by_material.items():
+        flat = [-1 if c is None else c for face in flist for corner in face for c in corner]
+        faces[mtl] = np.asarray(flat, dtype=np.int64).reshape(-1, 3, 3)
+
+    pools = ((mesh.vertices, 3), (mesh.texcoords, 2), (mesh.normals, 3))
+    compact = []
+    for k, (pool, width) in enumerate(pools):
+        used = np.concatenate([f[:, :, k].ravel() for f in faces.values()] or [np.zeros(0, np.int64)])
+        used = np.unique(used[used >= 0])
+        remap = np.full(len(pool) + 1, -1, dtype=np.int64)
+        remap[used] = np.arange(len(used))
+        for f in faces.values():
+            f[:, :, k] = remap[f[:, :, k]]      # -1 -> remap[-1] = -1
+        arr = np.asarray([pool[i] for i in used], dtype=np.float32).reshape(-1, width)
+        compact.append(arr)
+
+    return CompactMesh(compact[0], compact[1], compact[2],
+                       {m: f.astype(np.int32) for m, f in faces.items()})
+
+
+# ---------------------------------------------------------
+# LOADER EM STREAMING (ficheiros muito grandes)
+# ---------------------------------------------------------
+
+STREAM_CHUNK_SIZE = 4 << 20       # bytes lidos de cada vez
+STREAM_MAX_MEMORY = 512 << 20     # orçamento: tudo o que o stream tem vivo (ver ObjStream._note)
+
+_LINE_OVERHEAD = 41               # bytes por linha do bloco: objeto bytes (33) + ponteiro na lista
+_UNIQUE_BYTES = 33                # por índice em np.unique(return_inverse): cópia, argsort, inv, máscara
+
+
+def _resolve_index(tok, count, base, kind):
+    """Índice OBJ (1-based ou negativo) -> índice global 0-based."""
+    i = int(tok)
+    i = i - 1 if i > 0 else count + i
+    if i < base:
+        raise ValueError(f"OBJ stream: {kind} {i + 1} was already released "
+                         f"(use release_consumed=False for this file)")
+    return i
+
+
+_WIDTHS = {b"v": 3, b"vt": 2, b"vn": 3}
+_KINDS = {b"v": "vertex", b"vt": "texcoord", b"vn": "normal"}
+
+
+class ObjStream:
+    """
+    Lê um OBJ por blocos e emite cada parte (grupo o/g) logo que termina:
+
+        stream = ObjStream(path)
+        for name, mesh in stream:          # mesh: CompactMesh
+            mesh.upload(stream.materials)
+            mesh.release()
+
+    Sequências de linhas v/vt/vn/f com o mesmo formato são convertidas de
+    uma vez com numpy; linhas irregulares seguem o caminho linha a linha.
+
+    Com release_consumed=True os vértices até ao maior índice usado por uma
+    parte já emitida são descartados, o que mantém a memória limitada em
+    ficheiros exportados objeto a objeto (scans, Blender, XSI). Uma face que
+    use um vértice descartado lança ValueError.
+
+    A memória contada (peak_bytes) é a que o stream tem viva: pools, parte
+    em curso, o bloco e as suas linhas, os temporários numpy de cada
+    sequência e de _finish_part, e as partes emitidas que o consumidor
+    ainda não libertou (release()). Acima de max_memory: MemoryError.
+    """
+
+    def __init__(self, source, chunk_size=STREAM_CHUNK_SIZE, max_memory=STREAM_MAX_MEMORY,
+                 release_consumed=True, load_textures=True):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.max_memory = max_memory
+        self.release_consumed = release_consumed
+        self.load_textures = load_textures
+
+        self.materials = {}
+        self.peak_bytes = 0
+        self._emitted = weakref.WeakSet()     # partes emitidas ainda vivas
+        self._block_bytes = 0                 # bloco + linhas em processamento
+        self._part_name = None
+        self.parts_emitted = 0
+        self.triangles_emitted = 0
+
+    def __iter__(self):
+        if isinstance(self.source, (str, os.PathLike)):
+            with open(self.source, "rb") as f:
+                yield from self._parse(f, os.path.dirname(self.source))
+        else:
+            yield from self._parse(self.source, ".")
+
+    # ---------------------------------------------------------
+    # LEITURA
+    # ---------------------------------------------------------
+
+    def _parse(self, f, base_dir):
+        # Pools globais (float32) e índice global do primeiro elemento guardado
+        self._pools = {b"v": array("f"), b"vt": array("f"), b"vn": array("f")}
+        self._bases = {b"v": 0, b"vt": 0, b"vn": 0}
+        self._counts = {b"v": 0, b"vt": 0, b"vn": 0}
+
+        # Parte em curso: material -> array('i') com (vi, ti, ni) globais
+        self._faces = {}
+        self._material = None
+        name = None
+
+        rest = b""
+        while True:
+            chunk = f.read(self.chunk_size)
+            if chunk:
+                text = (rest + chunk).replace(b"\r", b"")
+                lines = text.split(b"\n")
+                # Bloco vivo: bytes lidos + linhas separadas (o texto inteiro só até aqui)
+                self._block_bytes = len(chunk) + len(text) + _LINE_OVERHEAD * len(lines)
+                self._note(len(text))
+                del text
+                rest = lines.pop()
+            else:
+                lines = [rest]
+                self._block_bytes = len(rest) + _LINE_OVERHEAD
+
+            run_tag = None
+            run = []
+            for line in lines:
+                sp = line.find(b" ")
+                tag = line[:sp] if sp > 0 else line.strip()
+
+                if tag in _WIDTHS or tag == b"f":
+                    if tag != run_tag:
+                        self._flush(run_tag, run)
+                        run_tag, run = tag, []
+                    run.append(line[sp + 1:])
+                    continue
+
+                self._flush(run_tag, run)
+                run_tag, run = None, []
+
+                if tag in (b"o", b"g"):
+                    part = self._finish_part()
+                    if part is not None:
+                        yield name, part
+                    words = line.split()
+                    name = words[1].decode("utf-8", "replace") if len(words) > 1 else "unnamed"
+                    self._part_name = name
+
+                elif tag == b"usemtl":
+                    words = line.split()
+                    self._material = words[1].decode("utf-8", "replace") if len(words) > 1 else None
+
+                elif tag == b"mtllib":
+                    mtl_file = line.split(None, 1)[1].strip().decode("utf-8", "replace")
+                    self.materials.update(load_mtl(os.path.join(base_dir, mtl_file),
+                                                   self.load_textures))
+
+            self._flush(run_tag, run)
+            del lines, run
+            self._block_bytes = len(rest)
+            self._note()
+
+            if not chunk:
+                break
+
+        part = self._finish_part()
+        if part is not None:
+            yield name or "default", part
+
+    def _note(self, transient=0):
+        """Memória viva agora + transient (temporários do passo em curso) -> peak_bytes."""
+        used = (4 * (sum(len(p) for p in self._pools.values())
+                     + sum(len(a) for a in self._faces.values()))
+                + sum(mesh.nbytes for mesh in self._emitted)
+                + self._block_bytes + transient)
+        self.peak_bytes = max(self.peak_bytes, used)
+        if used > self.max_memory:
+            raise MemoryError(f"OBJ stream needs {used >> 20} MB, budget is "
+                              f"{self.max_memory >> 20} MB (part '{self._part_name}')")
+
+    def _flush(self, tag, run):
+        if not run:
+            return
+        if tag == b"f":
+            # Sub-sequências com o mesmo nº de vértices e de "/" por linha: o total
+            # de inteiros não chega (quad + tri + pentágono = 3 quads)
+            shapes = [(len(line.split()), line.count(b"/")) for line in run]
+            start = 0
+            for i in range(1, len(run) + 1):
+                if i < len(run) and shapes[i] == shapes[start]:
+                    continue
+                sub = run[start:i]
+                if not self._faces_run(sub):
+                    for line in sub:
+                        self._face_line(line.split())
+                start = i
+        else:
+            self._vectors_run(tag, run)
+
+    def _vectors_run(self, tag, run):
+        width = _WIDTHS[tag]
+        joined = b" ".join(run)
+        values = np.fromstring(joined, dtype=np.float32, sep=" ")
+        # texto + valores + a cópia de tobytes + o crescimento do array('f')
+        self._note(len(joined) + 3 * values.nbytes)
+        del joined
+        if len(values) == width * len(run):
+            self._pools[tag].frombytes(values.tobytes())
+        else:
+            # Componentes extra/opcionais (v com cor, vt com w, ...)
+            for line in run:
+                comps = [float(x) for x in line.split()[:width]]
+                comps += [0.0] * (width - len(comps))
+                self._pools[tag].extend(comps)
+        self._counts[tag] += len(run)
+
+    def _faces_run(self, run):
+        """Conversão vetorizada de faces com o mesmo formato; False se não der."""
+        first = run[0].split()
+        k = len(first)
+        c = first[0].count(b"/") + 1
+        if k < 3 or c > 3:
+            return False
+
+        # Índice vazio ("1//3") -> 0, que no OBJ nunca é válido
+        text = b" ".join(run).replace(b"//", b"/0/").replace(b"/", b" ")
+        ints = np.fromstring(text, dtype=np.int64, sep=" ")
+        if len(ints) != len(run) * k * c:
+            return False
+        # Pico: texto, ints, raw, idx, dois temporários por coluna, o leque
+        # (int64 + int32) e a cópia de tobytes para o array('i')
+        cells = len(run) * k * 3
+        tri_cells = len(run) * (k - 2) * 9
+        self._note(2 * len(text) + ints.nbytes + 4 * 8 * cells + 2 * 8 * tri_cells
+                   + 3 * 4 * tri_cells)
+        del text
+
+        raw = np.zeros((len(run), k, 3), dtype=np.int64)
+        raw[:, :, :c] = ints.reshape(len(run), k, c)
+
+        idx = np.full_like(raw, -1)
+        for col, tag in enumerate((b"v", b"vt", b"vn")):
+            r = raw[:, :, col]
+            count = self._counts[tag]
+            resolved = np.where(r > 0, r - 1, count + r)
+            resolved[r == 0] = -1
+            present = resolved[resolved >= 0]
+            if len(present) and present.min() < self._bases[tag]:
+                raise ValueError(f"OBJ stream: {_KINDS[tag]} {int(present.min()) + 1} was already "
+                                 f"released (use release_consumed=False for this file)")
+            idx[:, :, col] = resolved
+        if (idx[:, :, 0] < 0).any():
+            return False
+
+        # Triangulação em leque (igual a load_obj_multipart)
+        fan = [np.stack((idx[:, 0], idx[:, i], idx[:, i + 1]), axis=1) for i in range(1, k - 1)]
+        tris = np.stack(fan, axis=1).reshape(-1, 3, 3).astype(np.int32)
+        self._part_array().frombytes(tris.tobytes())
+        return True
+
+    def _face_line(self, words):
+        face = []
+        for tok in words:
+            vals = tok.split(b"/")
+            vi = _resolve_index(vals[0], self._counts[b"v"], self._bases[b"v"], "vertex")
+            ti = (_resolve_index(vals[1], self._counts[b"vt"], self._bases[b"vt"], "texcoord")
+                  if len(vals) > 1 and vals[1] else -1)
+            ni = (_resolve_index(vals[2], self._counts[b"vn"], self._bases[b"vn"], "normal")
+                  if len(vals) > 2 and vals[2] else -1)
+            face.append((vi, ti, ni))
+
+        tris = self._part_array()
+        for i in range(1, len(face) - 1):
+            tris.extend(face[0]); tris.extend(face[i]); tris.extend(face[i + 1])
+
+    def _part_array(self):
+        tris = self._faces.get(self._material)
+        if tris is None:
+            tris = self._faces[self._material] = array("i")
+        return tris
+
+    # ---------------------------------------------------------
+    # EMISSÃO DE PARTES
+    # ---------------------------------------------------------
+
+    def _finish_part(self):
+        """Converte a parte para índices locais e copia só os dados usados."""
+        faces = {m: a for m, a in self._faces.items() if len(a)}
+        self._faces = {}
+        if not faces:
+            return None
+
+        names = list(faces.keys())
+        sizes = [len(faces[m]) // 9 for m in names]
+        # A cópia concatenada convive com os array('i') até ao fim da linha
+        self._note(8 * sum(len(a) for a in faces.values()))
+        local = np.concatenate([np.frombuffer(faces[m], dtype=np.int32) for m in names])
+        local = local.reshape(-1, 3, 3)     # concatenate já copiou
+        del faces
+
+        data = []
+        for col, tag in enumerate((b"v", b"vt", b"vn")):
+            width = _WIDTHS[tag]
+            idx = local[:, :, col]
+            used = idx >= 0
+            present = int(used.sum())
+            self._note(local.nbytes + sum(d.nbytes for d in data) + used.nbytes
+                       + _UNIQUE_BYTES * present + 4 * width * present)
+            uniq, inv = np.unique(idx[used], return_inverse=True)
+            idx[used] = inv
+            data.append(self._gather(tag, uniq - self._bases[tag], width))
+
+            # Descartar o que já foi consumido por esta parte
+            if self.release_consumed and len(uniq):
+                drop = int(uniq[-1]) + 1 - self._bases[tag]
+                del self._pools[tag][:drop * width]
+                self._bases[tag] += drop
+
+        split = np.cumsum(sizes)[:-1]
+        by_mtl = dict(zip(names, np.split(local, split)))
+
+        self.parts_emitted += 1
+        self.triangles_emitted += len(local)
+        mesh = CompactMesh(data[0], data[1], data[2], by_mtl)
+        self._emitted.add(mesh)
+        return mesh
+
+    def _gather(self, tag, rows, width):
+        # A vista sobre o array('f') tem de desaparecer antes do próximo extend
+        pool = np.frombuffer(self._pools[tag], dtype=np.float32).reshape(-1, width)
+        out = pool[rows].copy()
+        del pool
+        return out
+
+
+def unique_name(meshes, name):
+    """Nome livre em meshes: name, name.1, name.2, ..."""
+    key = name
+    n = 1
+    while key in meshes:
+        key = f"{name}.{n}"
+        n += 1
+    return key
+
+
+def load_obj_streaming(path, **kwargs):
+    """
+    Variante de load_obj_multipart para ficheiros enormes: cada parte é
+    enviada para a GPU e a cópia de CPU libertada assim que é lida.
+    Retorna (meshes, materials) com a mesma forma.
+    """
+    meshes = {}
+    stream = ObjStream(path, **kwargs)
+    for name, mesh in stream:
+        mesh.upload(stream.materials)
+        mesh.release()
+        meshes[unique_name(meshes, name)] = mesh
+
+    startup.log(f"[OBJ] Streamed {path}: {stream.parts_emitted} parts, "
+          f"{stream.triangles_emitted} tris, peak {stream.peak_bytes >> 20} MB")
+    return meshes, stream.materials
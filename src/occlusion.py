@@ -0,0 +1,196 @@
+# occlusion.py
+# ------------------------------------------------------------
+#  OCCLUSION CULLING POR HARDWARE (queries com um frame de atraso)
+# ------------------------------------------------------------
+#  1. Os oclusores (casa, garagem) são desenhados primeiro.
+#  2. Para cada outro objeto desenha-se só a sua caixa (sem cor nem
+#     escrita de profundidade) dentro de uma query.
+#  3. O resultado só é lido no frame seguinte, se já estiver
+#     disponível: o pipeline nunca espera pela GPU.
+#  Um objeto só é escondido ao fim de HIDDEN_FRAMES_TO_CULL resultados
+#  "oculto" seguidos; sem resultado, ou com a câmara dentro da caixa,
+#  é sempre desenhado (fallback conservador).
+# ------------------------------------------------------------
+from OpenGL.GL import *
+
+import transforms
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+enabled = True
+
+HIDDEN_FRAMES_TO_CULL = 2     # histerese (coerência temporal)
+BOX_PADDING = 0.05            # caixas 5% maiores, por segurança
+EYE_MARGIN = 1.0              # câmara "dentro" da caixa com esta folga
+STALE_FRAMES = 120            # queries de objetos desaparecidos são libertadas
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+_supported = None             # None = ainda não verificado
+_query_target = None
+
+_states = {}                  # uid do objeto -> _QueryState
+_frame = 0
+_eye = (0.0, 0.0, 0.0)
+
+# Estatísticas do último frame (HUD)
+stats = {"drawn": 0, "culled": 0, "pending": 0}
+
+
+class _QueryState:
+    def __init__(self, query_id):
+        self.query_id = query_id
+        self.pending = False      # há uma query em voo
+        self.hidden_streak = 0    # resultados "oculto" consecutivos
+        self.last_frame = 0
+
+
+def _check_support():
+    """GL_ANY_SAMPLES_PASSED (GL 3.3 / ARB_occlusion_query2), senão GL_SAMPLES_PASSED."""
+    global _supported, _query_target
+    try:
+        version = glGetString(GL_VERSION) or b"0.0"
+        major, minor = (int(x) for x in version.split()[0].split(b".")[:2])
+        extensions = glGetString(GL_EXTENSIONS) or b""
+        if (major, minor) >= (3, 3) or b"GL_ARB_occlusion_query2" in extensions:
+            _query_target = GL_ANY_SAMPLES_PASSED
+        else:
+            _query_target = GL_SAMPLES_PASSED
+        _supported = bool(glGenQueries)
+    except Exception as e:
+        print(f"[WARN] Occlusion queries unavailable: {e}")
+        _supported = False
+    print(f"[OCC] Occlusion culling: {'ON' if _supported else 'OFF (fallback)'}")
+
+
+def set_eye(eye):
+    global _eye
+    _eye = tuple(eye)
+
+
+def toggle():
+    global enabled
+    enabled = not enabled
+    print(f"[OCC] Occlusion culling: {'ON' if enabled else 'OFF'}")
+
+
+# ---------------------------------------------------------
+# CAIXAS
+# ---------------------------------------------------------
+
+def padded_bounds(bounds):
+    lo, hi = bounds
+    pad = (hi - lo) * BOX_PADDING
+    return lo - pad, hi + pad
+
+
+def world_bounds(matrix, bounds):
+    """AABB em espaço mundo de uma caixa local transformada."""
+    (x0, y0, z0), (x1, y1, z1) = bounds
+    corners = [(x, y, z) for x in (x0, x1) for y in (y0, y1) for z in (z0, z1)]
+    pts = transforms.transform_points(matrix, corners)
+    return pts.min(axis=0), pts.max(axis=0)
+
+
+def _eye_inside(wbounds):
+    lo, hi = wbounds
+    return all(lo[i] - EYE_MARGIN <= _eye[i] <= hi[i] + EYE_MARGIN for i in range(3))
+
+
+def _draw_box(bounds):
+    (x0, y0, z0), (x1, y1, z1) = bounds
+    glBegin(GL_QUADS)
+    glVertex3f(x0, y0, z0); glVertex3f(x1, y0, z0); glVertex3f(x1, y1, z0); glVertex3f(x0, y1, z0)
+    glVertex3f(x0, y0, z1); glVertex3f(x0, y1, z1); glVertex3f(x1, y1, z1); glVertex3f(x1, y0, z1)
+    glVertex3f(x0, y0, z0); glVertex3f(x0, y1, z0); glVertex3f(x0, y1, z1); glVertex3f(x0, y0, z1)
+    glVertex3f(x1, y0, z0); glVertex3f(x1, y0, z1); glVertex3f(x1, y1, z1); glVertex3f(x1, y1, z0)
+    glVertex3f(x0, y0, z0); glVertex3f(x0, y0, z1); glVertex3f(x1, y0, z1); glVertex3f(x1, y0, z0)
+    glVertex3f(x0, y1, z0); glVertex3f(x1, y1, z0); glVertex3f(x1, y1, z1); glVertex3f(x0, y1, z1)
+    glEnd()
+
+
+# ---------------------------------------------------------
+# QUERIES
+# ---------------------------------------------------------
+
+def _collect(state):
+    """Lê o resultado da query anterior, se já estiver pronto (sem bloquear)."""
+    if not state.pending:
+        return
+    if not glGetQueryObjectuiv(state.query_id, GL_QUERY_RESULT_AVAILABLE):
+        stats["pending"] += 1
+        return
+    samples = glGetQueryObjectuiv(state.query_id, GL_QUERY_RESULT)
+    state.pending = False
+    state.hidden_streak = 0 if samples else state.hidden_streak + 1
+
+
+def test_objects(objects):
+    """
+    objects: dicts com "uid", "matrix", "bounds" (locais) e "world_bounds".
+    Retorna uma lista de bools (desenhar ou não) e lança as queries
+    deste frame, cujos resultados serão usados no próximo.
+    """
+    global _frame
+    _frame += 1
+    stats["drawn"] = stats["culled"] = stats["pending"] = 0
+
+    if _supported is None:
+        _check_support()
+    if not (enabled and _supported) or not objects:
+        stats["drawn"] = len(objects)
+        return [True] * len(objects)
+
+    glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT | GL_CURRENT_BIT)
+    glDisable(GL_LIGHTING)
+    glDisable(GL_TEXTURE_2D)
+    glDisable(GL_FOG)
+    glDisable(GL_BLEND)
+    glDisable(GL_CULL_FACE)
+    glColorMask(GL_FALSE, GL_FALSE, GL_FALSE, GL_FALSE)
+    glDepthMask(GL_FALSE)
+
+    result = []
+    for obj in objects:
+        key = obj["uid"]
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = _QueryState(glGenQueries(1))
+        state.last_frame = _frame
+
+        _collect(state)
+
+        visible = (state.hidden_streak < HIDDEN_FRAMES_TO_CULL
+                   or _eye_inside(obj["world_bounds"]))
+        if visible:
+            state.hidden_streak = min(state.hidden_streak, HIDDEN_FRAMES_TO_CULL - 1)
+        result.append(visible)
+
+        # Nova query só quando a anterior já foi lida
+        if not state.pending:
+            glPushMatrix()
+            glMultMatrixf(transforms.to_gl(obj["matrix"]))
+            glBeginQuery(_query_target, state.query_id)
+            _draw_box(padded_bounds(obj["bounds"]))
+            glEndQuery(_query_target)
+            glPopMatrix()
+            state.pending = True
+
+    glPopAttrib()
+
+    drawn = sum(result)
+    stats["drawn"] = drawn
+    stats["culled"] = len(result) - drawn
+
+    _release_stale()
+    return result
+
+
+def _release_stale():
+    stale = [k for k, s in _states.items() if _frame - s.last_frame > STALE_FRAMES]
+    for key in stale:
+        glDeleteQueries([_states.pop(key).query_id])
@@ -0,0 +1,377 @@
+# oit.py
+# ------------------------------------------------------------
+#  TRANSPARÊNCIA INDEPENDENTE DA ORDEM (weighted blended OIT)
+# ------------------------------------------------------------
+#  Qualquer módulo pode submeter malhas transparentes durante o frame
+#  (submit); depois das partes opacas, resolve() desenha-as todas num
+#  FBO com dois alvos, sem ordenar:
+#    alvo 0 (RGBA16F): rgb += cor * alpha * peso ; a *= (1 - alpha)
+#    alvo 1 (R16F):    r   += alpha * peso
+#  (uma só glBlendFuncSeparate(ONE, ONE, ZERO, ONE_MINUS_SRC_ALPHA)
+#  serve os dois alvos, por isso não precisa de blending por alvo).
+#  O peso depende da profundidade (McGuire & Bavoil, 2013). A
+#  profundidade das partes opacas é copiada para o FBO (com o formato
+#  de profundidade do framebuffer de origem, que o blit exige), e um
+#  único passe de composição mistura o resultado por cima da cena.
+#  Os alvos têm o tamanho da janela (o do FBO da resolução dinâmica):
+#  mudar a escala só muda o viewport, não realoca nada.
+#  Se a cópia falhar, as malhas do frame são desenhadas com blending
+#  direto e o OIT desliga-se.
+#  O que não é uma malha (ex.: as partículas) entra no mesmo passe com
+#  submit_pass(fn): fn desenha com o seu próprio programa, que escreve
+#  a cor com oit_write() (OIT_OUTPUT_GLSL).
+# ------------------------------------------------------------
+import ctypes
+import weakref
+
+from OpenGL.GL import *
+
+import dynres
+import transforms
+from gpu_mesh import GpuMesh
+from shaders import compile_program, Uniforms, FF_LIGHTING_GLSL, LIT_VERTEX_SRC
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+enabled = True
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+_failed = False
+_accum_program = None
+_accum_uniforms = None
+_composite_program = None
+_composite_uniforms = None
+
+_fbo = None
+_accum_tex = None
+_weight_tex = None
+_depth_rb = None
+_size = (0, 0)
+_depth_format = None                         # (formato interno, attachment) do alvo atual
+_depth_formats = {}                          # framebuffer de leitura -> formato de profundidade
+
+_queue = []                                  # (mesh, materials, matriz mundo, cor)
+_passes = []                                 # fn(accumulate) de submit_pass
+_gpu_meshes = weakref.WeakKeyDictionary()    # mesh -> GpuMesh
+
+# Estatísticas do último frame
+stats = {"meshes": 0}
+
+
+# Saída do passe de acumulação (peso pela profundidade em espaço de olho)
+OIT_OUTPUT_GLSL = """
+float oit_weight(float alpha, float depth)
+{
+    return alpha * clamp(0.03 / (1e-5 + pow(depth / 200.0, 4.0)), 1e-2, 3e3);
+}
+
+void oit_write(vec4 color, vec3 eye_pos)
+{
+    float a = color.a;
+    float w = oit_weight(a, abs(eye_pos.z));
+    gl_FragData[0] = vec4(color.rgb * a * w, a);
+    gl_FragData[1] = vec4(a * w);
+}
+"""
+
+_ACCUM_FRAGMENT_SRC = """
+#version 120
+uniform sampler2D tex;
+uniform bool use_tex;
+
+varying vec3 v_normal;
+varying vec3 v_pos;
+varying vec2 v_uv;
+varying vec4 v_color;
+""" + FF_LIGHTING_GLSL + OIT_OUTPUT_GLSL + """
+void main()
+{
+    vec4 base = v_color;
+    if (use_tex)
+        base *= texture2D(tex, v_uv);
+    oit_write(ff_fog(ff_shade(normalize(v_normal), v_pos, base), v_pos), v_pos);
+}
+"""
+
+_COMPOSITE_VERTEX_SRC = """
+#version 120
+void main()
+{
+    gl_Position = gl_Vertex;
+}
+"""
+
+_COMPOSITE_FRAGMENT_SRC = """
+#version 120
+uniform sampler2D accum_tex;
+uniform sampler2D weight_tex;
+uniform vec2 size;
+
+void main()
+{
+    vec2 uv = gl_FragCoord.xy / size;
+    vec4 accum = texture2D(accum_tex, uv);
+    float revealage = accum.a;
+    if (revealage >= 1.0)
+        discard;
+    float weight = texture2D(weight_tex, uv).r;
+    gl_FragColor = vec4(accum.rgb / max(weight, 1e-5), 1.0 - revealage);
+}
+"""
+
+
+def toggle():
+    global enabled
+    enabled = not enabled
+    print(f"[OIT] Order-independent transparency: {'ON' if enabled else 'OFF'}")
+
+
+def active():
+    """True se as malhas transparentes devem ir para submit() em vez de blending direto."""
+    return enabled and not _failed
+
+
+def submit(mesh, materials, matrix, color=(1.0, 1.0, 1.0, 1.0)):
+    """Junta uma malha transparente (matriz mundo, cor RGBA) ao passe deste frame."""
+    _queue.append((mesh, materials, matrix, color))
+
+
+def submit_pass(fn):
+    """
+    Junta um desenho próprio ao passe deste frame. fn(accumulate): com
+    True corre no passe de acumulação (blending e FBO já preparados; o
+    programa de fn escreve com oit_write); com False (OIT indisponível
+    neste frame) desenha-se com blending direto, depois das malhas.
+    """
+    _passes.append(fn)
+
+
+# ---------------------------------------------------------
+# RECURSOS GL
+# ---------------------------------------------------------
+
+def _make_texture(internal, fmt, w, h):
+    tex = glGenTextures(1)
+    glBindTexture(GL_TEXTURE_2D, tex)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+    glTexImage2D(GL_TEXTURE_2D, 0, internal, w, h, 0, fmt, GL_FLOAT, None)
+    glBindTexture(GL_TEXTURE_2D, 0)
+    return tex
+
+
+def _attachment_param(attachment, pname):
+    value = (GLint * 1)()
+    glGetFramebufferAttachmentParameteriv(GL_READ_FRAMEBUFFER, attachment, pname, value)
+    return value[0]
+
+
+def _read_depth_format(target):
+    """(formato interno, attachment) igual ao da profundidade de target (já ligado para leitura)."""
+    if target == 0:
+        depth, stencil = GL_DEPTH, GL_STENCIL       # framebuffer da janela (GLUT_DEPTH)
+        has_stencil = True
+    else:
+        depth, stencil = GL_DEPTH_ATTACHMENT, GL_STENCIL_ATTACHMENT
+        has_stencil = _attachment_param(stencil, GL_FRAMEBUFFER_ATTACHMENT_OBJECT_TYPE) != GL_NONE
+    bits = _attachment_param(depth, GL_FRAMEBUFFER_ATTACHMENT_DEPTH_SIZE)
+    stencil_bits = _attachment_param(stencil, GL_FRAMEBUFFER_ATTACHMENT_STENCIL_SIZE) if has_stencil else 0
+    floating = _attachment_param(depth, GL_FRAMEBUFFER_ATTACHMENT_COMPONENT_TYPE) == GL_FLOAT
+
+    if stencil_bits:
+        return (GL_DEPTH32F_STENCIL8 if floating else GL_DEPTH24_STENCIL8), GL_DEPTH_STENCIL_ATTACHMENT
+    if floating:
+        return GL_DEPTH_COMPONENT32F, GL_DEPTH_ATTACHMENT
+    return ({16: GL_DEPTH_COMPONENT16, 32: GL_DEPTH_COMPONENT32}.get(bits, GL_DEPTH_COMPONENT24),
+            GL_DEPTH_ATTACHMENT)
+
+
+def _release_targets():
+    global _fbo, _accum_tex, _weight_tex, _depth_rb
+    if _fbo is not None:
+        glDeleteFramebuffers(1, [_fbo])
+        glDeleteTextures([_accum_tex, _weight_tex])
+        glDeleteRenderbuffers(1, [_depth_rb])
+    _fbo = _accum_tex = _weight_tex = _depth_rb = None
+
+
+def _ensure_resources(w, h, depth_format):
+    global _accum_program, _accum_uniforms, _composite_program, _composite_uniforms
+    global _fbo, _accum_tex, _weight_tex, _depth_rb, _size, _depth_format
+    if _accum_program is None:
+        _accum_program = compile_program(LIT_VERTEX_SRC, _ACCUM_FRAGMENT_SRC)
+        _accum_uniforms = Uniforms(_accum_program)
+        _composite_program = compile_program(_COMPOSITE_VERTEX_SRC, _COMPOSITE_FRAGMENT_SRC)
+        _composite_uniforms = Uniforms(_composite_program)
+
+    if _fbo is not None and _size == (w, h) and _depth_format == depth_format:
+        return
+    _release_targets()
+    internal, attachment = depth_format
+
+    _accum_tex = _make_texture(GL_RGBA16F, GL_RGBA, w, h)
+    _weight_tex = _make_texture(GL_R16F, GL_RED, w, h)
+    _depth_rb = glGenRenderbuffers(1)
+    glBindRenderbuffer(GL_RENDERBUFFER, _depth_rb)
+    glRenderbufferStorage(GL_RENDERBUFFER, internal, w, h)
+    glBindRenderbuffer(GL_RENDERBUFFER, 0)
+
+    _fbo = glGenFramebuffers(1)
+    glBindFramebuffer(GL_FRAMEBUFFER, _fbo)
+    glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, _accum_tex, 0)
+    glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT1, GL_TEXTURE_2D, _weight_tex, 0)
+    glFramebufferRenderbuffer(GL_FRAMEBUFFER, attachment, GL_RENDERBUFFER, _depth_rb)
+    status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+    glBindFramebuffer(GL_FRAMEBUFFER, 0)
+    if status != GL_FRAMEBUFFER_COMPLETE:
+        raise RuntimeError(f"OIT framebuffer incomplete (0x{status:x})")
+    _size = (w, h)
+    _depth_format = depth_format
+
+
+def _gpu_mesh(mesh):
+    gpu = _gpu_meshes.get(mesh)
+    if gpu is None:
+        gpu = _gpu_meshes[mesh] = GpuMesh(mesh)
+    return gpu
+
+
+# ---------------------------------------------------------
+# PASSES
+# ---------------------------------------------------------
+
+def _accumulate():
+    glUseProgram(_accum_program)
+    glUniform1i(_accum_uniforms["tex"], 0)
+    use_tex = _accum_uniforms["use_tex"]
+
+    for mesh, materials, matrix, color in _queue:
+        glPushMatrix()
+        glMultMatrixf(transforms.to_gl(matrix))
+        glColor4f(*color)
+        gpu = _gpu_mesh(mesh)
+        gpu.bind(_accum_uniforms)
+        gpu.draw_ranges(materials, use_tex_loc=use_tex)
+        gpu.unbind()
+        glPopMatrix()
+    glUseProgram(0)
+    for fn in _passes:
+        fn(True)
+
+
+def _draw_blended():
+    """Sem OIT: blending direto, objeto a objeto de trás para a frente."""
+    view = transforms.from_gl(glGetFloatv(GL_MODELVIEW_MATRIX))
+    glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT | GL_CURRENT_BIT)
+    glEnable(GL_BLEND)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    glDepthMask(GL_FALSE)
+    glDisable(GL_CULL_FACE)
+    # z em espaço de olho: o mais negativo é o mais longe
+    for mesh, materials, matrix, color in sorted(_queue, key=lambda q: (view @ q[2])[2, 3]):
+        glPushMatrix()
+        glMultMatrixf(transforms.to_gl(matrix))
+        glColor4f(*color)
+        mesh.draw(materials)
+        glPopMatrix()
+    glPopAttrib()
+    for fn in _passes:
+        fn(False)
+
+
+def _composite(w, h):
+    glUseProgram(_composite_program)
+    glUniform1i(_composite_uniforms["accum_tex"], 0)
+    glUniform1i(_composite_uniforms["weight_tex"], 1)
+    glUniform2f(_composite_uniforms["size"], float(w), float(h))
+
+    glActiveTexture(GL_TEXTURE1)
+    glBindTexture(GL_TEXTURE_2D, _weight_tex)
+    glActiveTexture(GL_TEXTURE0)
+    glBindTexture(GL_TEXTURE_2D, _accum_tex)
+
+    glBegin(GL_QUADS)
+    glVertex2f(-1.0, -1.0); glVertex2f(1.0, -1.0)
+    glVertex2f(1.0, 1.0); glVertex2f(-1.0, 1.0)
+    glEnd()
+
+    glActiveTexture(GL_TEXTURE1)
+    glBindTexture(GL_TEXTURE_2D, 0)
+    glActiveTexture(GL_TEXTURE0)
+    glBindTexture(GL_TEXTURE_2D, 0)
+    glUseProgram(0)
+
+
+def resolve():
+    """
+    Desenha tudo o que foi submetido neste frame, por cima do framebuffer
+    atual (janela ou FBO da resolução dinâmica), e esvazia a fila.
+    """
+    global _failed
+    stats["meshes"] = len(_queue)
+    if not _queue and not _passes:
+        return
+    if not active():
+        _queue.clear()
+        _passes.clear()
+        return
+
+    target = int(glGetIntegerv(GL_DRAW_FRAMEBUFFER_BINDING))
+    x, y, vw, vh = glGetIntegerv(GL_VIEWPORT)
+    # Alvos do tamanho do framebuffer de destino inteiro; a resolução dinâmica só muda o viewport
+    w, h = dynres.window_size()
+
+    try:
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, target)
+        if target not in _depth_formats:
+            _depth_formats[target] = _read_depth_format(target)
+        _ensure_resources(w, h, _depth_formats[target])
+
+        # Profundidade das partes opacas -> FBO do OIT
+        while glGetError() != GL_NO_ERROR:      # erros de passes anteriores não são deste blit
+            pass
+        glBindFramebuffer(GL_DRAW_FRAMEBUFFER, _fbo)
+        glBlitFramebuffer(x, y, x + vw, y + vh, x, y, x + vw, y + vh,
+                          GL_DEPTH_BUFFER_BIT, GL_NEAREST)
+        if glGetError() != GL_NO_ERROR:
+            raise RuntimeError("depth copy failed (incompatible depth formats)")
+    except Exception as e:
+        print(f"[WARN] OIT unavailable, falling back to direct blending: {e}")
+        _failed = True
+        glBindFramebuffer(GL_FRAMEBUFFER, target)
+        _draw_blended()         # os vidros deste frame não se perdem
+        _queue.clear()
+        _passes.clear()
+        return
+
+    glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT | GL_CURRENT_BIT)
+
+    # 1. Acumulação (sem escrita de profundidade, sem ordenar)
+    glBindFramebuffer(GL_FRAMEBUFFER, _fbo)
+    glDrawBuffers(2, (ctypes.c_uint * 2)(GL_COLOR_ATTACHMENT0, GL_COLOR_ATTACHMENT1))
+    glClearBufferfv(GL_COLOR, 0, (ctypes.c_float * 4)(0.0, 0.0, 0.0, 1.0))
+    glClearBufferfv(GL_COLOR, 1, (ctypes.c_float * 4)(0.0, 0.0, 0.0, 0.0))
+
+    glEnable(GL_DEPTH_TEST)
+    glDepthMask(GL_FALSE)
+    glDisable(GL_CULL_FACE)
+    glEnable(GL_BLEND)
+    glBlendFuncSeparate(GL_ONE, GL_ONE, GL_ZERO, GL_ONE_MINUS_SRC_ALPHA)
+    _accumulate()
+
+    # 2. Composição por cima da cena
+    glBindFramebuffer(GL_FRAMEBUFFER, target)
+    glDisable(GL_DEPTH_TEST)
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    _composite(w, h)
+
+    glPopAttrib()
+    _queue.clear()
+    _passes.clear()
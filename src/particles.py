@@ -0,0 +1,355 @@
+# particles.py
+# ------------------------------------------------------------
+#  PARTÍCULAS: POEIRA DAS RODAS + FUMO DO ESCAPE
+# ------------------------------------------------------------
+#  Todo o estado vive em arrays numpy pré-alocados com CAPACITY
+#  entradas, usados como buffer circular: emitir é escrever um bloco
+#  a partir de head (as mais antigas são reescritas), e cada passo
+#  atualiza o buffer inteiro com meia dúzia de operações vetoriais,
+#  sem ciclos por partícula. As mortas continuam no array, só ficam
+#  invisíveis (alpha 0).
+#
+#  A emissão segue o trator: a distância percorrida em cada passo sai
+#  da rotação das rodas de trás (tractor.update), por isso há poeira
+#  só com o trator em movimento e só em cima do caminho de terra; o
+#  escape fuma sempre, mais quando anda.
+#
+#  Desenho: um único glDrawArrays(GL_POINTS) com point sprites; o
+#  vertex shader dá o tamanho em pixels e esconde as mortas. Com o OIT
+#  ligado o draw entra no passe de acumulação (oit.submit_pass), com os
+#  vidros: poeira atrás de um vidro fica atrás dele, à frente fica à frente.
+#
+#  python particles.py   partículas sustentáveis a 60 FPS (só CPU)
+# ------------------------------------------------------------
+import time
+
+import numpy as np
+from OpenGL.GL import *
+
+import dynbuf
+import oit
+import telemetry
+import tractor
+import transforms
+from oit import OIT_OUTPUT_GLSL
+from shaders import compile_program, Uniforms, FF_LIGHTING_GLSL
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+enabled = True
+CAPACITY = 1 << 17               # 131072 partículas no buffer circular
+
+# Caminho de terra (igual a scene.draw_ground)
+PATH_X = (-4.0, 4.0)
+PATH_Z = (-40.01, 120.0)
+
+# Emissores em espaço local do trator (y local aponta para baixo; chão em y = 4)
+DUST_EMITTERS = ((3.55, 3.8, -2.3), (3.55, 3.8, 2.3))     # atrás das rodas de trás
+EXHAUST_EMITTER = (-1.6, -3.2, 1.3)                         # topo do tubo de escape
+
+DUST_PER_UNIT = 400.0            # partículas por unidade percorrida, por roda
+SMOKE_IDLE_RATE = 40.0           # partículas/s parado
+SMOKE_PER_UNIT = 60.0            # extra por unidade percorrida
+
+#                  vida (s)    tamanho  cresc./s  flutuação  velocidade   cor (r, g, b, a)
+DUST = dict(life=(1.2, 2.5), size=0.35, growth=0.9, buoyancy=-0.6, speed=1.6,
+            color=(0.55, 0.45, 0.33, 0.45))
+SMOKE = dict(life=(2.0, 3.5), size=0.25, growth=1.2, buoyancy=1.4, speed=0.5,
+             color=(0.25, 0.25, 0.25, 0.35))
+
+DRAG = 1.5                       # 1/s
+
+
+# ---------------------------------------------------------
+# ESTADO (buffer circular)
+# ---------------------------------------------------------
+class ParticleBuffer:
+    """Estado struct-of-arrays de até capacity partículas."""
+
+    def __init__(self, capacity=CAPACITY, seed=0):
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 3), dtype=np.float32)
+        self.vel = np.zeros((capacity, 3), dtype=np.float32)
+        self.age = np.full(capacity, np.inf, dtype=np.float32)
+        self.life = np.ones(capacity, dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)      # tamanho inicial
+        self.growth = np.zeros(capacity, dtype=np.float32)
+        self.buoyancy = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros((capacity, 4), dtype=np.float32)
+
+        # Vértices para a GPU: x y z tamanho | r g b a
+        self.vertices = np.zeros((capacity, 8), dtype=np.float32)
+
+        self.head = 0
+        self.used = 0            # entradas já escritas alguma vez (desenho)
+        self.rng = np.random.default_rng(seed)
+
+    def emit(self, count, origin, kind, direction=(0.0, 0.0, 0.0)):
+        """Escreve count partículas novas à volta de origin (reescreve as mais antigas)."""
+        count = min(int(count), self.capacity)
+        if count <= 0:
+            return
+        idx = (self.head + np.arange(count)) % self.capacity
+        self.head = (self.head + count) % self.capacity
+        self.used = min(self.capacity, self.used + count)
+
+        rng = self.rng
+        spread = rng.normal(0.0, 0.35, (count, 3)).astype(np.float32)
+        self.pos[idx] = np.asarray(origin, dtype=np.float32) + spread * 0.3
+        jitter = rng.normal(0.0, 1.0, (count, 3)).astype(np.float32)
+        jitter[:, 1] = np.abs(jitter[:, 1])
+        self.vel[idx] = jitter * kind["speed"] + np.asarray(direction, dtype=np.float32)
+        self.age[idx] = rng.uniform(0.0, 0.05, count)
+        self.life[idx] = rng.uniform(*kind["life"], count)
+        self.size[idx] = kind["size"] * rng.uniform(0.7, 1.3, count)
+        self.growth[idx] = kind["growth"]
+        self.buoyancy[idx] = kind["buoyancy"]
+        self.color[idx] = kind["color"]
+
+    def step(self, dt):
+        """Integra todas as entradas de uma vez (as mortas não se notam)."""
+        self.vel *= np.float32(np.exp(-DRAG * dt))
+        self.vel[:, 1] += self.buoyancy * np.float32(dt)
+        self.pos += self.vel * np.float32(dt)
+        np.maximum(self.pos[:, 1], 0.02, out=self.pos[:, 1])      # não atravessar o chão
+        self.age += np.float32(dt)
+
+    def alive(self):
+        return int(np.count_nonzero(self.age[:self.used] < self.life[:self.used]))
+
+    def pack(self, out=None):
+        """Vértices das entradas usadas: posição, tamanho atual, cor com fade (em out, ou vista)."""
+        n = self.used
+        out = self.vertices[:n] if out is None else out
+        t = self.age[:n] / self.life[:n]
+        out[:, 0:3] = self.pos[:n]
+        out[:, 3] = self.size[:n] + self.growth[:n] * self.age[:n]
+        out[:, 4:7] = self.color[:n, :3]
+        # Aparecer em 0.1 da vida, desaparecer até ao fim; mortas (t >= 1) -> 0
+        # (só escritas em out: pode ser memória mapeada, lenta de ler)
+        out[:, 7] = self.color[:n, 3] * np.clip(t * 10.0, 0.0, 1.0) * np.clip(1.0 - t, 0.0, 1.0)
+        return out
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+_buffer = None
+_last_spin = None
+_smoke_carry = 0.0
+_dust_carry = 0.0
+
+_programs = {}                   # accumulate (passe do OIT) -> (programa, Uniforms)
+
+# Estatísticas do último passo
+stats = {"alive": 0, "update_ms": 0.0}
+
+
+def toggle():
+    global enabled
+    enabled = not enabled
+    print(f"[FX] Dust/smoke particles: {'ON' if enabled else 'OFF'}")
+
+
+def _on_path(x, z):
+    return PATH_X[0] <= x <= PATH_X[1] and PATH_Z[0] <= z <= PATH_Z[1]
+
+
+def update(dt):
+    """Chamado por scene.step depois de tractor.update."""
+    global _buffer, _last_spin, _smoke_carry, _dust_carry
+    if not enabled:
+        return
+    if _buffer is None:
+        _buffer = ParticleBuffer()
+    t0 = time.perf_counter()
+
+    # Distância do passo a partir da rotação das rodas (com sinal)
+    spin = tractor.wheel_spin_back
+    dist = 0.0 if _last_spin is None else (spin - _last_spin) / tractor.BACK_SPIN_PER_UNIT
+    _last_spin = spin
+
+    model = tractor.model_matrix()
+    heading = tractor.get_direction_deg() * tractor.DEG2RAD
+    # Para trás em relação ao movimento (o trator avança em -x local)
+    back = np.array([np.cos(heading), 0.0, np.sin(heading)]) * np.sign(dist) * 2.0
+
+    if abs(dist) > 1e-6:
+        _dust_carry += abs(dist) * DUST_PER_UNIT
+        count = int(_dust_carry)
+        _dust_carry -= count
+        for local in DUST_EMITTERS:
+            p = transforms.transform_points(model, [local])[0]
+            if _on_path(p[0], p[2]):
+                _buffer.emit(count, p, DUST, back)
+
+    _smoke_carry += SMOKE_IDLE_RATE * dt + abs(dist) * SMOKE_PER_UNIT
+    count = int(_smoke_carry)
+    _smoke_carry -= count
+    _buffer.emit(count, transforms.transform_points(model, [EXHAUST_EMITTER])[0], SMOKE)
+
+    _buffer.step(dt)
+    stats["update_ms"] = (time.perf_counter() - t0) * 1000.0
+
+
+# ---------------------------------------------------------
+# DESENHO (point sprites)
+# ---------------------------------------------------------
+
+_VERTEX_SRC = """
+#version 120
+uniform float viewport_h;
+uniform float proj_scale;     // projection[1][1]
+varying vec4 v_color;
+varying vec3 v_pos;
+
+void main()
+{
+    vec4 eye = gl_ModelViewMatrix * vec4(gl_Vertex.xyz, 1.0);
+    v_pos = eye.xyz;
+    v_color = gl_Color;
+    if (gl_Color.a <= 0.0) {
+        gl_Position = vec4(2.0, 2.0, 2.0, 1.0);     // morta: fora do volume de recorte
+        gl_PointSize = 0.0;
+        return;
+    }
+    gl_Position = gl_ProjectionMatrix * eye;
+    gl_PointSize = gl_Vertex.w * proj_scale * 0.5 * viewport_h / max(-eye.z, 0.1);
+}
+"""
+
+_FRAGMENT_SRC = """
+#version 120
+varying vec4 v_color;
+varying vec3 v_pos;
+""" + FF_LIGHTING_GLSL + """
+void main()
+{
+    vec2 d = gl_PointCoord * 2.0 - 1.0;
+    float r2 = dot(d, d);
+    if (r2 >= 1.0)
+        discard;
+    vec4 color = vec4(v_color.rgb, v_color.a * (1.0 - r2) * (1.0 - r2));
+    gl_FragColor = ff_fog(color, v_pos);
+}
+"""
+
+# O mesmo, para o passe de acumulação do OIT
+_OIT_FRAGMENT_SRC = """
+#version 120
+varying vec4 v_color;
+varying vec3 v_pos;
+""" + FF_LIGHTING_GLSL + OIT_OUTPUT_GLSL + """
+void main()
+{
+    vec2 d = gl_PointCoord * 2.0 - 1.0;
+    float r2 = dot(d, d);
+    if (r2 >= 1.0)
+        discard;
+    vec4 color = vec4(v_color.rgb, v_color.a * (1.0 - r2) * (1.0 - r2));
+    oit_write(ff_fog(color, v_pos), v_pos);
+}
+"""
+
+
+def snapshot():
+    """Cópia dos vértices deste passo (frame_pipeline), ou None sem partículas."""
+    if not enabled or _buffer is None or _buffer.used == 0:
+        return None
+    return _buffer.pack(np.empty((_buffer.used, 8), dtype=np.float32))
+
+
+def draw(vertices=None):
+    """
+    Um draw call para todas as partículas (transparentes, sem escrever
+    profundidade). vertices: os de snapshot(), em vez do estado atual.
+    Com o OIT ativo só prepara os vértices e submete o draw ao passe
+    dele: chamar antes de oit.resolve().
+    """
+    if not enabled or _buffer is None or _buffer.used == 0:
+        return
+
+    # Vértices escritos direto no buffer dinâmico do frame
+    if vertices is None:
+        block = dynbuf.alloc(_buffer.used, 8)
+        data = _buffer.pack(block.array)
+    else:
+        block = dynbuf.alloc(len(vertices), 8)
+        block.array[:] = vertices
+        data = block.array
+    stats["alive"] = _buffer.alive()
+
+    count = len(data)
+    if oit.active():
+        oit.submit_pass(lambda accumulate: _draw_points(block, count, accumulate))
+    else:
+        _draw_points(block, count, False)
+
+
+def _draw_points(block, count, accumulate):
+    """glDrawArrays(GL_POINTS) do bloco; accumulate: dentro do passe de acumulação do OIT."""
+    if accumulate not in _programs:
+        program = compile_program(_VERTEX_SRC, _OIT_FRAGMENT_SRC if accumulate else _FRAGMENT_SRC)
+        _programs[accumulate] = (program, Uniforms(program))
+    program, uniforms = _programs[accumulate]
+
+    glPushAttrib(GL_ENABLE_BIT | GL_DEPTH_BUFFER_BIT | GL_COLOR_BUFFER_BIT)
+    glEnable(GL_VERTEX_PROGRAM_POINT_SIZE)
+    glEnable(GL_POINT_SPRITE)
+    if not accumulate:          # no passe do OIT a profundidade e o blending são os de resolve()
+        glEnable(GL_DEPTH_TEST)
+        glDepthMask(GL_FALSE)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+    glUseProgram(program)
+    viewport = glGetIntegerv(GL_VIEWPORT)
+    glUniform1f(uniforms["viewport_h"], float(viewport[3]))
+    glUniform1f(uniforms["proj_scale"], float(glGetFloatv(GL_PROJECTION_MATRIX)[1][1]))
+
+    block.bind()
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glEnableClientState(GL_COLOR_ARRAY)
+    glVertexPointer(4, GL_FLOAT, 32, block.pointer(0))
+    glColorPointer(4, GL_FLOAT, 32, block.pointer(16))
+
+    glDrawArrays(GL_POINTS, 0, count)
+    telemetry.count(1)
+
+    glDisableClientState(GL_COLOR_ARRAY)
+    glDisableClientState(GL_VERTEX_ARRAY)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    glUseProgram(0)
+    glPopAttrib()
+
+
+# ---------------------------------------------------------
+# BENCHMARK (sem GL)
+# ---------------------------------------------------------
+
+def benchmark(counts=(10_000, 50_000, 100_000, 200_000), steps=60, dt=1.0 / 60.0):
+    """Custo de passo + pack (o trabalho de CPU por frame) com o buffer cheio."""
+    results = []
+    for n in counts:
+        buf = ParticleBuffer(capacity=n)
+        buf.emit(n, (0.0, 1.0, 0.0), DUST)
+        t0 = time.perf_counter()
+        for _ in range(steps):
+            buf.emit(n // 120, (0.0, 1.0, 0.0), SMOKE)    # ~2 s de vida a 60 FPS
+            buf.step(dt)
+            buf.pack()
+        ms = (time.perf_counter() - t0) * 1000.0 / steps
+        results.append((n, ms))
+        print(f"[FX] {n:7d} particles: {ms:6.2f} ms/frame (CPU), "
+              f"{'fits' if ms <= 1000.0 / 60.0 else 'exceeds'} a 60 FPS frame")
+
+    # Extrapolação linear a partir do maior teste
+    n, ms = results[-1]
+    print(f"[FX] ~{int(n * (1000.0 / 60.0) / ms):,} particles would use a whole 16.7 ms frame")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,162 @@
+# picking.py
+# ------------------------------------------------------------
+#  SELEÇÃO COM O RATO (ray casting contra BVHs por malha)
+# ------------------------------------------------------------
+import time
+import weakref
+
+import numpy as np
+
+import farm
+import garage
+import tractor
+from bvh import MeshBVH
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+
+# Matrizes atuais (preenchidas por scene.reshape / scene.apply_camera)
+_proj_matrix = np.eye(4)
+_view_matrix = np.eye(4)
+_viewport = (0, 0, 800, 600)
+
+# mesh -> MeshBVH (construída uma vez, partilhada entre instâncias)
+_bvh_cache = weakref.WeakKeyDictionary()
+
+# Tempo do último pick (ms), para diagnóstico
+last_pick_ms = 0.0
+
+
+class PickHit:
+    """Resultado de um pick: objeto, parte, triângulo e distância ao olho."""
+
+    def __init__(self, target, part, triangle, distance, point):
+        self.target = target        # ex.: "cow#3", "garage", "tractor"
+        self.part = part            # nome da malha (grupo o/g do OBJ)
+        self.triangle = triangle    # índice na ordem de ObjMesh.triangle_positions()
+        self.distance = distance    # unidades do mundo
+        self.point = point          # ponto de impacto (mundo)
+
+    def __repr__(self):
+        return (f"PickHit({self.target} / {self.part}, tri {self.triangle}, "
+                f"dist {self.distance:.2f})")
+
+
+# ---------------------------------------------------------
+# CÂMARA
+# ---------------------------------------------------------
+
+def set_projection(proj, viewport):
+    global _proj_matrix, _viewport
+    _proj_matrix = np.asarray(proj, dtype=np.float64)
+    _viewport = tuple(viewport)
+
+
+def set_view(view):
+    global _view_matrix
+    _view_matrix = np.asarray(view, dtype=np.float64)
+
+
+def cursor_ray(x, y, proj=None, view=None, viewport=None):
+    """Raio (origem, direção normalizada) em espaço mundo para o pixel (x, y) da janela."""
+    proj = _proj_matrix if proj is None else proj
+    view = _view_matrix if view is None else view
+    vx, vy, vw, vh = _viewport if viewport is None else viewport
+
+    # GLUT tem a origem no canto superior esquerdo
+    nx = 2.0 * (x - vx) / vw - 1.0
+    ny = 1.0 - 2.0 * (y - vy) / vh
+
+    inv = np.linalg.inv(proj @ view)
+    near = inv @ np.array([nx, ny, -1.0, 1.0])
+    far = inv @ np.array([nx, ny, 1.0, 1.0])
+    near = near[:3] / near[3]
+    far = far[:3] / far[3]
+
+    direction = far - near
+    return near, direction / np.linalg.norm(direction)
+
+
+# ---------------------------------------------------------
+# BVH
+# ---------------------------------------------------------
+
+def mesh_bvh(mesh):
+    """BVH da malha (em espaço local), construída na primeira utilização."""
+    bvh = _bvh_cache.get(mesh)
+    if bvh is None:
+        bvh = MeshBVH(mesh.triangle_positions())
+        _bvh_cache[mesh] = bvh
+    return bvh
+
+
+def _targets():
+    yield from farm.pick_targets()
+    yield from garage.pick_targets()
+    yield from tractor.pick_targets()
+
+
+def prepare():
+    """Constrói antecipadamente as BVHs de tudo o que é selecionável."""
+    t0 = time.perf_counter()
+    tris = 0
+    for _, _, mesh, _ in _targets():
+        tris += mesh_bvh(mesh).count
+    print(f"[PICK] BVHs ready: {tris} tris in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+# ---------------------------------------------------------
+# PICK
+# ---------------------------------------------------------
+
+def pick_ray(origin, direction):
+    """Impacto mais próximo de um raio em espaço mundo, ou None."""
+    targets = list(_targets())
+    if not targets:
+        return None
+
+    bvhs = [mesh_bvh(mesh) for _, _, mesh, _ in targets]
+    inv = np.linalg.inv(np.stack([m for _, _, _, m in targets]))
+
+    # Raio em espaço local de cada alvo (t mantém-se em unidades do mundo)
+    o_local = inv[:, :3, :3] @ origin + inv[:, :3, 3]
+    d_local = inv[:, :3, :3] @ direction
+
+    # Teste das caixas-raiz de todos os alvos de uma vez
+    boxes = np.stack([b.boxes[0] for b in bvhs])            # (K, 2, 3)
+    safe = np.where(np.abs(d_local) < 1e-30, 1e-30, d_local)
+    with np.errstate(invalid="ignore"):
+        t = (boxes - o_local[:, None, :]) / safe[:, None, :]
+    t_near = t.min(axis=1).max(axis=1)
+    t_far = t.max(axis=1).min(axis=1)
+    candidates = (t_near <= t_far) & (t_far >= 0.0)
+
+    # Do mais próximo para o mais distante, parando quando já não pode melhorar
+    best = None
+    best_t = np.inf
+    for k in np.argsort(np.where(candidates, t_near, np.inf)):
+        if not candidates[k] or t_near[k] > best_t:
+            break
+        hit = bvhs[k].intersect(o_local[k], d_local[k], best_t)
+        if hit is not None:
+            best_t, tri = hit
+            best = (k, tri)
+
+    if best is None:
+        return None
+
+    k, tri = best
+    target, part, _, _ = targets[k]
+    return PickHit(target, part, tri, best_t, origin + direction * best_t)
+
+
+def pick(x, y):
+    """Seleciona o objeto sob o cursor (coordenadas de janela GLUT)."""
+    global last_pick_ms
+    t0 = time.perf_counter()
+    origin, direction = cursor_ray(x, y)
+    hit = pick_ray(origin, direction)
+    last_pick_ms = (time.perf_counter() - t0) * 1000.0
+    return hit
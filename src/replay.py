@@ -0,0 +1,378 @@
+# replay.py
+# ------------------------------------------------------------
+#  GRAVAÇÃO E REPRODUÇÃO DE INPUT (execuções determinísticas)
+# ------------------------------------------------------------
+#  Gravar:     python main.py --record run.rec [--frames N] [--fixed-dt 0.0166667]
+#  Reproduzir: python main.py --replay run.rec [--label nome]   (com janela)
+#              python replay.py run.rec [--label nome]          (sem janela)
+#
+#  O ficheiro guarda o estado inicial, cada evento de input (teclas,
+#  setas, rato, redimensionar) carimbado com o frame e o tempo, e o dt
+#  de cada passo. A reprodução entrega os mesmos eventos aos mesmos
+#  handlers de scene.py e usa os mesmos dt, por isso o estado final do
+#  trator e das câmaras é idêntico bit a bit (verificado com o digest
+#  gravado no fim). Cada execução guarda os tempos por frame em
+#  <ficheiro>.timings.jsonl para comparar builds (A/B).
+#  Sem --frames a gravação acaba ao fechar a janela (ou à saída): o
+#  END, o digest e os tempos são escritos nessa altura.
+# ------------------------------------------------------------
+import atexit
+import hashlib
+import json
+import struct
+import sys
+import time
+
+import garage
+import scene
+import tractor
+
+
+# ---------------------------------------------------------
+# FORMATO
+# ---------------------------------------------------------
+MAGIC = b"CGREC"
+VERSION = 2          # v2: rato aplicado por passo (estado _mouse_*)
+
+_HEADER = struct.Struct("<5sHI")        # magic, versão, nº de valores do estado inicial
+_RECORD = struct.Struct("<BIdiiii")     # tipo, frame, tempo|dt, a, b, c, d (29 bytes)
+
+FRAME = 0          # valor = dt do passo
+KEY = 1            # a = byte da tecla, b, c = x, y
+KEY_UP = 2
+SPECIAL = 3        # a = código GLUT da tecla especial, b, c = x, y
+SPECIAL_UP = 4
+MOTION = 5         # a, b = x, y
+BUTTON = 6         # a = botão, b = estado, c, d = x, y
+RESHAPE = 7        # a, b = largura, altura
+END = 255          # seguido do digest SHA-1 (20 bytes) do estado final
+
+_HANDLERS = {
+    KEY: lambda r: scene.keyboard(bytes([r[3]]), r[4], r[5]),
+    KEY_UP: lambda r: scene.keyboard_up(bytes([r[3]]), r[4], r[5]),
+    SPECIAL: lambda r: scene.special_keys(r[3], r[4], r[5]),
+    SPECIAL_UP: lambda r: scene.special_keys_up(r[3], r[4], r[5]),
+    MOTION: lambda r: scene.mouse_motion(r[3], r[4]),
+    BUTTON: lambda r: scene.mouse_button(r[3], r[4], r[5], r[6]),
+    RESHAPE: lambda r: scene.set_window_size(r[3], r[4]),
+}
+
+
+# ---------------------------------------------------------
+# ESTADO (o que tem de coincidir bit a bit)
+# ---------------------------------------------------------
+_STATE_VARS = (
+    [(tractor, n) for n in ("pos_x", "pos_z", "dir_angle", "steer_angle",
+                            "wheel_spin_back", "wheel_spin_front",
+                            "door_left_angle", "door_right_angle",
+                            "door_left_target", "door_right_target")]
+    + [(garage, "garage_door_open"), (garage, "garage_door_open_tgt")]
+    + [(scene, n) for n in ("cam_mode", "free_yaw", "free_pitch",
+                            "cockpit_yaw_offset", "cockpit_pitch",
+                            "chase_dist", "chase_orbit_angle",
+                            "mouse_dx_smooth", "mouse_dy_smooth",
+                            "_mouse_x", "_mouse_y", "_mouse_pending",
+                            "center_x", "center_y")]
+)
+
+
+def capture_state():
+    values = [float(getattr(mod, name)) for mod, name in _STATE_VARS]
+    values += [float(v) for v in scene.free_pos]
+    values += [float(v) for v in scene.key_down.values()]
+    values += [float(v) for v in scene.arrow_down.values()]
+    return values
+
+
+def restore_state(values):
+    values = list(values)
+    for mod, name in _STATE_VARS:
+        kind = type(getattr(mod, name))
+        setattr(mod, name, kind(values.pop(0)))
+    for i in range(3):
+        scene.free_pos[i] = values.pop(0)
+    for table in (scene.key_down, scene.arrow_down):
+        for k in table:
+            table[k] = bool(values.pop(0))
+
+
+def state_digest():
+    values = capture_state()
+    return hashlib.sha1(struct.pack(f"<{len(values)}d", *values)).digest()
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+_mode = None                 # None | "record" | "replay"
+_file = None
+_path = None
+_label = ""
+_fixed_dt = None
+_max_frames = None
+
+_frame = 0
+_t0 = 0.0
+
+_records = []                # reprodução: registos por ler
+_cursor = 0
+_expected_digest = None
+
+# Tempos desta execução (ms)
+frame_ms = []                # intervalo entre frames
+display_ms = []              # duração de display()
+step_ms = []                 # duração do passo de simulação (sem janela)
+_last_frame_time = None
+
+
+# ---------------------------------------------------------
+# GRAVAÇÃO
+# ---------------------------------------------------------
+
+def start_recording(path, max_frames=None, fixed_dt=None):
+    global _mode, _file, _path, _max_frames, _fixed_dt, _frame, _t0
+    values = capture_state()
+    _file = open(path, "wb")
+    _file.write(_HEADER.pack(MAGIC, VERSION, len(values)))
+    _file.write(struct.pack(f"<{len(values)}d", *values))
+
+    _mode, _path = "record", path
+    _max_frames, _fixed_dt = max_frames, fixed_dt
+    _frame, _t0 = 0, time.perf_counter()
+    atexit.register(stop_recording)     # sem --frames: fecha o ficheiro à saída
+    print(f"[REC] Recording input to {path}")
+
+
+def _write(kind, value=0.0, a=0, b=0, c=0, d=0):
+    _file.write(_RECORD.pack(kind, _frame, value, a, b, c, d))
+
+
+def stop_recording():
+    global _mode, _file
+    if _mode != "record":
+        return
+    digest = state_digest()
+    _write(END)
+    _file.write(digest)
+    _file.close()
+    _file = None
+    _mode = None
+    print(f"[REC] {_frame} frames saved to {_path} (state {digest.hex()[:12]})")
+    _report("record")
+
+
+def recorded(kind, handler):
+    """
+    Envolve um callback GLUT: grava o evento antes de o entregar. Durante
+    a reprodução o input real é ignorado (exceto o redimensionar, que
+    continua a ajustar o viewport).
+    """
+    def wrapper(*args):
+        if _mode == "replay":
+            if kind == RESHAPE:
+                w, h = scene.screen_width, scene.screen_height
+                handler(*args)
+                scene.set_window_size(w, h)
+            return
+        if _mode == "record":
+            ints = [a[0] if isinstance(a, bytes) else int(a) for a in args]
+            _write(kind, time.perf_counter() - _t0, *ints)
+        handler(*args)
+    return wrapper
+
+
+def timed(display):
+    """Envolve display() para recolher a duração de cada frame desenhado."""
+    def wrapper():
+        t0 = time.perf_counter()
+        display()
+        if _mode is not None:
+            display_ms.append((time.perf_counter() - t0) * 1000.0)
+    return wrapper
+
+
+# ---------------------------------------------------------
+# REPRODUÇÃO
+# ---------------------------------------------------------
+
+def load(path):
+    """Lê uma gravação: (estado inicial, registos, digest final | None)."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    magic, version, count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a v{VERSION} input recording")
+    offset = _HEADER.size
+    initial = struct.unpack_from(f"<{count}d", data, offset)
+    offset += 8 * count
+
+    records, digest = [], None
+    while offset + _RECORD.size <= len(data):
+        rec = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        if rec[0] == END:
+            digest = data[offset:offset + 20]
+            break
+        records.append(rec)
+    return initial, records, digest
+
+
+def start_replay(path, label=""):
+    global _mode, _path, _label, _records, _cursor, _expected_digest, _frame
+    initial, _records, _expected_digest = load(path)
+    restore_state(initial)
+    _mode, _path, _label = "replay", path, label
+    _cursor = _frame = 0
+    frames = sum(1 for r in _records if r[0] == FRAME)
+    print(f"[REPLAY] {path}: {frames} frames, {len(_records) - frames} events")
+
+
+def _dispatch_until_frame(headless):
+    """Entrega os eventos até ao próximo FRAME; devolve o seu dt (None = fim)."""
+    global _cursor
+    while _cursor < len(_records):
+        rec = _records[_cursor]
+        _cursor += 1
+        if rec[0] == FRAME:
+            return rec[2]
+        if headless and rec[0] == BUTTON:
+            continue    # picking precisa da projeção da janela; não altera o estado
+        _HANDLERS[rec[0]](rec)
+    return None
+
+
+def _finish_replay():
+    global _mode
+    _mode = None
+    digest = state_digest()
+    if _expected_digest is None:
+        ok = None
+        print(f"[REPLAY] Done (state {digest.hex()[:12]}, recording has no final digest)")
+    else:
+        ok = digest == _expected_digest
+        print(f"[REPLAY] Done: state {'IDENTICAL' if ok else 'DIFFERENT'} "
+              f"({digest.hex()[:12]} vs {_expected_digest.hex()[:12]})")
+    _report("replay")
+    return ok
+
+
+# ---------------------------------------------------------
+# HOOK DO IDLE
+# ---------------------------------------------------------
+
+def active():
+    """A gravar ou a reproduzir: todos os frames contam (render a pedido não dorme)."""
+    return _mode is not None
+
+
+def frame(dt):
+    """
+    Chamado por scene.idle() antes de cada passo. A gravar: regista o dt
+    (fixo, se pedido). A reproduzir: entrega os eventos deste frame e
+    devolve o dt gravado. Sem gravação/reprodução devolve dt.
+    """
+    global _frame, _last_frame_time
+    if _mode is None:
+        return dt
+
+    now = time.perf_counter()
+    if _last_frame_time is not None:
+        frame_ms.append((now - _last_frame_time) * 1000.0)
+    _last_frame_time = now
+
+    if _mode == "record":
+        # Fim do limite: o estado final já inclui o passo do último frame gravado
+        if _max_frames is not None and _frame >= _max_frames:
+            stop_recording()
+            return dt
+        if _fixed_dt is not None:
+            dt = _fixed_dt
+        _write(FRAME, dt)
+        _frame += 1
+        return dt
+
+    recorded_dt = _dispatch_until_frame(headless=False)
+    if recorded_dt is None:
+        ok = _finish_replay()
+        sys.exit(0 if ok is not False else 1)
+    _frame += 1
+    return recorded_dt
+
+
+def run_headless(path, label=""):
+    """Reproduz sem janela, só a simulação; devolve True se o estado final coincidir."""
+    global _frame
+    scene.headless = True
+    start_replay(path, label)
+    while True:
+        dt = _dispatch_until_frame(headless=True)
+        if dt is None:
+            break
+        t0 = time.perf_counter()
+        scene.step(dt)
+        step_ms.append((time.perf_counter() - t0) * 1000.0)
+        _frame += 1
+    return _finish_replay()
+
+
+# ---------------------------------------------------------
+# RELATÓRIO DE TEMPOS
+# ---------------------------------------------------------
+
+def _summary(values):
+    if not values:
+        return None
+    s = sorted(values)
+    pick = lambda q: s[min(len(s) - 1, int(q * len(s)))]
+    return {"mean": sum(s) / len(s), "p50": pick(0.50), "p95": pick(0.95),
+            "p99": pick(0.99), "max": s[-1]}
+
+
+def _report(mode):
+    entry = {"mode": mode, "label": _label, "frames": _frame,
+             "when": time.strftime("%Y-%m-%d %H:%M:%S")}
+    for key, values in (("frame_ms", frame_ms), ("display_ms", display_ms), ("step_ms", step_ms)):
+        summary = _summary(values)
+        if summary:
+            entry[key] = summary
+            print(f"[TIME] {key:<10} mean {summary['mean']:7.3f}  p50 {summary['p50']:7.3f}  "
+                  f"p95 {summary['p95']:7.3f}  p99 {summary['p99']:7.3f}  max {summary['max']:7.3f}")
+
+    with open(_path + ".timings.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+USAGE = ("usage: python main.py --record run.rec [--frames N] [--fixed-dt seconds]\n"
+         "       python main.py --replay run.rec [--label name]")
+
+
+def parse_args(argv):
+    """
+    Opções --record/--replay/--frames/--fixed-dt/--label da linha de
+    comandos; um valor em falta ou inválido mostra o uso e sai.
+    """
+    opts = {}
+    for flag, conv in (("--record", str), ("--replay", str), ("--frames", int),
+                       ("--fixed-dt", float), ("--label", str)):
+        if flag not in argv:
+            continue
+        i = argv.index(flag)
+        try:
+            value = conv(argv[i + 1])
+        except (IndexError, ValueError):
+            value = None
+        if value is None or (conv is str and value.startswith("--")) or (conv is not str and value <= 0):
+            print(f"[REPLAY] Bad value for {flag}")
+            print(USAGE)
+            sys.exit(2)
+        opts[flag[2:].replace("-", "_")] = value
+    return opts
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python replay.py run.rec [--label name]")
+        sys.exit(2)
+    ok = run_headless(sys.argv[1], parse_args(sys.argv).get("label", ""))
+    sys.exit(0 if ok is not False else 1)
@@ -3,6 +3,8 @@ import sys
 import time
 from math import sin, cos, radians
 
+import numpy as np
+
 from OpenGL.GL import *
 from OpenGL.GLU import *
 from OpenGL.GLUT import *
@@ -12,7 +14,24 @@ import OpenGL.GLUT as GLUT  # Importação como objeto para acesso seguro a cons
 import lighting 
 import garage
 import tractor
+import tractor_gpu
 import farm
+import frame_pipeline
+import fleet
+import occlusion
+import picking
+import replay
+import hot_reload
+import dynbuf
+import dynres
+import capture
+import oit
+import particles
+import startup
+import scene_loader
+import telemetry
+import transforms
+import vegetation
 
 
 # ---------------------------------------------------------
@@ -28,6 +47,12 @@ MOVE_SPEED = 10.0
 VERT_SPEED = 6.0
 MOUSE_SMOOTH = 0.25
 
+# Render a pedido (--on-demand / tecla Z): sem alterações o idle adormece
+on_demand = False
+SETTLE_SECONDS = 2.5    # continua a desenhar depois da última alteração (poeira, queries, pipeline)
+WAKE_INTERVAL_MS = 250  # a dormir: acorda para hot-reload e trabalho em segundo plano
+CAMERA_EPS = 1e-4       # a suavização do rato decai sem nunca chegar a zero
+
 # Window Settings
 screen_width = 800
 screen_height = 600
@@ -56,14 +81,27 @@ COCKPIT_BASE_YAW = 90
 chase_dist = 12.0
 chase_orbit_angle = 0.0
 
-# Mouse state
-_warping_mouse = False
+# Mouse state: o callback só guarda a última posição; step() aplica-a
+# (suavização e warp ao centro uma vez por passo)
+_mouse_x = 0
+_mouse_y = 0
+_mouse_pending = False
 mouse_dx_smooth = 0.0
 mouse_dy_smooth = 0.0
 
+# Contadores de input (input_bench.py)
+motion_events = 0
+pointer_warps = 0
+
 # UI
 help_visible = False
 
+# Sem janela (reprodução de gravações em replay.py): não chamar o GLUT
+headless = False
+
+# Seleção (picking)
+selected = None
+
 # Textures
 _ground_tex_id = None
 _path_tex_id = None
@@ -78,6 +116,11 @@ _last_time = time.time()
 _fps_accum = 0.0
 _fps_frames = 0
 
+# Render a pedido
+_last_change = time.time()
+_sleeping = False
+_sleep_id = 0           # invalida os timers de um sono anterior
+
 
 # ---------------------------------------------------------
 # LÓGICA DE CÂMARA
@@ -118,60 +161,83 @@ def _update_free_cam(dt: float):
     if key_down['e']: free_pos[1] -= vspeed
 
 
-def apply_camera():
-    glMatrixMode(GL_MODELVIEW)
-    glLoadIdentity()
+def _camera_xz():
+    """Posição (x, z) aproximada do olho, para o streaming."""
+    if cam_mode == CAM_FREE:
+        return free_pos[0], free_pos[2]
+    return tractor.get_position()
 
-    tx, tz = tractor.get_position()
-    yaw_deg = tractor.get_direction_deg()
+
+def camera_state():
+    """Tuplo com o estado das câmaras (camera_look pode correr noutra thread)."""
+    return (cam_mode, chase_orbit_angle, chase_dist, cockpit_yaw_offset, cockpit_pitch,
+            free_yaw, free_pitch, tuple(free_pos))
+
+
+def camera_look(cam, tx, tz, yaw_deg):
+    """(olho, alvo) da câmara para a posição/direção do trator dadas, sem GL."""
+    mode, orbit_angle, dist, yaw_offset, pitch, f_yaw, f_pitch, f_pos = cam
     yaw_rad = radians(yaw_deg)
 
-    if cam_mode == CAM_CHASE:
-        theta = radians(chase_orbit_angle)
+    if mode == CAM_CHASE:
+        theta = radians(orbit_angle)
         fwd_x = cos(yaw_rad + radians(180))
         fwd_z = sin(yaw_rad + radians(180))
         
-        base_x = tx - fwd_x * chase_dist
-        base_z = tz - fwd_z * chase_dist
+        base_x = tx - fwd_x * dist
+        base_z = tz - fwd_z * dist
         
         dx = base_x - tx
         dz = base_z - tz
         rot_x = dx * cos(theta) - dz * sin(theta)
         rot_z = dx * sin(theta) + dz * cos(theta)
         
-        gluLookAt(tx + rot_x, 10.0, tz + rot_z,
-                  tx, 5.0, tz,
-                  0.0, 1.0, 0.0)
+        return (tx + rot_x, 10.0, tz + rot_z), (tx, 5.0, tz)
 
-    elif cam_mode == CAM_COCKPIT:
+    elif mode == CAM_COCKPIT:
         fwd_x = cos(yaw_rad)
         fwd_z = sin(yaw_rad)
-        right_x = cos(yaw_rad + radians(90))
-        right_z = sin(yaw_rad + radians(90))
 
         seat_x = tx + fwd_x * 2.0
         seat_z = tz + fwd_z * 2.0
         seat_y = 6.0
 
-        look_yaw = yaw_rad + radians(180) + radians(cockpit_yaw_offset)
-        look_pitch = radians(cockpit_pitch)
+        look_yaw = yaw_rad + radians(180) + radians(yaw_offset)
+        look_pitch = radians(pitch)
         
         lx = cos(look_yaw) * cos(look_pitch)
         ly = sin(look_pitch)
         lz = sin(look_yaw) * cos(look_pitch)
 
-        gluLookAt(seat_x, seat_y, seat_z,
-                  seat_x + lx, seat_y + ly, seat_z + lz,
-                  0.0, 1.0, 0.0)
+        return (seat_x, seat_y, seat_z), (seat_x + lx, seat_y + ly, seat_z + lz)
 
     else: # CAM_FREE
-        yaw_rad = radians(free_yaw)
-        pitch_rad = radians(free_pitch)
+        yaw_rad = radians(f_yaw)
+        pitch_rad = radians(f_pitch)
         fx = cos(pitch_rad) * sin(yaw_rad)
         fy = sin(pitch_rad)
         fz = cos(pitch_rad) * cos(yaw_rad)
-        ex, ey, ez = free_pos
-        gluLookAt(ex, ey, ez, ex + fx, ey + fy, ez + fz, 0.0, 1.0, 0.0)
+        ex, ey, ez = f_pos
+        return (ex, ey, ez), (ex + fx, ey + fy, ez + fz)
+
+
+def apply_camera(packet=None):
+    """View da câmara; com um frame_pipeline.FramePacket a matriz já vem calculada."""
+    glMatrixMode(GL_MODELVIEW)
+
+    if packet is not None:
+        glLoadMatrixf(packet.view_gl)
+        view = packet.view
+    else:
+        glLoadIdentity()
+        tx, tz = tractor.get_position()
+        eye, target = camera_look(camera_state(), tx, tz, tractor.get_direction_deg())
+        gluLookAt(*eye, *target, 0.0, 1.0, 0.0)
+        view = transforms.from_gl(glGetDoublev(GL_MODELVIEW_MATRIX))
+
+    # Guardar a view para o picking e a posição do olho para o culling
+    picking.set_view(view)
+    occlusion.set_eye(np.linalg.inv(view)[:3, 3])
 
 
 # ---------------------------------------------------------
@@ -184,6 +250,15 @@ def _lock_cursor():
 def _unlock_cursor():
     glutSetCursor(GLUT_CURSOR_LEFT_ARROW)
 
+def _request_redisplay():
+    if not headless:
+        glutPostRedisplay()
+
+def _camera_changed(before, after):
+    flat_before = before[:-1] + before[-1]
+    flat_after = after[:-1] + after[-1]
+    return any(abs(a - b) > CAMERA_EPS for a, b in zip(flat_before, flat_after))
+
 def set_ground_textures(g_id, p_id):
     global _ground_tex_id, _path_tex_id
     _ground_tex_id = g_id
@@ -271,7 +346,7 @@ def draw_overlay():
         glColor4f(0.0, 0.0, 0.0, 0.0) # Nota: No original estava alpha 0.0? Mantido conforme input.
         padding = 20
         box_w = 300
-        box_h = 420
+        box_h = 695
         x1, y1 = padding, screen_height - box_h - padding
         x2, y2 = padding + box_w, screen_height - padding
         
@@ -304,6 +379,17 @@ def draw_overlay():
             "INTERACAO:",
             "[ O ] Portão Garagem",
             "[ G ] Luz Garagem",
+            "[ Clique ] Selecionar Objeto",
+            "[ C ] Occlusion Culling",
+            "[ V ] Animacao na GPU",
+            "[ X ] Resolucao Dinamica",
+            "[ T ] Transparencia OIT",
+            "[ P ] Poeira / Fumo",
+            "[ B ] Vegetacao",
+            "[ K ] Screenshot",
+            "[ M ] Gravar Video",
+            "[ N ] Pipeline de Frames",
+            "[ Z ] Render a Pedido",
         ]
 
         for i, line in enumerate(lines):
@@ -314,6 +400,22 @@ def draw_overlay():
         glColor3f(1.0, 1.0, 1.0)
         _draw_text_bitmap(20, screen_height - 30, "[ H ] Comandos")
 
+    if selected is not None:
+        glColor3f(1.0, 1.0, 0.6)
+        _draw_text_bitmap(20, 20, f"Selecionado: {selected.target} / {selected.part}")
+
+    # Estatísticas de culling
+    glColor3f(0.8, 1.0, 0.8)
+    occ = occlusion.stats
+    _draw_text_bitmap(20, 45, f"Oclusao: {occ['drawn']} desenhados / {occ['culled']} ocultos"
+                              + ("" if occlusion.enabled else " (OFF)"))
+
+    # Resolução dinâmica (escala e erro do frame time)
+    _draw_text_bitmap(20, 70, dynres.hud_text())
+
+    # Pipeline de frames (tempo de preparação e latência extra)
+    _draw_text_bitmap(20, 95, frame_pipeline.hud_text())
+
     # Restaurar estado 3D
     glMatrixMode(GL_PROJECTION)
     glPopMatrix()
@@ -324,33 +426,65 @@ def draw_overlay():
 
 def display():
     lighting.update()
+    dynres.begin_scene()    # resolução dinâmica: render 3D num FBO reduzido
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glDisable(GL_CULL_FACE)
+    dynbuf.begin_frame()    # região do ring buffer dinâmico deste frame
 
-    apply_camera()
+    # Pipeline ligado: view, matrizes e ordem já preparadas noutra thread
+    packet = frame_pipeline.acquire()
+    apply_camera(packet)
 
     lighting.draw_indicators()
     draw_ground()
-    farm.draw()
-    garage.draw()
-    tractor.draw()
+    vegetation.draw(*(packet.camera_xz if packet else _camera_xz()))
+    # Com pipeline tudo vem do snapshot do pacote (o mesmo passo que a câmara)
+    garage.draw(packet.garage if packet else None)      # oclusor: antes da quinta
+    farm.draw(packet.farm if packet else None)
+    if fleet.active():
+        fleet.draw(packet.fleet if packet else None)    # inclui o jogador (elemento 0)
+    elif tractor_gpu.available():
+        tractor_gpu.draw(packet.pose if packet else None)
+    elif packet and packet.tractor:
+        tractor.draw_prepared(*packet.tractor)
+    else:
+        tractor.draw()
+    # Poeira e fumo: com o OIT entram no passe dele, com os vidros (sem ordem:
+    # pesados pela profundidade); sem OIT, blending direto por cima dos opacos
+    particles.draw(packet.particles if packet else None)
 
+    oit.resolve()           # transparentes submetidos neste frame (vidros, partículas, ...)
+    dynres.end_scene()      # ampliar para a janela; o HUD fica à resolução nativa
     draw_overlay()
+    dynbuf.end_frame()      # fence: a região só é reescrita quando a GPU acabar
 
+    capture.frame_done(screen_width, screen_height)     # antes do swap: lê o back buffer
     glutSwapBuffers()
+    frame_pipeline.frame_done()
+    startup.frame_done()
+    telemetry.frame_done()
 
 
-def reshape(w, h):
+def set_window_size(w, h):
+    """Só o estado (HUD e centro do rato), sem GL."""
     global screen_width, screen_height, center_x, center_y
     if h == 0: h = 1
     screen_width, screen_height = w, h
     center_x, center_y = w // 2, h // 2
+
+
+def reshape(w, h):
+    wake()
+    if h == 0: h = 1
+    set_window_size(w, h)
+    dynres.resize(w, h)
     
     glViewport(0, 0, w, h)
     
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
     gluPerspective(60.0, float(w)/h, 0.1, 500.0)
+    picking.set_projection(transforms.from_gl(glGetDoublev(GL_PROJECTION_MATRIX)), (0, 0, w, h))
     glMatrixMode(GL_MODELVIEW)
 
 
@@ -382,6 +516,26 @@ def keyboard(key, x, y):
         else: tractor.rotate_right_door(-90)
     elif key == 'o':
         garage.toggle_door()
+    elif key == 'c':
+        occlusion.toggle()
+    elif key == 'v':
+        tractor_gpu.toggle()
+    elif key == 'x':
+        dynres.toggle()
+    elif key == 't':
+        oit.toggle()
+    elif key == 'p':
+        particles.toggle()
+    elif key == 'b':
+        vegetation.toggle()
+    elif key == 'k':
+        capture.screenshot()
+    elif key == 'm':
+        capture.toggle_recording()
+    elif key == 'n':
+        frame_pipeline.toggle()
+    elif key == 'z':
+        toggle_on_demand()
 
     # Luzes e UI
     elif key == 'f':
@@ -399,16 +553,19 @@ def keyboard(key, x, y):
     if cam_mode != CAM_COCKPIT and key in key_down:
         key_down[key] = True
     
-    glutPostRedisplay()
+    wake()
+    _request_redisplay()
 
 
 def keyboard_up(key, x, y):
+    wake()
     if isinstance(key, bytes): key = key.decode("utf-8")
     key = key.lower()
     if key in key_down: key_down[key] = False
 
 
 def special_keys(key, x, y):
+    wake()
     if key == GLUT_KEY_UP:      arrow_down['up'] = True
     elif key == GLUT_KEY_DOWN:  arrow_down['down'] = True
     elif key == GLUT_KEY_LEFT:  arrow_down['left'] = True
@@ -416,23 +573,54 @@ def special_keys(key, x, y):
 
 
 def special_keys_up(key, x, y):
+    wake()
     if key == GLUT_KEY_UP:      arrow_down['up'] = False
     elif key == GLUT_KEY_DOWN:  arrow_down['down'] = False
     elif key == GLUT_KEY_LEFT:  arrow_down['left'] = False
     elif key == GLUT_KEY_RIGHT: arrow_down['right'] = False
 
 
+def mouse_button(button, state, x, y):
+    global selected
+    wake()
+    if button != GLUT_LEFT_BUTTON or state != GLUT_DOWN: return
+
+    # Com o cursor preso (câmara livre/cockpit) o alvo é o centro do ecrã
+    selected = picking.pick(x, y)
+    if selected is None:
+        print(f"[PICK] Nothing ({picking.last_pick_ms:.3f} ms)")
+    else:
+        print(f"[PICK] {selected.target} / {selected.part} tri {selected.triangle} "
+              f"dist {selected.distance:.2f} ({picking.last_pick_ms:.3f} ms)")
+    _request_redisplay()
+
+
 def mouse_motion(x, y):
+    """
+    Só regista a posição (o rato é relativo ao centro, onde o cursor é
+    reposto). O evento sintético do warp chega com a posição do centro
+    e não soma nada.
+    """
+    global _mouse_x, _mouse_y, _mouse_pending, motion_events
+    _mouse_x = x
+    _mouse_y = y
+    _mouse_pending = True
+    motion_events += 1
+    wake(changed=False)     # o passo é que vê se a câmara mexeu
+
+
+def _apply_mouse():
+    """Movimento acumulado desde o último passo: suavização, câmaras e um warp."""
     global free_yaw, free_pitch, cockpit_yaw_offset, cockpit_pitch
-    global _warping_mouse, mouse_dx_smooth, mouse_dy_smooth
+    global _mouse_pending, mouse_dx_smooth, mouse_dy_smooth, pointer_warps
 
-    if _warping_mouse:
-        _warping_mouse = False
-        return
+    pending, _mouse_pending = _mouse_pending, False
     if cam_mode not in (CAM_FREE, CAM_COCKPIT): return
 
-    dx = x - center_x
-    dy = y - center_y
+    dx = dy = 0
+    if pending:
+        dx = _mouse_x - center_x
+        dy = _mouse_y - center_y
     alpha = MOUSE_SMOOTH
     mouse_dx_smooth = mouse_dx_smooth * (1-alpha) + dx * alpha
     mouse_dy_smooth = mouse_dy_smooth * (1-alpha) + dy * alpha
@@ -449,18 +637,18 @@ def mouse_motion(x, y):
         cockpit_pitch -= mouse_dy_smooth * sens
         cockpit_pitch = max(-45, min(45, cockpit_pitch))
 
-    _warping_mouse = True
-    glutWarpPointer(center_x, center_y)
-    glutPostRedisplay()
+    if dx or dy:
+        pointer_warps += 1
+        if not headless:
+            glutWarpPointer(center_x, center_y)
 
 
-def idle():
-    global _last_time, _fps_accum, _fps_frames, chase_dist, chase_orbit_angle
-    
-    now = time.time()
-    dt = now - _last_time
-    _last_time = now
-    if dt > 0.1: dt = 0.1
+def step(dt):
+    """Um passo de simulação (câmaras, físicas, streaming); True se a cena mudou."""
+    global chase_dist, chase_orbit_angle
+
+    camera_before = camera_state()
+    _apply_mouse()
 
     if cam_mode == CAM_FREE:
         _update_free_cam(dt)
@@ -471,16 +659,102 @@ def idle():
         if key_down['d']: chase_orbit_angle -= 60.0 * dt
 
     # Atualizar físicas
-    tractor.update(arrow_down['up'], arrow_down['down'],
-                   arrow_down['left'], arrow_down['right'], dt)
-    garage.update(dt)
+    changed = tractor.update(arrow_down['up'], arrow_down['down'],
+                             arrow_down['left'], arrow_down['right'], dt)
+    changed |= garage.update(dt)
+    fleet.update(dt)
+    particles.update(dt)
+
+    # Streaming de modelos à volta da câmara e do trator
+    scene_loader.update([_camera_xz(), tractor.get_position()])
+
+    return changed or fleet.active() or _camera_changed(camera_before, camera_state())
+
+
+def idle():
+    global _last_time, _fps_accum, _fps_frames, _last_change
+    
+    now = time.time()
+    dt = now - _last_time
+    _last_time = now
+    if dt > 0.1: dt = 0.1
+
+    # Gravação/reprodução: regista o dt, ou injeta os eventos gravados e usa o dt gravado
+    dt = replay.frame(dt)
+    changed = step(dt)
+
+    # Assets alterados no disco (lidos em segundo plano, trocados aqui)
+    changed |= hot_reload.poll()
+
+    # --fast-start: trabalho adiado para depois do primeiro frame
+    startup.run_deferred()
+
+    # Estado final deste passo -> preparação do próximo frame (se ligada)
+    frame_pipeline.submit()
 
-    # Contador FPS
-    _fps_accum += dt
-    _fps_frames += 1
+    # Contador FPS (os passos do heartbeat, a dormir, não são frames)
+    if not _sleeping:
+        _fps_accum += dt
+        _fps_frames += 1
     if _fps_accum >= 1.0:
         print(f"[FPS] {_fps_frames / _fps_accum:.1f}")
         _fps_accum = 0.0
         _fps_frames = 0
 
-    glutPostRedisplay()
\ No newline at end of file
+    # Render a pedido: só desenhar enquanto algo muda (e SETTLE_SECONDS depois)
+    if not on_demand or changed or replay.active() or capture.recording():
+        _last_change = now
+    if now - _last_change < SETTLE_SECONDS:
+        if _sleeping:
+            wake()
+        _request_redisplay()
+    elif not _sleeping:
+        _sleep()
+
+
+# ---------------------------------------------------------
+# RENDER A PEDIDO
+# ---------------------------------------------------------
+
+def toggle_on_demand():
+    global on_demand
+    on_demand = not on_demand
+    print(f"[RENDER] On-demand rendering: {'ON' if on_demand else 'OFF'}")
+
+
+def _sleep():
+    """Sem idle registado o GLUT bloqueia à espera de eventos; um timer lento fica de guarda."""
+    global _sleeping, _sleep_id
+    if headless:
+        return
+    _sleeping = True
+    _sleep_id += 1
+    glutIdleFunc(None)
+    glutTimerFunc(WAKE_INTERVAL_MS, _heartbeat, _sleep_id)
+
+
+def _heartbeat(sleep_id):
+    """A dormir: um passo (dt ~ 0) para o hot-reload e o que tiver mudado fora do input."""
+    global _last_time
+    if not _sleeping or sleep_id != _sleep_id:
+        return
+    _last_time = time.time()
+    idle()
+    if _sleeping:
+        glutTimerFunc(WAKE_INTERVAL_MS, _heartbeat, _sleep_id)
+
+
+def wake(changed=True):
+    """
+    Input (ou outra alteração): volta a chamar idle(). Com changed a cena
+    é redesenhada durante SETTLE_SECONDS; sem ele só o passo decide.
+    """
+    global _last_change, _sleeping, _last_time
+    if changed:
+        _last_change = time.time()
+    if not _sleeping:
+        return
+    _sleeping = False
+    _last_time = time.time()        # o tempo a dormir não entra no dt
+    dynres.skip_interval()
+    glutIdleFunc(idle)
\ No newline at end of file
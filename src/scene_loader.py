@@ -0,0 +1,372 @@
+# scene_loader.py
+# ------------------------------------------------------------
+#  CENA DECLARATIVA (JSON/TOML) + STREAMING DE MODELOS POR REGIÃO
+# ------------------------------------------------------------
+#  O ficheiro de cena lista modelos, instâncias (pos/yaw/scale) e
+#  as texturas do chão. Modelos "resident" (trator, garagem) são
+#  carregados no arranque; os restantes só quando a câmara ou o
+#  trator se aproximam a menos de "radius" de uma instância, e são
+#  descarregados por LRU quando os orçamentos de CPU/GPU enchem.
+# ------------------------------------------------------------
+import json
+import os
+import time
+from collections import OrderedDict
+
+import farm
+import garage
+import gltf_loader
+import lightmap
+import mesh_opt
+import startup
+import telemetry
+import tractor
+from obj_loader import (load_obj_multipart, load_obj_streaming, free_materials,
+                        mtllib_paths, texture_bytes, CompactMesh)
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO (valores por omissão; o ficheiro pode sobrepor)
+# ---------------------------------------------------------
+STREAM_RADIUS = 200.0
+CPU_BUDGET_MB = 256
+GPU_BUDGET_MB = 256
+MAX_LOADS_PER_FRAME = 1
+load_textures = True            # False nos benchmarks sem janela (stress_scene.py)
+
+# Estimativas para ObjMesh (listas de tuplos Python)
+_CPU_BYTES_PER_VERTEX = 144     # tuplo de 3 floats + ponteiro na lista
+_CPU_BYTES_PER_FACE = 480       # lista de 3 tuplos (vi, ti, ni)
+_GPU_BYTES_PER_CORNER = 32      # posição + normal + uv (float32) na display list
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+_base_dir = "."
+_settings = {}
+_ground = (None, None)
+
+_models = {}                    # id -> _Model
+_loaded = OrderedDict()         # id -> _Model, do menos para o mais recente (LRU)
+
+_budget_warned = False
+
+
+class _Model:
+    def __init__(self, model_id, spec):
+        self.id = model_id
+        self.path = spec["path"]
+        self.resident = bool(spec.get("resident", False))
+        self.loader = spec.get("loader", "multipart")
+        self.optimize = bool(spec.get("optimize", True))    # mesh_opt (só multipart)
+        self.lightmap = bool(spec.get("lightmap", True))    # lightmaps pré-calculados
+        self.instances = []     # specs das instâncias
+        self.handles = []       # objetos devolvidos por farm.add_object
+
+        self.meshes = None
+        self.materials = None
+        self.failed = False
+        self.cpu_bytes = 0
+        self.gpu_bytes = 0
+        self.cpu_pending = False    # cpu_bytes ainda conta cópias libertadas no upload
+        self.mtl_paths = None       # .mtl referidos pelo OBJ (lidos no primeiro pedido)
+
+
+# ---------------------------------------------------------
+# LEITURA DO FICHEIRO
+# ---------------------------------------------------------
+
+def _read_scene_file(path):
+    if path.endswith(".toml"):
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_scene(path, focus_points=(), preload=True):
+    """
+    Lê a cena, carrega os modelos residentes e o que estiver dentro do
+    raio de streaming à volta de focus_points (ponto de spawn). Com
+    preload=False só os residentes: o resto chega pelo update() normal.
+    Uma cena já carregada é descarregada primeiro (unload_scene).
+    """
+    global _base_dir, _settings, _ground
+
+    data = _read_scene_file(path)
+    unload_scene()
+    _base_dir = os.path.dirname(os.path.abspath(path))
+
+    stream = data.get("streaming", {})
+    _settings = {
+        "radius": float(stream.get("radius", STREAM_RADIUS)),
+        "cpu_budget": int(stream.get("cpu_budget_mb", CPU_BUDGET_MB)) << 20,
+        "gpu_budget": int(stream.get("gpu_budget_mb", GPU_BUDGET_MB)) << 20,
+        "max_loads": int(stream.get("max_loads_per_frame", MAX_LOADS_PER_FRAME)),
+    }
+
+    ground = data.get("ground", {})
+    _ground = (_asset_path(ground.get("grass")), _asset_path(ground.get("path")))
+
+    for model_id, spec in data.get("models", {}).items():
+        _models[model_id] = _Model(model_id, spec)
+
+    for inst in data.get("instances", []):
+        model = _models.get(inst["model"])
+        if model is None:
+            print(f"[WARN] Scene instance of unknown model '{inst['model']}'")
+            continue
+        model.instances.append(inst)
+
+    for model in _models.values():
+        if model.resident:
+            _load_model(model)
+
+    # Arranque: tudo o que está perto do spawn, sem limite por frame
+    if preload:
+        update(focus_points, max_loads=len(_models))
+
+
+def unload_scene():
+    """Descarrega todos os modelos (objetos GL incluídos) e esquece a cena."""
+    global _budget_warned
+    for model in list(_loaded.values()):
+        _unload_model(model)
+    _models.clear()
+    _loaded.clear()
+    _budget_warned = False
+
+
+def _asset_path(rel):
+    return os.path.join(_base_dir, rel) if rel else None
+
+
+def ground_textures():
+    """Caminhos (relva, caminho) definidos na cena."""
+    return _ground
+
+
+# ---------------------------------------------------------
+# CARREGAR / DESCARREGAR
+# ---------------------------------------------------------
+
+def _estimate_bytes(meshes, materials):
+    cpu = gpu = 0
+    pools = set()
+    for mesh in meshes.values():
+        if isinstance(mesh, CompactMesh):
+            cpu += mesh.nbytes
+            tris = mesh.triangle_count
+        else:
+            tris = sum(len(f) for f in mesh.faces_by_material.values())
+            cpu += tris * _CPU_BYTES_PER_FACE
+            if id(mesh.vertices) not in pools:
+                pools.add(id(mesh.vertices))
+                cpu += (len(mesh.vertices) + len(mesh.texcoords) + len(mesh.normals)) * _CPU_BYTES_PER_VERTEX
+        gpu += tris * 3 * _GPU_BYTES_PER_CORNER
+
+    for m in materials.values():
+        gpu += texture_bytes.get(m.texture_id, 0)
+    return cpu, gpu
+
+
+def _awaiting_release(meshes):
+    """Há malhas (mesh_opt) que ainda vão libertar a cópia de CPU no upload?"""
+    return any(getattr(mesh, "reload", None) is not None and mesh.positions is not None
+               for mesh in meshes.values())
+
+
+def _load_model(model):
+    path = _asset_path(model.path)
+    t0 = time.perf_counter()
+    try:
+        if path.lower().endswith(".glb"):
+            meshes, mats = gltf_loader.load_glb(path, load_textures)
+        elif model.loader == "stream":
+            meshes, mats = load_obj_streaming(path, load_textures=load_textures)
+        elif model.optimize:
+            meshes, mats = mesh_opt.load_obj_optimized(path, load_textures)
+        else:
+            meshes, mats = load_obj_multipart(path, load_textures)
+    except Exception as e:
+        print(f"[WARN] {model.id} failed: {e}")
+        model.failed = True
+        return
+
+    model.meshes, model.materials = meshes, mats
+    model.cpu_bytes, model.gpu_bytes = _estimate_bytes(meshes, mats)
+    model.cpu_pending = _awaiting_release(meshes)
+
+    for inst in model.instances:
+        role = inst.get("role")
+        if role == "tractor":
+            tractor.set_meshes(meshes, mats)
+        elif role == "garage":
+            garage.set_meshes(meshes, mats)
+            if model.lightmap:
+                garage.set_lightmap(lightmap.load(path, meshes, garage.model_matrix(),
+                                                  (garage.GARAGE_DOOR_MESH_NAME,)))
+        else:
+            handle = farm.add_object(
+                meshes, mats,
+                pos=tuple(inst.get("pos", (0.0, 0.0, 0.0))),
+                yaw=float(inst.get("yaw", 0.0)),
+                scale=float(inst.get("scale", 1.0)),
+                name=inst.get("name", model.id),
+                occluder=bool(inst.get("occluder", False)))
+            if model.lightmap:
+                farm.set_lightmap(handle, lightmap.load(path, meshes, handle["matrix"]))
+            model.handles.append(handle)
+
+    _loaded[model.id] = model
+    load_ms = (time.perf_counter() - t0) * 1000
+    telemetry.asset_loaded(model.id, load_ms)
+    startup.log(f"[STREAM] Loaded {model.id} in {load_ms:.0f} ms "
+          f"(~{model.cpu_bytes >> 20} MB CPU, ~{model.gpu_bytes >> 20} MB GPU)")
+
+
+def _unload_model(model):
+    for handle in model.handles:
+        farm.set_lightmap(handle, None)
+        farm.remove_object(handle)
+    model.handles = []
+
+    for mesh in model.meshes.values():
+        mesh.free_gl()
+    free_materials(model.materials)
+
+    model.meshes = model.materials = None
+    model.mtl_paths = None
+    model.cpu_bytes = model.gpu_bytes = 0
+    _loaded.pop(model.id, None)
+    print(f"[STREAM] Evicted {model.id}")
+
+
+def _mtl_paths(model):
+    """.mtl de que o modelo depende (os mtllib do OBJ, normalizados)."""
+    if model.mtl_paths is None:
+        obj_path = _asset_path(model.path)
+        try:
+            paths = mtllib_paths(obj_path) if obj_path.lower().endswith(".obj") else []
+        except OSError:
+            paths = []
+        model.mtl_paths = {os.path.normcase(os.path.abspath(p)) for p in paths}
+    return model.mtl_paths
+
+
+def loaded_models_using(path):
+    """Modelos carregados que dependem do ficheiro (o OBJ, ou um .mtl que o OBJ refere)."""
+    path = os.path.normcase(os.path.abspath(path))
+    is_mtl = os.path.splitext(path)[1].lower() == ".mtl"
+    found = []
+    for model in _loaded.values():
+        obj_path = os.path.normcase(os.path.abspath(_asset_path(model.path)))
+        if path == obj_path or (is_mtl and path in _mtl_paths(model)):
+            found.append(model)
+    return found
+
+
+def model_path(model):
+    return _asset_path(model.path)
+
+
+def replace_model(model, meshes, materials):
+    """
+    Troca a geometria/materiais de um modelo carregado (já enviados para a
+    GPU) e só depois apaga os objetos GL antigos.
+    """
+    if model.id not in _loaded:
+        return False
+    old_meshes, old_materials = model.meshes, model.materials
+
+    model.meshes, model.materials = meshes, materials
+    model.cpu_bytes, model.gpu_bytes = _estimate_bytes(meshes, materials)
+    model.cpu_pending = _awaiting_release(meshes)
+    model.mtl_paths = None          # o OBJ novo pode referir outros .mtl
+    for inst in model.instances:
+        if inst.get("role") == "tractor":
+            tractor.set_meshes(meshes, materials)
+        elif inst.get("role") == "garage":
+            garage.set_meshes(meshes, materials)
+    for handle in model.handles:
+        farm.replace_meshes(handle, meshes, materials)
+
+    for mesh in old_meshes.values():
+        mesh.free_gl()
+    free_materials(old_materials)
+    return True
+
+
+# ---------------------------------------------------------
+# STREAMING (chamado a cada frame)
+# ---------------------------------------------------------
+
+def _in_range(model, points, radius2):
+    for inst in model.instances:
+        px, _, pz = inst.get("pos", (0.0, 0.0, 0.0))
+        for x, z in points:
+            dx = px - x
+            dz = pz - z
+            if dx * dx + dz * dz <= radius2:
+                return True
+    return False
+
+
+def update(focus_points, max_loads=None):
+    """
+    focus_points: [(x, z), ...] (câmara, trator). Carrega até max_loads
+    modelos que entraram no raio e aplica os orçamentos por LRU.
+    """
+    global _budget_warned
+    if not _settings:
+        return
+
+    radius2 = _settings["radius"] ** 2
+    loads = _settings["max_loads"] if max_loads is None else max_loads
+
+    wanted = set()
+    for model in _models.values():
+        if model.resident or model.failed or not model.instances:
+            continue
+        if not _in_range(model, focus_points, radius2):
+            continue
+        wanted.add(model.id)
+
+        if model.id in _loaded:
+            _loaded.move_to_end(model.id)
+        elif loads > 0:
+            _load_model(model)
+            loads -= 1
+
+    # Depois do upload (primeiro draw) só conta o que ficou em memória
+    for model in _loaded.values():
+        if model.cpu_pending and not _awaiting_release(model.meshes):
+            model.cpu_bytes = _estimate_bytes(model.meshes, model.materials)[0]
+            model.cpu_pending = False
+
+    # Orçamentos: despejar os menos usados que estejam fora do raio
+    cpu = sum(m.cpu_bytes for m in _loaded.values())
+    gpu = sum(m.gpu_bytes for m in _loaded.values())
+    for model in list(_loaded.values()):
+        if cpu <= _settings["cpu_budget"] and gpu <= _settings["gpu_budget"]:
+            break
+        if model.resident or model.id in wanted:
+            continue
+        cpu -= model.cpu_bytes
+        gpu -= model.gpu_bytes
+        _unload_model(model)
+
+    over = cpu > _settings["cpu_budget"] or gpu > _settings["gpu_budget"]
+    if over and not _budget_warned:
+        print(f"[WARN] Streaming budget exceeded by visible models "
+              f"({cpu >> 20} MB CPU, {gpu >> 20} MB GPU)")
+    _budget_warned = over
+
+
+def stats():
+    """(modelos carregados, total de modelos, MB CPU, MB GPU)."""
+    cpu = sum(m.cpu_bytes for m in _loaded.values())
+    gpu = sum(m.gpu_bytes for m in _loaded.values())
+    return len(_loaded), len(_models), cpu / (1 << 20), gpu / (1 << 20)
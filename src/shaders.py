@@ -0,0 +1,171 @@
+# shaders.py
+# ------------------------------------------------------------
+#  SHADERS GLSL (compilação + iluminação equivalente ao fixed-function)
+# ------------------------------------------------------------
+#  Os shaders usam GLSL 1.20 (perfil de compatibilidade): leem
+#  gl_LightSource / gl_FrontMaterial / gl_Fog, por isso lighting.py
+#  continua a ser a única fonte do estado das luzes e do nevoeiro.
+# ------------------------------------------------------------
+from OpenGL.GL import *
+
+
+# ---------------------------------------------------------
+# GLSL PARTILHADO
+# ---------------------------------------------------------
+
+# Luzes 0 (sol, direcional) e 1 (garagem, spot) + nevoeiro GL_EXP2,
+# com a cor do material vinda de gl_Color (GL_COLOR_MATERIAL).
+FF_LIGHTING_GLSL = """
+vec3 ff_light(int i, vec3 n, vec3 p, vec3 base)
+{
+    gl_LightSourceParameters light = gl_LightSource[i];
+    vec3 L;
+    float att = 1.0;
+
+    if (light.position.w == 0.0) {
+        L = normalize(light.position.xyz);
+    } else {
+        vec3 d = light.position.xyz - p;
+        float dist = length(d);
+        L = d / dist;
+        att = 1.0 / (light.constantAttenuation
+                     + light.linearAttenuation * dist
+                     + light.quadraticAttenuation * dist * dist);
+        if (light.spotCutoff <= 90.0) {
+            float sd = dot(-L, normalize(light.spotDirection));
+            att *= (sd < light.spotCosCutoff) ? 0.0 : pow(max(sd, 0.0), light.spotExponent);
+        }
+    }
+
+    float ndl = max(dot(n, L), 0.0);
+    vec3 color = light.ambient.rgb * base + light.diffuse.rgb * base * ndl;
+    if (ndl > 0.0) {
+        vec3 h = normalize(L + vec3(0.0, 0.0, 1.0));
+        float spec = pow(max(dot(n, h), 0.0), gl_FrontMaterial.shininess);
+        color += spec * gl_FrontMaterial.specular.rgb * light.specular.rgb;
+    }
+    return color * att;
+}
+
+vec4 ff_shade(vec3 n, vec3 p, vec4 base)
+{
+    vec3 color = gl_LightModel.ambient.rgb * base.rgb;
+    color += ff_light(0, n, p, base.rgb);
+    color += ff_light(1, n, p, base.rgb);
+    return vec4(color, base.a);
+}
+
+vec4 ff_fog(vec4 color, vec3 p)
+{
+    float z = gl_Fog.density * abs(p.z);
+    float f = clamp(exp(-z * z), 0.0, 1.0);
+    return vec4(mix(gl_Fog.color.rgb, color.rgb, f), color.a);
+}
+"""
+
+# Posição de gl_Vertex reconstruída com os parâmetros de GpuMesh.bind(uniforms)
+# (identidade para malhas em float, int16 * escala + centro quando quantizadas)
+DEQUANT_GLSL = """
+uniform vec3 pos_offset;
+uniform vec3 pos_scale;
+
+vec4 dq_vertex()
+{
+    return vec4(pos_offset + pos_scale * gl_Vertex.xyz, 1.0);
+}
+"""
+
+# Vertex shader comum: matrizes e atributos do pipeline fixo
+LIT_VERTEX_SRC = """
+#version 120
+varying vec3 v_normal;
+varying vec3 v_pos;
+varying vec2 v_uv;
+varying vec4 v_color;
+""" + DEQUANT_GLSL + """
+void main()
+{
+    vec4 eye = gl_ModelViewMatrix * dq_vertex();
+    v_pos = eye.xyz;
+    v_normal = gl_NormalMatrix * gl_Normal;
+    v_uv = gl_MultiTexCoord0.xy;
+    v_color = gl_Color;
+    gl_Position = gl_ProjectionMatrix * eye;
+}
+"""
+
+# Fragment shader comum: textura (GL_MODULATE) + luz + nevoeiro + alpha test
+LIT_FRAGMENT_SRC = """
+#version 120
+uniform sampler2D tex;
+uniform bool use_tex;
+
+varying vec3 v_normal;
+varying vec3 v_pos;
+varying vec2 v_uv;
+varying vec4 v_color;
+""" + FF_LIGHTING_GLSL + """
+void main()
+{
+    vec4 base = v_color;
+    if (use_tex)
+        base *= texture2D(tex, v_uv);
+    if (base.a <= 0.1)
+        discard;
+    gl_FragColor = ff_fog(ff_shade(normalize(v_normal), v_pos, base), v_pos);
+}
+"""
+
+
+# ---------------------------------------------------------
+# COMPILAÇÃO
+# ---------------------------------------------------------
+
+def _compile(kind, src):
+    shader = glCreateShader(kind)
+    glShaderSource(shader, src)
+    glCompileShader(shader)
+    if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+        log = glGetShaderInfoLog(shader)
+        glDeleteShader(shader)
+        raise RuntimeError(f"[GLSL] Compile error: {log}")
+    return shader
+
+
+def compile_program(vertex_src, fragment_src, attribs=None):
+    """
+    Compila e liga um programa. attribs: {nome: localização} para
+    atributos genéricos (ex.: matrizes por instância).
+    """
+    vs = _compile(GL_VERTEX_SHADER, vertex_src)
+    fs = _compile(GL_FRAGMENT_SHADER, fragment_src)
+
+    program = glCreateProgram()
+    glAttachShader(program, vs)
+    glAttachShader(program, fs)
+    for name, loc in (attribs or {}).items():
+        glBindAttribLocation(program, loc, name)
+    glLinkProgram(program)
+
+    glDeleteShader(vs)
+    glDeleteShader(fs)
+
+    if not glGetProgramiv(program, GL_LINK_STATUS):
+        log = glGetProgramInfoLog(program)
+        glDeleteProgram(program)
+        raise RuntimeError(f"[GLSL] Link error: {log}")
+    return program
+
+
+class Uniforms:
+    """Cache de localizações de uniforms de um programa."""
+
+    def __init__(self, program):
+        self.program = program
+        self._locs = {}
+
+    def __getitem__(self, name):
+        loc = self._locs.get(name)
+        if loc is None:
+            loc = self._locs[name] = glGetUniformLocation(self.program, name)
+        return loc
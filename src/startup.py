@@ -0,0 +1,163 @@
+# startup.py
+# ------------------------------------------------------------
+#  PERFIL DO ARRANQUE + MODO DE ARRANQUE RÁPIDO
+# ------------------------------------------------------------
+#  Importado antes de tudo em main.py. Até ao primeiro frame regista
+#  intervalos (imports, contexto GL, cada OBJ e cada textura) e no
+#  fim imprime a árvore de tempos e o time-to-first-frame.
+#
+#  python main.py --fast-start
+#    - PyOpenGL sem error checking nem error logging
+#    - logs dos loaders ([TEX], [MTL], [MESH], ...) desligados
+#    - só os modelos residentes antes do primeiro frame (o resto
+#      chega pelo streaming normal, MAX_LOADS_PER_FRAME de cada vez)
+#    - BVHs do picking e vigia do hot-reload adiados para depois do
+#      primeiro frame
+#  python main.py --startup-trace trace.json   guarda o perfil em JSON
+# ------------------------------------------------------------
+import builtins
+import json
+import sys
+import time
+
+T0 = time.perf_counter()
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+fast = False              # --fast-start
+quiet = False             # sem logs nos caminhos quentes
+MIN_REPORT_MS = 1.0       # intervalos mais curtos não aparecem no relatório
+MAX_IMPORT_DEPTH = 1      # imports aninhados mostrados até esta profundidade
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+_tracing = True
+_events = []              # [início ms, duração ms, profundidade, rótulo, é import]
+_depth = 0
+_deferred = []
+_trace_path = None
+first_frame_ms = None
+
+_original_import = builtins.__import__
+
+
+class span:
+    """with startup.span("rótulo"): ... -- só mede até ao primeiro frame."""
+
+    def __init__(self, label, is_import=False):
+        self.label = label
+        self.is_import = is_import
+        self.event = None
+
+    def __enter__(self):
+        global _depth
+        if _tracing:
+            self.event = [(time.perf_counter() - T0) * 1000.0, 0.0, _depth, self.label, self.is_import]
+            _events.append(self.event)
+            _depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        global _depth
+        if self.event is not None:
+            self.event[1] = (time.perf_counter() - T0) * 1000.0 - self.event[0]
+            _depth -= 1
+        return False
+
+
+def _traced_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    with span(f"import {name}", is_import=True):
+        return _original_import(name, globals, locals, fromlist, level)
+
+
+def log(message):
+    """print() para caminhos quentes (loaders); calado em --fast-start."""
+    if not quiet:
+        print(message)
+
+
+def configure(argv):
+    """Chamar antes de qualquer outro import do projeto."""
+    global fast, quiet, _trace_path
+    builtins.__import__ = _traced_import
+
+    fast = "--fast-start" in argv
+    if "--startup-trace" in argv:
+        i = argv.index("--startup-trace")
+        if i + 1 >= len(argv) or argv[i + 1].startswith("--"):
+            print("usage: python main.py --startup-trace trace.json   [--fast-start]")
+            sys.exit(2)
+        _trace_path = argv[i + 1]
+
+    if fast:
+        quiet = True
+        with span("configure PyOpenGL"):
+            import OpenGL
+            # Têm de ser definidos antes do primeiro import de OpenGL.GL
+            OpenGL.ERROR_CHECKING = False
+            OpenGL.ERROR_LOGGING = False
+
+
+# ---------------------------------------------------------
+# TRABALHO ADIADO
+# ---------------------------------------------------------
+
+def defer(fn):
+    """Em --fast-start corre fn depois do primeiro frame; senão já."""
+    if fast:
+        _deferred.append(fn)
+    else:
+        fn()
+
+
+def run_deferred():
+    """Chamado pelo idle: uma tarefa adiada por frame."""
+    if _deferred and first_frame_ms is not None:
+        fn = _deferred.pop(0)
+        t0 = time.perf_counter()
+        fn()
+        log(f"[START] Deferred {getattr(fn, '__qualname__', fn)}: "
+            f"{(time.perf_counter() - t0) * 1000.0:.0f} ms")
+
+
+# ---------------------------------------------------------
+# PRIMEIRO FRAME
+# ---------------------------------------------------------
+
+def frame_done():
+    """Chamado no fim de cada display(); só o primeiro conta."""
+    global _tracing, first_frame_ms
+    if first_frame_ms is not None:
+        return
+    first_frame_ms = (time.perf_counter() - T0) * 1000.0
+    _tracing = False
+    builtins.__import__ = _original_import
+    report()
+
+
+def _visible(event):
+    start, dur, depth, label, is_import = event
+    if dur < MIN_REPORT_MS:
+        return False
+    return not is_import or depth <= MAX_IMPORT_DEPTH
+
+
+def report():
+    print(f"[START] Startup profile ({'fast-start' if fast else 'normal'}):")
+    imports = sum(e[1] for e in _events if e[4] and e[2] == 0)
+    for start, dur, depth, label, is_import in filter(_visible, _events):
+        print(f"[START] {start:8.1f} ms  {dur:8.1f} ms  {'  ' * depth}{label}")
+    print(f"[START] top-level imports: {imports:.0f} ms")
+    print(f"[START] Time to first frame: {first_frame_ms:.0f} ms")
+
+    if _trace_path:
+        with open(_trace_path, "w", encoding="utf-8") as f:
+            json.dump({"mode": "fast" if fast else "normal",
+                       "first_frame_ms": first_frame_ms,
+                       "events": [{"start_ms": s, "duration_ms": d, "depth": dp,
+                                   "label": l, "import": imp}
+                                  for s, d, dp, l, imp in _events]}, f, indent=1)
@@ -0,0 +1,389 @@
+# stress_scene.py
+# ------------------------------------------------------------
+#  CENAS SINTÉTICAS DE STRESS + CURVA DE ESCALA
+# ------------------------------------------------------------
+#  A quinta real tem ~8 objetos: farm.draw, ObjMesh.draw, o streaming
+#  e os loaders nunca são postos à prova. generate() cria, a partir de
+#  uma seed e de um tamanho (nº de quintas numa grelha), um ficheiro
+#  de cena no formato de assets/scene.json:
+#    - por quinta: um campo lavrado, a vedação à volta (segmentos),
+#      uma manada de vacas e um bosque;
+#    - de vez em quando um barracão (garage.obj) ou uma casa (oclusores).
+#  O campo e a vedação são OBJs procedimentais escritos ao lado da cena;
+#  o resto reutiliza os modelos de assets/models/farm. Lightmaps
+#  desligados (o bake é por instância).
+#
+#  curve() carrega cada tamanho num processo limpo (como memreport.py)
+#  e mede tempo de carregamento, RSS e frame time ao longo de um
+#  percurso de câmara. Sem janela mede-se só o passo de CPU (step() com
+#  o streaming + frame_pipeline.build_packet: culling e ordenação), sem
+#  farm.draw nem ObjMesh.draw, e a tabela di-lo; o frame completo
+#  (scene.display() até ao glFinish) precisa de --gl, com janela.
+#  O resultado fica num JSON de baseline; uma execução seguinte com o
+#  mesmo ficheiro compara contra ele. Por omissão esse JSON é local
+#  (assets/stress/ não vai para o git): os tempos são desta máquina.
+#
+#  python stress_scene.py generate [--seed S] [--size N]
+#  python stress_scene.py curve [--sizes 1,4,16,64] [--frames N] [--gl]
+#                               [--baseline ficheiro] [--save]
+#  python main.py --scene ../assets/stress/stress-s1-n16.json
+# ------------------------------------------------------------
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import farm
+import frame_pipeline
+import scene_loader
+import telemetry
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+HERE = os.path.dirname(os.path.abspath(__file__))
+OUTPUT_DIR = os.path.normpath(os.path.join(HERE, "..", "assets", "stress"))
+BASELINE = os.path.join(OUTPUT_DIR, "baseline.json")     # local, fora do git
+
+SIZES = (1, 4, 16, 64)
+FRAMES = 240
+SEED = 1
+
+CELL = 140.0                    # lado de uma quinta na grelha
+FIELD = (70.0, 50.0)            # campo lavrado (x, z)
+FENCE_SEGMENT = 10.0            # comprimento de um OBJ de vedação
+HERD = (3, 9)                   # vacas por quinta [min, max)
+FOREST = (6, 16)                # árvores por quinta
+SHED_CHANCE = 0.25
+HOUSE_CHANCE = 0.15
+
+
+# ---------------------------------------------------------
+# OBJs PROCEDIMENTAIS
+# ---------------------------------------------------------
+
+def _box(out, lo, hi):
+    """Acrescenta a out (listas v, vt, vn, f) uma caixa com normais por face."""
+    v, vt, vn, f = out
+    (x0, y0, z0), (x1, y1, z1) = lo, hi
+    faces = (((x1, y0, z0), (x1, y1, z0), (x1, y1, z1), (x1, y0, z1), (1, 0, 0)),
+             ((x0, y0, z1), (x0, y1, z1), (x0, y1, z0), (x0, y0, z0), (-1, 0, 0)),
+             ((x0, y1, z0), (x0, y1, z1), (x1, y1, z1), (x1, y1, z0), (0, 1, 0)),
+             ((x0, y0, z1), (x0, y0, z0), (x1, y0, z0), (x1, y0, z1), (0, -1, 0)),
+             ((x1, y0, z1), (x1, y1, z1), (x0, y1, z1), (x0, y0, z1), (0, 0, 1)),
+             ((x0, y0, z0), (x0, y1, z0), (x1, y1, z0), (x1, y0, z0), (0, 0, -1)))
+    for *corners, normal in faces:
+        vn.append(normal)
+        base = len(v)
+        for k, c in enumerate(corners):
+            v.append(c)
+            vt.append(((k in (1, 2)) * 1.0, (k in (2, 3)) * 1.0))
+        f.append([(base + k + 1, base + k + 1, len(vn)) for k in range(4)])
+
+
+def _write_obj(path, groups, mtl, materials):
+    """groups: [(nome, material, (v, vt, vn, f))]; materials: {nome: textura}."""
+    with open(os.path.splitext(path)[0] + ".mtl", "w", encoding="utf-8") as m:
+        for name, texture in materials.items():
+            m.write(f"newmtl {name}\nKd 1 1 1\nmap_Kd {texture}\n\n")
+    offset = [0, 0, 0]
+    with open(path, "w", encoding="utf-8") as o:
+        o.write(f"# gerado por stress_scene.py\nmtllib {mtl}\n")
+        for name, material, (v, vt, vn, f) in groups:
+            o.write(f"o {name}\nusemtl {material}\n")
+            o.writelines(f"v {x:.3f} {y:.3f} {z:.3f}\n" for x, y, z in v)
+            o.writelines(f"vt {s:.3f} {t:.3f}\n" for s, t in vt)
+            o.writelines(f"vn {x} {y} {z}\n" for x, y, z in vn)
+            for face in f:
+                o.write("f " + " ".join(f"{a + offset[0]}/{b + offset[1]}/{c + offset[2]}"
+                                        for a, b, c in face) + "\n")
+            offset = [offset[0] + len(v), offset[1] + len(vt), offset[2] + len(vn)]
+
+
+def _write_fence(path, texture):
+    """Um segmento de vedação ao longo de +x: dois postes e duas travessas."""
+    posts, rails = ([], [], [], []), ([], [], [], [])
+    for x in (0.0, FENCE_SEGMENT - 0.3):
+        _box(posts, (x, 0.0, -0.15), (x + 0.3, 2.2, 0.15))
+    for y in (0.8, 1.7):
+        _box(rails, (0.0, y, -0.08), (FENCE_SEGMENT, y + 0.2, 0.08))
+    _write_obj(path, [("posts", "wood", posts), ("rails", "wood", rails)], "fence.mtl",
+               {"wood": texture})
+
+
+def _write_field(path, texture, ridges=24):
+    """Campo lavrado centrado na origem: regos (caixas baixas) ao longo de x."""
+    w, d = FIELD
+    soil = ([], [], [], [])
+    _box(soil, (-w / 2, -0.2, -d / 2), (w / 2, 0.0, d / 2))
+    rows = ([], [], [], [])
+    pitch = d / ridges
+    for i in range(ridges):
+        z = -d / 2 + (i + 0.5) * pitch
+        _box(rows, (-w / 2 + 1.0, 0.0, z - pitch * 0.25), (w / 2 - 1.0, 0.35, z + pitch * 0.25))
+    _write_obj(path, [("soil", "dirt", soil), ("ridges", "dirt", rows)], "field.mtl",
+               {"dirt": texture})
+
+
+# ---------------------------------------------------------
+# GERADOR
+# ---------------------------------------------------------
+
+def _fence_instances(cx, cz, rng):
+    """Segmentos à volta do campo (com um portão: falta um segmento)."""
+    w, d = FIELD[0] + 10.0, FIELD[1] + 10.0
+    out = []
+    for side, (x0, z0, dx, dz, length) in enumerate((
+            (cx - w / 2, cz - d / 2, 1, 0, w), (cx + w / 2, cz - d / 2, 0, 1, d),
+            (cx + w / 2, cz + d / 2, -1, 0, w), (cx - w / 2, cz + d / 2, 0, -1, d))):
+        count = int(length // FENCE_SEGMENT)
+        gate = int(rng.integers(count)) if side == 0 else -1
+        yaw = -math.degrees(math.atan2(dz, dx))     # +x do OBJ ao longo do lado
+        for k in range(count):
+            if k != gate:
+                out.append({"model": "fence", "yaw": yaw,
+                            "pos": [round(x0 + dx * k * FENCE_SEGMENT, 2), 0,
+                                    round(z0 + dz * k * FENCE_SEGMENT, 2)]})
+    return out
+
+
+def generate(seed=SEED, size=16, out_dir=OUTPUT_DIR):
+    """Escreve <out_dir>/stress-s<seed>-n<size>.json; devolve (caminho, nº de instâncias)."""
+    os.makedirs(out_dir, exist_ok=True)
+    assets = os.path.relpath(os.path.join(HERE, "..", "assets"), out_dir)
+    asset = lambda rel: os.path.join(assets, rel).replace(os.sep, "/")
+
+    fence_obj = os.path.join(out_dir, "fence.obj")
+    field_obj = os.path.join(out_dir, "field.obj")
+    if not os.path.isfile(fence_obj):
+        _write_fence(fence_obj, asset("models/farm/tree_bark.png"))
+    if not os.path.isfile(field_obj):
+        _write_field(field_obj, asset("textures/dirt.jpg"))
+    scene = {
+        "streaming": {"radius": 200.0, "cpu_budget_mb": 1024, "gpu_budget_mb": 1024,
+                      "max_loads_per_frame": 1},
+        "ground": {"grass": asset("textures/grass4.jpg"),
+                   "path": asset("textures/dirt.jpg")},
+        "models": {
+            "tractor": {"path": asset("models/Lambo/Lambo.obj"), "resident": True, "lightmap": False},
+            "garage": {"path": asset("models/farm/garage.obj"), "resident": True, "lightmap": False},
+            "shed": {"path": asset("models/farm/garage.obj"), "lightmap": False},
+            "house": {"path": asset("models/farm/House.obj"), "lightmap": False},
+            "cow": {"path": asset("models/farm/cow.obj"), "lightmap": False},
+            "tree": {"path": asset("models/farm/tree.obj"), "lightmap": False},
+            "fence": {"path": "fence.obj", "lightmap": False},
+            "field": {"path": "field.obj", "lightmap": False},
+        },
+        "instances": [{"model": "tractor", "role": "tractor"},
+                      {"model": "garage", "role": "garage"}],
+    }
+
+    rng = np.random.default_rng(seed)
+    side = math.ceil(math.sqrt(size))
+    instances = scene["instances"]
+    for cell in range(size):
+        cx = (cell % side - (side - 1) / 2) * CELL
+        cz = (cell // side - (side - 1) / 2) * CELL
+        instances.append({"model": "field", "pos": [cx, 0, cz]})
+        instances += _fence_instances(cx, cz, rng)
+
+        # Pasto e bosque na faixa fora da vedação
+        for _ in range(int(rng.integers(*HERD))):
+            x, z = cx + rng.uniform(-CELL / 2, CELL / 2), cz + rng.uniform(FIELD[1] / 2 + 8, CELL / 2)
+            instances.append({"model": "cow", "pos": [round(x, 2), 0, round(z, 2)],
+                              "yaw": round(rng.uniform(0, 360), 1), "scale": 0.3})
+        for _ in range(int(rng.integers(*FOREST))):
+            x, z = cx + rng.uniform(-CELL / 2, CELL / 2), cz - rng.uniform(FIELD[1] / 2 + 8, CELL / 2)
+            instances.append({"model": "tree", "pos": [round(x, 2), 6.2, round(z, 2)],
+                              "yaw": round(rng.uniform(-180, 180), 1),
+                              "scale": round(rng.uniform(1.8, 2.4), 2)})
+        if rng.random() < SHED_CHANCE:
+            instances.append({"model": "shed", "pos": [cx + FIELD[0] / 2 + 12, 0, cz],
+                              "yaw": 90, "occluder": True})
+        if rng.random() < HOUSE_CHANCE:
+            instances.append({"model": "house", "pos": [cx - FIELD[0] / 2 - 15, -17, cz],
+                              "yaw": 90, "scale": 2.0, "occluder": True})
+
+    path = os.path.join(out_dir, f"stress-s{seed}-n{size}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(scene, f, indent=1)
+    return path, len(instances)
+
+
+# ---------------------------------------------------------
+# MEDIÇÃO (um tamanho, neste processo)
+# ---------------------------------------------------------
+
+def _open_window():
+    from OpenGL.GLUT import (glutInit, glutInitDisplayMode, glutInitWindowSize,
+                             glutCreateWindow, GLUT_DOUBLE, GLUT_RGB, GLUT_DEPTH)
+    import main
+    glutInit(sys.argv)
+    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)
+    glutInitWindowSize(800, 600)
+    glutCreateWindow(b"stress scene")
+    main.setup_opengl()
+    return main
+
+
+def measure(path, frames=FRAMES, gl=False):
+    """dict com tempo de carregamento, RSS, objetos e frame times (ms)."""
+    import scene
+    import tractor
+
+    if gl:
+        main = _open_window()
+    else:
+        scene.headless = True
+        scene_loader.load_textures = False
+    scene.cam_mode = scene.CAM_FREE
+
+    with open(path, "r", encoding="utf-8") as f:
+        positions = np.array([inst["pos"] for inst in json.load(f)["instances"] if "pos" in inst])
+    center = positions.mean(axis=0)
+    radius = max(np.abs(positions[:, [0, 2]] - center[[0, 2]]).max(), 60.0)
+
+    rss0 = telemetry.rss_bytes()
+    t0 = time.perf_counter()
+    scene_loader.load_scene(path, [(center[0], center[2]), tractor.get_position()])
+    load_ms = (time.perf_counter() - t0) * 1000.0
+    if gl:
+        grass, dirt = scene_loader.ground_textures()
+        scene.set_ground_textures(main.load_texture(grass), main.load_texture(dirt))
+        scene.reshape(800, 600)
+        from OpenGL.GL import glFinish
+
+    objects = farm.objects()
+    triangles = sum(mesh.triangle_count for obj in objects for mesh in obj["meshes"].values()
+                    if hasattr(mesh, "triangle_count"))
+
+    # Percurso: volta ao centro da grelha, a olhar para dentro
+    dt = 1.0 / 60.0
+    step_ms, prep_ms, draw_ms = [], [], []
+    for i in range(frames):
+        a = 2.0 * math.pi * i / frames
+        scene.free_pos = [center[0] + radius * 0.8 * math.sin(a), 30.0,
+                          center[2] + radius * 0.8 * math.cos(a)]
+        scene.free_yaw = math.degrees(a) + 180.0
+        scene.free_pitch = -15.0
+
+        t0 = time.perf_counter()
+        scene.step(dt)
+        t1 = time.perf_counter()
+        packet = frame_pipeline.build_packet(frame_pipeline.snapshot())
+        t2 = time.perf_counter()
+        if gl:
+            scene.display()
+            glFinish()
+        t3 = time.perf_counter()
+        step_ms.append((t1 - t0) * 1000.0)
+        prep_ms.append((t2 - t1) * 1000.0)
+        draw_ms.append((t3 - t2) * 1000.0)
+
+    frame_ms = np.add(np.add(step_ms, prep_ms), draw_ms)
+    loaded, total, cpu_mb, gpu_mb = scene_loader.stats()
+    return {
+        "path": os.path.basename(path), "gl": gl,
+        "instances": len(positions), "objects": len(objects), "triangles": triangles,
+        "models_loaded": loaded, "load_ms": load_ms,
+        "rss_mb": (telemetry.rss_bytes() - rss0) / (1 << 20),
+        "model_cpu_mb": cpu_mb, "model_gpu_mb": gpu_mb,
+        "frame_ms": float(np.median(frame_ms)), "frame_p95_ms": float(np.percentile(frame_ms, 95)),
+        "step_ms": float(np.median(step_ms)), "prep_ms": float(np.median(prep_ms)),
+        "draw_ms": float(np.median(draw_ms)), "culled": packet.culled,
+    }
+
+
+# ---------------------------------------------------------
+# CURVA DE ESCALA
+# ---------------------------------------------------------
+
+def _run(path, frames, gl):
+    """measure() num processo limpo (RSS e caches de um tamanho não passam ao seguinte)."""
+    cmd = [sys.executable, os.path.abspath(__file__), "measure", path, "--frames", str(frames)]
+    if gl:
+        cmd.append("--gl")
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True, cwd=HERE).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+_COLUMNS = (("objects", "objects", "{:8d}"), ("load_ms", "load ms", "{:8.0f}"),
+            ("rss_mb", "RSS MB", "{:8.1f}"), ("frame_ms", "frame ms", "{:8.2f}"),
+            ("frame_p95_ms", "p95 ms", "{:8.2f}"), ("step_ms", "step ms", "{:8.2f}"),
+            ("prep_ms", "prep ms", "{:8.2f}"), ("draw_ms", "draw ms", "{:8.2f}"))
+
+# Sem janela não há draw: o "frame" é só o passo de CPU
+_CPU_LABELS = {"frame_ms": "cpu ms", "frame_p95_ms": "cpu p95"}
+_CPU_COLUMNS = tuple((key, _CPU_LABELS.get(key, label), fmt)
+                     for key, label, fmt in _COLUMNS if key != "draw_ms")
+
+
+def curve(sizes=SIZES, seed=SEED, frames=FRAMES, gl=False, baseline=BASELINE, save=False):
+    results = []
+    for size in sizes:
+        path, _ = generate(seed, size)
+        _run(path, 2, gl)                   # 1ª passagem: escreve as .meshcache.npz
+        results.append(dict(_run(path, frames, gl), size=size))
+
+    columns = _COLUMNS if gl else _CPU_COLUMNS
+    mode = ("GL window (scene.display + glFinish)" if gl else
+            "headless: CPU step only, no farm.draw / ObjMesh.draw (--gl for full frames)")
+    print(f"[STRESS] seed {seed}, {frames} frames per size, {mode}")
+    print(f"  {'size':>6}" + "".join(f"{label:>10}" for _, label, _ in columns))
+    for r in results:
+        print(f"  {r['size']:>6}" + "".join("  " + fmt.format(r[key]) for key, _, fmt in columns))
+
+    # Declive log-log entre o menor e o maior tamanho: ~1 = linear nos objetos
+    if len(results) > 1 and results[0]["objects"] != results[-1]["objects"]:
+        a, b = results[0], results[-1]
+        span = math.log(b["objects"] / a["objects"])
+        for key in ("load_ms", "frame_ms", "step_ms", "prep_ms"):
+            if a[key] > 0 and b[key] > 0:
+                label = key if gl or key != "frame_ms" else "cpu_ms"
+                print(f"  {label:<10} ~ objects^{math.log(b[key] / a[key]) / span:.2f}")
+
+    previous = None
+    if os.path.isfile(baseline):
+        with open(baseline, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+    if previous and previous.get("seed") == seed and previous.get("gl") == gl:
+        old = {r["size"]: r for r in previous["results"]}
+        print(f"  vs baseline {os.path.basename(baseline)} ({previous['date']}):")
+        for r in results:
+            o = old.get(r["size"])
+            if o:
+                print(f"  {r['size']:>6}" + "".join(
+                    f"{(r[k] / o[k] - 1.0) * 100.0:+9.0f}%" if o[k] else f"{'-':>10}"
+                    for k, _, _ in columns))
+
+    if save or previous is None:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline)), exist_ok=True)
+        with open(baseline, "w", encoding="utf-8") as f:
+            json.dump({"seed": seed, "gl": gl, "frames": frames,
+                       "date": time.strftime("%Y-%m-%d %H:%M"), "results": results}, f, indent=1)
+        print(f"[STRESS] Baseline saved to {baseline}"
+              f"{' (local, not tracked)' if baseline == BASELINE else ''}")
+    return results
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+
+    def _opt(name, default, kind):
+        return kind(args[args.index(name) + 1]) if name in args else default
+
+    command = args[0] if args else "curve"
+    if command == "generate":
+        path, count = generate(_opt("--seed", SEED, int), _opt("--size", 16, int))
+        print(f"[STRESS] {count} instances -> {path}")
+    elif command == "measure":
+        print(json.dumps(measure(args[1], _opt("--frames", FRAMES, int), "--gl" in args)))
+    else:
+        sizes = tuple(int(s) for s in _opt("--sizes", ",".join(map(str, SIZES)), str).split(","))
+        curve(sizes, _opt("--seed", SEED, int), _opt("--frames", FRAMES, int), "--gl" in args,
+              _opt("--baseline", BASELINE, str), "--save" in args)
@@ -0,0 +1,241 @@
+# telemetry.py
+# ------------------------------------------------------------
+#  TELEMETRIA LOCAL (JSON + Prometheus), OPCIONAL
+# ------------------------------------------------------------
+#  python main.py --telemetry [porta]    (por omissão 9464)
+#
+#    http://127.0.0.1:9464/metrics        formato de texto Prometheus
+#    http://127.0.0.1:9464/metrics.json   o mesmo em JSON
+#
+#  O servidor HTTP corre numa thread própria, só em localhost. O
+#  ciclo GLUT nunca espera por ele: a cada frame só soma contadores
+#  (count() nos pontos de desenho, frame_done() depois do swap) e,
+#  a cada PUBLISH_INTERVAL, publica um snapshot novo (um dict que
+#  depois não é alterado). Um pedido lê a referência do snapshot
+#  atual e formata-o na thread do servidor; o RSS lê-se também aí.
+#  http.server (~35 ms de imports) só se carrega em start().
+# ------------------------------------------------------------
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+HOST = "127.0.0.1"
+PORT = 9464
+PUBLISH_INTERVAL = 0.25         # segundos entre snapshots
+FRAME_BUCKETS_MS = (4.0, 8.0, 12.0, 16.7, 20.0, 25.0, 33.3, 50.0, 100.0, 250.0)
+PREFIX = "farm_"
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+enabled = False
+
+# Frame corrente (só a thread do GLUT escreve)
+_calls = 0
+_triangles = 0
+
+# Acumulado desde o arranque
+_buckets = [0] * (len(FRAME_BUCKETS_MS) + 1)    # último = +Inf
+_frames = 0
+_frame_ms_sum = 0.0
+_last_frame = None
+_last_publish = 0.0
+_load_ms = {}                   # modelo -> ms do último carregamento
+
+_snapshot = {}                  # publicado para a thread do servidor
+_server = None
+_thread = None
+
+
+# ---------------------------------------------------------
+# RECOLHA (thread do GLUT)
+# ---------------------------------------------------------
+
+def count(calls, triangles=0):
+    """Chamadas de desenho e triângulos submetidos neste frame."""
+    global _calls, _triangles
+    _calls += calls
+    _triangles += triangles
+
+
+def asset_loaded(name, ms):
+    _load_ms[name] = ms
+
+
+def frame_done():
+    """Fecha o frame: histograma do frame time e, de vez em quando, novo snapshot."""
+    global _calls, _triangles, _frames, _frame_ms_sum, _last_frame, _last_publish
+    calls, triangles = _calls, _triangles
+    _calls = _triangles = 0
+    if not enabled:
+        return
+
+    now = time.perf_counter()
+    if _last_frame is not None:
+        ms = (now - _last_frame) * 1000.0
+        _buckets[bisect_left(FRAME_BUCKETS_MS, ms)] += 1
+        _frames += 1
+        _frame_ms_sum += ms
+    _last_frame = now
+
+    if now - _last_publish >= PUBLISH_INTERVAL:
+        _publish(now, calls, triangles)
+
+
+def _publish(now, calls, triangles):
+    global _snapshot, _last_publish
+    import obj_loader
+    import scene_loader
+
+    previous = _snapshot
+    interval = now - _last_publish
+    frames = _frames - previous.get("frames", 0)
+    loaded, total, cpu_mb, gpu_mb = scene_loader.stats()
+    # Tudo copiado: o dict não volta a ser tocado por esta thread
+    _snapshot = {
+        "time": time.time(),
+        "frames": _frames,
+        "fps": frames / interval if previous and interval > 0 else 0.0,
+        "frame_ms_buckets": list(FRAME_BUCKETS_MS),
+        "frame_ms_counts": list(_buckets),
+        "frame_ms_sum": _frame_ms_sum,
+        "draw_calls": calls,
+        "triangles": triangles,
+        "texture_bytes": sum(obj_loader.texture_bytes.values()),
+        "textures": len(obj_loader.texture_bytes),
+        "models_loaded": loaded,
+        "models_total": total,
+        "model_cpu_mb": cpu_mb,
+        "model_gpu_mb": gpu_mb,
+        "asset_load_ms": dict(_load_ms),
+    }
+    _last_publish = now
+
+
+# ---------------------------------------------------------
+# FORMATOS (thread do servidor)
+# ---------------------------------------------------------
+
+def rss_bytes():
+    """RSS atual (Linux: /proc/self/statm; senão o máximo de getrusage)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+def to_json(snap):
+    return json.dumps(dict(snap, rss_bytes=rss_bytes()), indent=1)
+
+
+def to_prometheus(snap):
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{PREFIX}{name}{labels} {value}")
+
+    if snap:
+        cumulative, samples = 0, []
+        for le, n in zip(list(snap["frame_ms_buckets"]) + ["+Inf"], snap["frame_ms_counts"]):
+            cumulative += n
+            le = le if le == "+Inf" else f"{le / 1000.0:g}"
+            samples.append((f'_bucket{{le="{le}"}}', cumulative))
+        samples.append(("_sum", f"{snap['frame_ms_sum'] / 1000.0:.6f}"))
+        samples.append(("_count", cumulative))
+        metric("frame_seconds", "histogram", "Time between presented frames.", samples)
+        metric("fps", "gauge", "Frames per second over the last publish interval.",
+               [("", f"{snap['fps']:.2f}")])
+        metric("draw_calls", "gauge", "Draw calls in the last frame.", [("", snap["draw_calls"])])
+        metric("triangles", "gauge", "Triangles submitted in the last frame.",
+               [("", snap["triangles"])])
+        metric("texture_bytes", "gauge", "GPU memory held by textures.",
+               [("", snap["texture_bytes"])])
+        metric("models_loaded", "gauge", "Streamed models currently loaded.",
+               [("", snap["models_loaded"])])
+        metric("asset_load_seconds", "gauge", "Duration of the last load of each model.",
+               [(f'{{model="{k}"}}', f"{v / 1000.0:.4f}")
+                for k, v in sorted(snap["asset_load_ms"].items())])
+    metric("process_resident_memory_bytes", "gauge", "Resident set size.",
+           [("", rss_bytes())])
+    return "\n".join(lines) + "\n"
+
+
+def _handler_class():
+    """Handler HTTP; definido aqui para o import de http.server só acontecer com --telemetry."""
+    from http.server import BaseHTTPRequestHandler
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            snap = _snapshot
+            if self.path in ("/metrics", "/"):
+                body, ctype = to_prometheus(snap), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, ctype = to_json(snap), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass                    # nada na consola por pedido
+
+    return _Handler
+
+
+# ---------------------------------------------------------
+# SERVIDOR
+# ---------------------------------------------------------
+
+def start(port=PORT):
+    """Liga a recolha e o servidor em localhost (thread daemon)."""
+    global enabled, _server, _thread
+    from http.server import HTTPServer
+    try:
+        _server = HTTPServer((HOST, port), _handler_class())
+    except OSError as e:
+        print(f"[WARN] Telemetry disabled: {e}")
+        return
+    _thread = threading.Thread(target=_server.serve_forever, name="telemetry", daemon=True)
+    _thread.start()
+    enabled = True
+    print(f"[TELEMETRY] http://{HOST}:{port}/metrics (and /metrics.json)")
+
+
+def stop():
+    global enabled, _server, _thread
+    enabled = False
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+    _server = _thread = None
+
+
+def parse_args(argv):
+    """--telemetry [porta] -> porta, ou None sem a opção."""
+    if "--telemetry" not in argv:
+        return None
+    i = argv.index("--telemetry")
+    if i + 1 < len(argv) and argv[i + 1].isdigit():
+        return int(argv[i + 1])
+    return PORT
@@ -2,6 +2,10 @@
 from math import sin, cos, tan
 from OpenGL.GL import *
 
+import oit
+import startup
+import transforms
+
 
 # ---------------------------------------------------------
 # CONSTANTES FÍSICAS E DE ANIMAÇÃO
@@ -80,11 +84,15 @@ def set_meshes(parts: dict, materials: dict):
 def update(moving_forward: bool, moving_back: bool,
            turning_left: bool, turning_right: bool,
            dt: float = 1.0):
-    """Atualiza posição, direção e animações do trator."""
+    """Atualiza posição, direção e animações do trator; True se algo mudou."""
     global pos_x, pos_z, dir_angle
     global wheel_spin_back, wheel_spin_front, steer_angle
     global door_left_angle, door_right_angle
 
+    steer_before = steer_angle
+    doors_moving = (door_left_angle != door_left_target
+                    or door_right_angle != door_right_target)
+
     # 1. Velocidade Linear
     v = 0.0
     if moving_forward: v += BASE_SPEED
@@ -136,6 +144,8 @@ def update(moving_forward: bool, moving_back: bool,
         else:
             door_right_angle = max(door_right_angle - step, door_right_target)
 
+    return dist != 0.0 or steer_angle != steer_before or doors_moving
+
 
 def rotate_left_door(delta_deg: float):
     global door_left_target
@@ -171,6 +181,70 @@ def _is_steering_wheel(name: str) -> bool:
     return "steer" in name.lower()
 
 
+# ---------------------------------------------------------
+# MATRIZES (picking e afins)
+# ---------------------------------------------------------
+
+def pose():
+    """Cópia (tuplo) do estado animado, para preparar um frame noutra thread."""
+    return (pos_x, pos_z, dir_angle, steer_angle, wheel_spin_back, wheel_spin_front,
+            door_left_angle, door_right_angle)
+
+
+def model_matrix(p=None):
+    """Transformação global do trator, igual à usada em draw()."""
+    x, z, yaw = (p or pose())[:3]
+    return (transforms.translate(x, 4.0, z)
+            @ transforms.rotate(180.0, 1.0, 0.0, 0.0)
+            @ transforms.rotate(yaw, 0.0, 1.0, 0.0))
+
+
+def part_matrix(name: str, p=None):
+    """Transformação de animação de uma parte, em espaço local do trator."""
+    _, _, _, steer_angle, wheel_spin_back, wheel_spin_front, \
+        door_left_angle, door_right_angle = p or pose()
+    # Mesma classificação que draw(): portas/vidros primeiro
+    if _is_left_door(name):
+        return transforms.about_pivot(
+            LEFT_DOOR_PIVOT, transforms.rotate(LEFT_DOOR_SIGN * door_left_angle, 0.0, 1.0, 0.0))
+
+    if _is_right_door(name):
+        return transforms.about_pivot(
+            RIGHT_DOOR_PIVOT, transforms.rotate(RIGHT_DOOR_SIGN * door_right_angle, 0.0, 1.0, 0.0))
+
+    if "glass" in name.lower():
+        return transforms.identity()
+
+    if _is_steering_wheel(name):
+        return transforms.about_pivot(
+            STEERING_WHEEL_PIVOT,
+            transforms.rotate(steer_angle * STEERING_WHEEL_FACTOR, *STEERING_AXIS))
+
+    if _is_back_wheels(name):
+        return transforms.about_pivot(
+            BACK_WHEELS_PIVOT, transforms.rotate(-wheel_spin_back, 0.0, 0.0, 1.0))
+
+    if _is_front_wheels(name):
+        steer = transforms.about_pivot(
+            FRONT_WHEELS_PIVOT, transforms.rotate(steer_angle, 0.0, 1.0, 0.0))
+        spin = transforms.about_pivot(
+            FRONT_WHEELS_PIVOT, transforms.rotate(-wheel_spin_front, 0.0, 0.0, 1.0))
+        return steer @ spin
+
+    return transforms.identity()
+
+
+def is_glass(name: str) -> bool:
+    """Partes desenhadas no passe transparente (portas e vidros)."""
+    return _is_left_door(name) or _is_right_door(name) or ("glass" in name.lower())
+
+
+def pick_targets():
+    model = model_matrix()
+    for name, mesh in tractor_parts.items():
+        yield "tractor", name, mesh, model @ part_matrix(name)
+
+
 # ---------------------------------------------------------
 # DESENHO (DRAW)
 # ---------------------------------------------------------
@@ -261,8 +335,7 @@ def draw():
     glass_parts  = []
 
     for name, mesh in tractor_parts.items():
-        lname = name.lower()
-        if _is_left_door(name) or _is_right_door(name) or ("glass" in lname):
+        if is_glass(name):
             glass_parts.append((name, mesh))
         else:
             opaque_parts.append((name, mesh))
@@ -271,8 +344,13 @@ def draw():
     for name, mesh in opaque_parts:
         _draw_opaque_part(name, mesh)
 
-    # 2. Desenhar Vidros (com Blending)
-    if glass_parts:
+    # 2. Desenhar Vidros: passe OIT (sem ordenação) ou blending direto
+    if glass_parts and oit.active():
+        model = model_matrix()
+        for name, mesh in glass_parts:
+            oit.submit(mesh, tractor_materials, model @ part_matrix(name),
+                       (1.0, 1.0, 1.0, GLASS_ALPHA))
+    elif glass_parts:
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
         glDepthMask(GL_FALSE)
@@ -290,12 +368,52 @@ def draw():
     # Debug: Printar nomes das malhas uma vez
     if not _printed_meshes:
         for name in tractor_parts.keys():
-            print("[MESH]", name)
+            startup.log(f"[MESH] {name}")
         _printed_meshes = True
 
     glPopMatrix()
 
 
+def draw_prepared(parts, opaque, glass):
+    """
+    Desenha com o trabalho de CPU já feito por frame_pipeline: partes
+    classificadas e matrizes mundo (name, mesh, matriz, matriz_gl)
+    calculadas noutra thread. Um glMultMatrixf por parte em vez da
+    cadeia de translates/rotates de draw().
+    """
+    if parts is not tractor_parts:     # malhas trocadas (hot-reload) desde a preparação
+        draw()
+        return
+
+    glColor3f(1.0, 1.0, 1.0)
+    for name, mesh, world, world_gl in opaque:
+        glPushMatrix()
+        glMultMatrixf(world_gl)
+        mesh.draw(tractor_materials)
+        glPopMatrix()
+
+    if glass and oit.active():
+        for name, mesh, world, world_gl in glass:
+            oit.submit(mesh, tractor_materials, world, (1.0, 1.0, 1.0, GLASS_ALPHA))
+    elif glass:
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glDepthMask(GL_FALSE)
+        glDisable(GL_CULL_FACE)
+        glColor4f(1.0, 1.0, 1.0, GLASS_ALPHA)
+
+        for name, mesh, world, world_gl in glass:
+            glPushMatrix()
+            glMultMatrixf(world_gl)
+            mesh.draw(tractor_materials)
+            glPopMatrix()
+
+        glColor3f(1.0, 1.0, 1.0)
+        glEnable(GL_CULL_FACE)
+        glDepthMask(GL_TRUE)
+        glDisable(GL_BLEND)
+
+
 def get_position():
     return pos_x, pos_z
 
@@ -0,0 +1,244 @@
+# tractor_gpu.py
+# ------------------------------------------------------------
+#  ANIMAÇÃO RÍGIDA DO TRATOR NA GPU
+# ------------------------------------------------------------
+#  Todas as partes do trator vão para um único VBO, e cada vértice
+#  leva o índice da sua parte. Por frame envia-se um só array de
+#  matrizes (tractor.part_matrix: pivôs das rodas, volante e portas)
+#  e o vertex shader escolhe a matriz pelo índice. O trator inteiro
+#  desenha-se com uma chamada por material (opacos + vidros), em vez
+#  de um translate-rotate-translate por parte na pilha fixa.
+#  Um trator com mais de MAX_PARTS partes fica no caminho da CPU
+#  (tractor.draw()): available() devolve False.
+# ------------------------------------------------------------
+import ctypes
+
+import numpy as np
+from OpenGL.GL import *
+
+import oit
+import tractor
+import transforms
+from gpu_mesh import GpuMesh, material_arrays, interleave
+from shaders import compile_program, Uniforms, LIT_FRAGMENT_SRC, DEQUANT_GLSL
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+enabled = True
+
+MAX_PARTS = 32            # tamanho do array de matrizes no shader
+PART_ATTRIB = 9           # localização do atributo "part_index"
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+_program = None
+_uniforms = None
+_failed = False
+
+_built_for = None         # dicionário tractor_parts usado para construir o VBO
+_mesh = None              # GpuMesh com todas as partes
+_part_vbo = None          # índice da parte por vértice (float32)
+_part_names = []
+_opaque_ranges = []
+_glass_ranges = []
+_oversized = None         # tractor_parts com partes a mais (já avisado)
+
+
+_VERTEX_SRC = ("""
+#version 120
+uniform mat4 part_matrices[%d];
+attribute float part_index;
+
+varying vec3 v_normal;
+varying vec3 v_pos;
+varying vec2 v_uv;
+varying vec4 v_color;
+""" + DEQUANT_GLSL + """
+void main()
+{
+    mat4 part = part_matrices[int(part_index)];
+    vec4 eye = gl_ModelViewMatrix * (part * dq_vertex());
+    v_pos = eye.xyz;
+    v_normal = gl_NormalMatrix * (mat3(part) * gl_Normal);
+    v_uv = gl_MultiTexCoord0.xy;
+    v_color = gl_Color;
+    gl_Position = gl_ProjectionMatrix * eye;
+}
+""") % MAX_PARTS
+
+
+def toggle():
+    global enabled
+    enabled = not enabled
+    print(f"[ANIM] GPU part animation: {'ON' if enabled else 'OFF'}")
+
+
+def _is_glass(name):
+    return tractor._is_left_door(name) or tractor._is_right_door(name) or "glass" in name.lower()
+
+
+# ---------------------------------------------------------
+# CONSTRUÇÃO DO VBO
+# ---------------------------------------------------------
+
+def _merge(chunks):
+    """[(p, n | None, t | None, índice)] de um material -> (p, n, t, índices)."""
+    pos = np.concatenate([p for p, _, _, _ in chunks])
+    nrm = np.concatenate([n if n is not None else np.tile((0.0, 1.0, 0.0), (len(p), 1))
+                          for p, n, _, _ in chunks]).astype(np.float32)
+    uv = np.concatenate([t if t is not None else np.zeros((len(p), 2))
+                         for p, _, t, _ in chunks]).astype(np.float32)
+    idx = np.concatenate([np.full(len(p), i, dtype=np.float32) for p, _, _, i in chunks])
+    return pos, nrm, uv, idx
+
+
+def _build(parts):
+    """Agrupa as partes por (opaco/vidro, material) e envia tudo para a GPU."""
+    global _built_for, _mesh, _part_vbo, _part_names, _opaque_ranges, _glass_ranges
+
+    _release()
+    _part_names = list(parts)
+
+    passes = ({}, {})          # opacos, vidros: material -> [chunks]
+    for i, name in enumerate(_part_names):
+        target = passes[1] if _is_glass(name) else passes[0]
+        for mtl, (p, n, t) in material_arrays(parts[name]).items():
+            target.setdefault(mtl, []).append((p, n, t, i))
+
+    datas, indices, all_ranges = [], [], []
+    first = 0
+    for groups in passes:
+        merged = {mtl: _merge(chunks) for mtl, chunks in groups.items()}
+        data, ranges = interleave({mtl: m[:3] for mtl, m in merged.items()})
+        datas.append(data)
+        indices.extend(m[3] for m in merged.values())
+        all_ranges.append([(mtl, f + first, c) for mtl, f, c in ranges])
+        first += len(data)
+
+    _opaque_ranges, _glass_ranges = all_ranges
+    _mesh = GpuMesh(data=np.concatenate(datas), ranges=_opaque_ranges + _glass_ranges)
+
+    part_index = np.concatenate(indices) if indices else np.zeros(0, dtype=np.float32)
+    _part_vbo = glGenBuffers(1)
+    glBindBuffer(GL_ARRAY_BUFFER, _part_vbo)
+    glBufferData(GL_ARRAY_BUFFER, part_index.nbytes, part_index, GL_STATIC_DRAW)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    _built_for = parts
+    print(f"[ANIM] Tractor on GPU: {len(_part_names)} parts, {_mesh.vertex_count} vertices, "
+          f"{len(_opaque_ranges) + len(_glass_ranges)} draw calls, "
+          f"{_mesh.nbytes // max(_mesh.vertex_count, 1)} bytes/vertex")
+
+
+def _release():
+    global _mesh, _part_vbo, _built_for
+    if _mesh is not None:
+        _mesh.delete()
+        _mesh = None
+    if _part_vbo is not None:
+        glDeleteBuffers(1, [_part_vbo])
+        _part_vbo = None
+    _built_for = None
+
+
+def _ensure_program():
+    global _program, _uniforms, _failed
+    if _program is None and not _failed:
+        try:
+            _program = compile_program(_VERTEX_SRC, LIT_FRAGMENT_SRC, {"part_index": PART_ATTRIB})
+            _uniforms = Uniforms(_program)
+        except Exception as e:
+            print(f"[WARN] GPU part animation unavailable: {e}")
+            _failed = True
+    return _program is not None
+
+
+# ---------------------------------------------------------
+# MATRIZES POR FRAME
+# ---------------------------------------------------------
+
+def part_matrices(pose=None):
+    """(P, 16) float32 pronto para glUniformMatrix4fv, pela ordem de _part_names."""
+    return transforms.to_gl_batch(np.stack([tractor.part_matrix(n, pose) for n in _part_names]))
+
+
+# ---------------------------------------------------------
+# DESENHO
+# ---------------------------------------------------------
+
+def _fits(parts):
+    """Todas as partes cabem no array de matrizes do shader?"""
+    global _oversized
+    if len(parts) <= MAX_PARTS:
+        return True
+    if _oversized is not parts:
+        print(f"[WARN] Tractor has {len(parts)} parts (GPU animation supports {MAX_PARTS}); "
+              f"using CPU animation")
+        _oversized = parts
+    return False
+
+
+def available():
+    return enabled and not _failed and _fits(tractor.tractor_parts)
+
+
+def draw(pose=None):
+    """
+    Mesmo resultado que tractor.draw(), com a animação feita no vertex
+    shader. pose: tractor.pose() do snapshot do frame_pipeline.
+    """
+    if not tractor.tractor_parts:
+        return
+    if not _fits(tractor.tractor_parts) or not _ensure_program():
+        tractor.draw()
+        return
+    if _built_for is not tractor.tractor_parts:
+        _build(tractor.tractor_parts)
+
+    glPushMatrix()
+    model = tractor.model_matrix(pose)
+    glMultMatrixf(transforms.to_gl(model))
+    glColor3f(1.0, 1.0, 1.0)
+
+    glUseProgram(_program)
+    glUniform1i(_uniforms["tex"], 0)
+    mats = part_matrices(pose)
+    glUniformMatrix4fv(_uniforms["part_matrices"], len(mats), GL_FALSE, mats)
+
+    _mesh.bind(_uniforms)
+    glBindBuffer(GL_ARRAY_BUFFER, _part_vbo)
+    glEnableVertexAttribArray(PART_ATTRIB)
+    glVertexAttribPointer(PART_ATTRIB, 1, GL_FLOAT, GL_FALSE, 4, ctypes.c_void_p(0))
+
+    use_tex = _uniforms["use_tex"]
+    _mesh.draw_ranges(tractor.tractor_materials, use_tex_loc=use_tex, ranges=_opaque_ranges)
+
+    # Vidros: passe OIT (sem ordenação) ou o mesmo blending que tractor.draw()
+    if _glass_ranges and oit.active():
+        for name in _part_names:
+            if _is_glass(name):
+                oit.submit(tractor.tractor_parts[name], tractor.tractor_materials,
+                           model @ tractor.part_matrix(name, pose),
+                           (1.0, 1.0, 1.0, tractor.GLASS_ALPHA))
+    elif _glass_ranges:
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glDepthMask(GL_FALSE)
+        glDisable(GL_CULL_FACE)
+        glColor4f(1.0, 1.0, 1.0, tractor.GLASS_ALPHA)
+
+        _mesh.draw_ranges(tractor.tractor_materials, use_tex_loc=use_tex, ranges=_glass_ranges)
+
+        glColor3f(1.0, 1.0, 1.0)
+        glEnable(GL_CULL_FACE)
+        glDepthMask(GL_TRUE)
+        glDisable(GL_BLEND)
+
+    glDisableVertexAttribArray(PART_ATTRIB)
+    _mesh.unbind()
+    glUseProgram(0)
+    glPopMatrix()
@@ -0,0 +1,160 @@
+# transforms.py
+# ------------------------------------------------------------
+#  MATRIZES 4x4 (numpy) equivalentes à pilha do OpenGL
+#  Convenção: vetores coluna, p' = M @ p
+# ------------------------------------------------------------
+from math import sin, cos, sqrt
+
+import numpy as np
+
+DEG2RAD = 0.017453292519943295
+
+
+def identity():
+    return np.eye(4)
+
+
+def translate(x, y, z):
+    m = np.eye(4)
+    m[0, 3] = x
+    m[1, 3] = y
+    m[2, 3] = z
+    return m
+
+
+def rotate(angle_deg, x, y, z):
+    """Mesma matriz que glRotatef(angle_deg, x, y, z)."""
+    length = sqrt(x * x + y * y + z * z)
+    if length < 1e-12:
+        return np.eye(4)
+    x, y, z = x / length, y / length, z / length
+
+    a = angle_deg * DEG2RAD
+    c = cos(a)
+    s = sin(a)
+    t = 1.0 - c
+
+    m = np.eye(4)
+    m[0, 0] = x * x * t + c
+    m[0, 1] = x * y * t - z * s
+    m[0, 2] = x * z * t + y * s
+    m[1, 0] = y * x * t + z * s
+    m[1, 1] = y * y * t + c
+    m[1, 2] = y * z * t - x * s
+    m[2, 0] = z * x * t - y * s
+    m[2, 1] = z * y * t + x * s
+    m[2, 2] = z * z * t + c
+    return m
+
+
+def translate_batch(xyz):
+    """(N, 3) -> (N, 4, 4) translações."""
+    xyz = np.asarray(xyz, dtype=np.float64)
+    m = np.zeros((len(xyz), 4, 4))
+    m[:, 0, 0] = m[:, 1, 1] = m[:, 2, 2] = m[:, 3, 3] = 1.0
+    m[:, :3, 3] = xyz
+    return m
+
+
+def rotate_batch(angles_deg, x, y, z):
+    """(N,) ângulos em graus -> (N, 4, 4) rotações em torno do mesmo eixo."""
+    length = sqrt(x * x + y * y + z * z)
+    x, y, z = x / length, y / length, z / length
+
+    a = np.asarray(angles_deg, dtype=np.float64) * DEG2RAD
+    c = np.cos(a)
+    s = np.sin(a)
+    t = 1.0 - c
+
+    m = np.zeros((len(a), 4, 4))
+    m[:, 0, 0] = x * x * t + c
+    m[:, 0, 1] = x * y * t - z * s
+    m[:, 0, 2] = x * z * t + y * s
+    m[:, 1, 0] = y * x * t + z * s
+    m[:, 1, 1] = y * y * t + c
+    m[:, 1, 2] = y * z * t - x * s
+    m[:, 2, 0] = z * x * t - y * s
+    m[:, 2, 1] = z * y * t + x * s
+    m[:, 2, 2] = z * z * t + c
+    m[:, 3, 3] = 1.0
+    return m
+
+
+def scale(sx, sy=None, sz=None):
+    if sy is None: sy = sx
+    if sz is None: sz = sx
+    m = np.eye(4)
+    m[0, 0] = sx
+    m[1, 1] = sy
+    m[2, 2] = sz
+    return m
+
+
+def about_pivot(pivot, rotation):
+    """
+    T(p) @ R @ T(-p): rotação em torno de um pivô (padrão usado nas animações).
+    Aceita também um lote de rotações (N, 4, 4).
+    """
+    px, py, pz = pivot
+    return translate(px, py, pz) @ rotation @ translate(-px, -py, -pz)
+
+
+def object_matrix(pos, yaw=0.0, s=1.0):
+    """Translate -> RotateY(yaw) -> Scale, como em farm.draw()."""
+    m = translate(*pos)
+    if yaw != 0.0:
+        m = m @ rotate(yaw, 0.0, 1.0, 0.0)
+    if s != 1.0:
+        m = m @ scale(s)
+    return m
+
+
+def look_at(eye, target, up=(0.0, 1.0, 0.0)):
+    """Mesma matriz que gluLookAt (mundo -> câmara)."""
+    eye = np.asarray(eye, dtype=np.float64)
+    f = np.asarray(target, dtype=np.float64) - eye
+    f /= np.linalg.norm(f)
+    s = np.cross(f, up)
+    s /= np.linalg.norm(s)
+    u = np.cross(s, f)
+
+    m = np.eye(4)
+    m[0, :3] = s
+    m[1, :3] = u
+    m[2, :3] = -f
+    m[:3, 3] = -(m[:3, :3] @ eye)
+    return m
+
+
+def perspective(fovy_deg, aspect, near, far):
+    """Mesma matriz que gluPerspective."""
+    f = 1.0 / np.tan(fovy_deg * DEG2RAD * 0.5)
+    m = np.zeros((4, 4))
+    m[0, 0] = f / aspect
+    m[1, 1] = f
+    m[2, 2] = (far + near) / (near - far)
+    m[2, 3] = 2.0 * far * near / (near - far)
+    m[3, 2] = -1.0
+    return m
+
+
+def from_gl(m):
+    """Converte o resultado de glGetDoublev(GL_*_MATRIX) (column-major)."""
+    return np.asarray(m, dtype=np.float64).reshape(4, 4).T
+
+
+def to_gl(m):
+    """Array column-major float32 para glLoadMatrixf / glMultMatrixf."""
+    return np.ascontiguousarray(np.asarray(m).T, dtype=np.float32)
+
+
+def to_gl_batch(m):
+    """(N, 4, 4) -> (N, 16) float32 column-major (atributos por instância)."""
+    m = np.asarray(m)
+    return np.ascontiguousarray(m.transpose(0, 2, 1), dtype=np.float32).reshape(len(m), 16)
+
+
+def transform_points(m, pts):
+    """Aplica M (4x4) a um array (..., 3) de pontos."""
+    pts = np.asarray(pts, dtype=np.float64)
+    return pts @ m[:3, :3].T + m[:3, 3]
@@ -0,0 +1,351 @@
+# vegetation.py
+# ------------------------------------------------------------
+#  VEGETAÇÃO PROCEDIMENTAL (relva + filas de cultivo, instanciada)
+# ------------------------------------------------------------
+#  O chão é dividido em tiles de TILE_SIZE. Cada tile à volta da
+#  câmara é gerado na primeira vez que é preciso (seed + coordenadas
+#  do tile -> sempre as mesmas ervas), enviado para um VBO e guardado
+#  numa cache LRU. As instâncias de um tile saem baralhadas, por isso
+#  qualquer prefixo é uma amostra uniforme: a densidade cai com a
+#  distância desenhando só os primeiros N de cada tile.
+#
+#  O custo por frame é limitado, seja qual for o tamanho do campo:
+#    - só tiles a menos de RADIUS da câmara (e dentro do chão);
+#    - no máximo MAX_NEW_TILES_PER_FRAME gerados por frame;
+#    - no máximo MAX_INSTANCES desenhadas (a densidade baixa por igual);
+#    - uma chamada glDrawArraysInstanced por tile.
+#  O caminho de terra e a garagem ficam livres (EXCLUDE).
+# ------------------------------------------------------------
+import ctypes
+import time
+from collections import OrderedDict
+from math import floor, hypot
+
+import numpy as np
+from OpenGL.GL import *
+
+import telemetry
+from shaders import compile_program, Uniforms, FF_LIGHTING_GLSL
+
+
+# ---------------------------------------------------------
+# CONFIGURAÇÃO
+# ---------------------------------------------------------
+enabled = True
+SEED = 1234
+
+GROUND_HALF = 400.0              # igual a scene.draw_ground (size)
+TILE_SIZE = 16.0
+RADIUS = 90.0                    # tiles mais longe não são desenhados
+FADE_START = 25.0                # densidade total até aqui...
+FADE_END = 90.0                  # ...e nula aqui
+
+GRASS_DENSITY = 5.0              # ervas por unidade²
+CROP_ROW_SPACING = 1.5
+CROP_SPACING = 0.6               # ao longo da fila
+
+MAX_INSTANCES = 150_000          # orçamento por frame
+MAX_NEW_TILES_PER_FRAME = 2
+MAX_CACHED_TILES = 256
+
+# Retângulos (x0, z0, x1, z1) sem vegetação: caminho de terra (+ margem) e garagem
+EXCLUDE = [
+    (-5.0, -40.01, 5.0, 120.0),
+    (-14.0, -48.0, 14.0, -16.0),
+]
+# Campos de cultivo (x0, z0, x1, z1): filas em vez de relva
+CROP_FIELDS = [
+    (20.0, 40.0, 70.0, 100.0),
+]
+
+GRASS_TINT = ((0.22, 0.45, 0.12), (0.40, 0.62, 0.20))      # cor da ponta: de .. a
+CROP_TINT = ((0.62, 0.55, 0.20), (0.80, 0.70, 0.30))
+GRASS_SCALE = (0.35, 0.8)
+CROP_SCALE = (1.1, 1.6)
+
+INSTANCE_ATTRIB = 10             # inst (x, z, yaw, escala), 11: inst_tint (r, g, b, fase)
+FLOATS_PER_INSTANCE = 8
+
+
+# ---------------------------------------------------------
+# ESTADO GLOBAL
+# ---------------------------------------------------------
+_tiles = OrderedDict()           # (tx, tz) -> _Tile, do menos para o mais recente (LRU)
+_program = None
+_uniforms = None
+_blade_vbo = None
+_t0 = time.perf_counter()
+
+# Estatísticas do último frame
+stats = {"tiles": 0, "instances": 0, "generated": 0}
+
+
+class _Tile:
+    def __init__(self, key, data):
+        self.key = key
+        self.count = len(data)
+        self.vbo = None
+        if self.count:
+            self.vbo = glGenBuffers(1)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+            glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def delete(self):
+        if self.vbo is not None:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = None
+
+
+def toggle():
+    global enabled
+    enabled = not enabled
+    print(f"[VEG] Vegetation: {'ON' if enabled else 'OFF'}")
+
+
+# ---------------------------------------------------------
+# GERAÇÃO (numpy, sem GL)
+# ---------------------------------------------------------
+
+def _rng(tx, tz):
+    # SeedSequence só aceita inteiros não negativos
+    return np.random.default_rng([SEED, tx + (1 << 20), tz + (1 << 20)])
+
+
+def _inside(rects, x, z):
+    mask = np.zeros(len(x), dtype=bool)
+    for x0, z0, x1, z1 in rects:
+        mask |= (x >= x0) & (x <= x1) & (z >= z0) & (z <= z1)
+    return mask
+
+
+def _instances(rng, x, z, scale_range, tint_range):
+    n = len(x)
+    out = np.empty((n, FLOATS_PER_INSTANCE), dtype=np.float32)
+    out[:, 0] = x
+    out[:, 1] = z
+    out[:, 2] = rng.uniform(0.0, 2.0 * np.pi, n)
+    out[:, 3] = rng.uniform(*scale_range, n)
+    mix = rng.uniform(0.0, 1.0, (n, 1))
+    lo, hi = np.asarray(tint_range[0]), np.asarray(tint_range[1])
+    out[:, 4:7] = lo + (hi - lo) * mix
+    out[:, 7] = rng.uniform(0.0, 2.0 * np.pi, n)      # fase do vento
+    return out
+
+
+def generate_tile(tx, tz):
+    """Instâncias (n, 8) do tile (tx, tz), sempre iguais para a mesma seed; baralhadas."""
+    rng = _rng(tx, tz)
+    x0, z0 = tx * TILE_SIZE, tz * TILE_SIZE
+
+    # Relva: Poisson uniforme no tile
+    n = rng.poisson(GRASS_DENSITY * TILE_SIZE * TILE_SIZE)
+    gx = x0 + rng.uniform(0.0, TILE_SIZE, n)
+    gz = z0 + rng.uniform(0.0, TILE_SIZE, n)
+    keep = ~_inside(EXCLUDE, gx, gz) & ~_inside(CROP_FIELDS, gx, gz)
+    parts = [_instances(rng, gx[keep], gz[keep], GRASS_SCALE, GRASS_TINT)]
+
+    # Cultivo: filas ao longo de z, alinhadas ao mundo (contínuas entre tiles)
+    for fx0, fz0, fx1, fz1 in CROP_FIELDS:
+        if fx1 < x0 or fx0 > x0 + TILE_SIZE or fz1 < z0 or fz0 > z0 + TILE_SIZE:
+            continue
+        rows = np.arange(np.ceil(max(fx0, x0) / CROP_ROW_SPACING),
+                         np.ceil(min(fx1, x0 + TILE_SIZE) / CROP_ROW_SPACING)) * CROP_ROW_SPACING
+        steps = np.arange(np.ceil(max(fz0, z0) / CROP_SPACING),
+                          np.ceil(min(fz1, z0 + TILE_SIZE) / CROP_SPACING)) * CROP_SPACING
+        if len(rows) == 0 or len(steps) == 0:
+            continue
+        cx, cz = (a.ravel() for a in np.meshgrid(rows, steps))
+        cx = cx + rng.normal(0.0, 0.05, len(cx))
+        cz = cz + rng.normal(0.0, 0.08, len(cz))
+        keep = ~_inside(EXCLUDE, cx, cz)
+        parts.append(_instances(rng, cx[keep], cz[keep], CROP_SCALE, CROP_TINT))
+
+    data = np.concatenate(parts)
+    return data[rng.permutation(len(data))]
+
+
+def density(distance):
+    """Fração das instâncias de um tile desenhada a esta distância da câmara."""
+    if distance <= FADE_START:
+        return 1.0
+    return max(0.0, (FADE_END - distance) / (FADE_END - FADE_START))
+
+
+def visible_tiles(cam_x, cam_z):
+    """[(distância, (tx, tz))] dos tiles dentro de RADIUS e do chão, mais perto primeiro."""
+    r = int(np.ceil(RADIUS / TILE_SIZE))
+    ctx, ctz = floor(cam_x / TILE_SIZE), floor(cam_z / TILE_SIZE)
+    limit = int(GROUND_HALF // TILE_SIZE)
+    out = []
+    for tx in range(max(ctx - r, -limit), min(ctx + r, limit - 1) + 1):
+        for tz in range(max(ctz - r, -limit), min(ctz + r, limit - 1) + 1):
+            # Distância ao ponto mais próximo do tile
+            dx = max(tx * TILE_SIZE - cam_x, 0.0, cam_x - (tx + 1) * TILE_SIZE)
+            dz = max(tz * TILE_SIZE - cam_z, 0.0, cam_z - (tz + 1) * TILE_SIZE)
+            d = hypot(dx, dz)
+            if d <= RADIUS:
+                out.append((d, (tx, tz)))
+    out.sort()
+    return out
+
+
+def plan(cam_x, cam_z, tile_counts):
+    """[(chave, instâncias a desenhar)] dentro do orçamento; tile_counts: chave -> total."""
+    wanted = [(key, tile_counts[key] * density(d)) for d, key in visible_tiles(cam_x, cam_z)
+              if key in tile_counts]
+    total = sum(n for _, n in wanted)
+    scale = min(1.0, MAX_INSTANCES / total) if total else 1.0
+    return [(key, int(n * scale)) for key, n in wanted if int(n * scale) > 0]
+
+
+# ---------------------------------------------------------
+# DESENHO
+# ---------------------------------------------------------
+
+# Lâmina: tira de 7 vértices (x de -1 a 1, y de 0 a 1), afunilada
+_BLADE = np.array([[-0.06, 0.0], [0.06, 0.0],
+                   [-0.045, 0.4], [0.045, 0.4],
+                   [-0.025, 0.75], [0.025, 0.75],
+                   [0.0, 1.0]], dtype=np.float32)
+
+_VERTEX_SRC = """
+#version 120
+attribute vec4 inst;          // x, z, yaw, escala
+attribute vec4 inst_tint;     // r, g, b, fase do vento
+uniform float time;
+uniform vec2 wind;
+
+varying vec3 v_normal;
+varying vec3 v_pos;
+varying vec4 v_color;
+
+void main()
+{
+    float h = gl_Vertex.y;
+    float c = cos(inst.z), s = sin(inst.z);
+    vec3 p = vec3(gl_Vertex.x * c, h, gl_Vertex.x * s) * inst.w;
+    p.xz += wind * sin(time * 1.7 + inst_tint.w) * h * h * inst.w;
+    vec4 eye = gl_ModelViewMatrix * vec4(inst.x + p.x, p.y, inst.y + p.z, 1.0);
+
+    v_pos = eye.xyz;
+    v_normal = gl_NormalMatrix * normalize(vec3(-s, 2.0, c));
+    v_color = vec4(mix(inst_tint.rgb * 0.45, inst_tint.rgb, h), 1.0);
+    gl_Position = gl_ProjectionMatrix * eye;
+}
+"""
+
+_FRAGMENT_SRC = """
+#version 120
+varying vec3 v_normal;
+varying vec3 v_pos;
+varying vec4 v_color;
+""" + FF_LIGHTING_GLSL + """
+void main()
+{
+    vec3 n = normalize(v_normal);
+    if (!gl_FrontFacing)
+        n = -n;
+    gl_FragColor = ff_fog(ff_shade(n, v_pos, v_color), v_pos);
+}
+"""
+
+
+def _ensure_gpu():
+    global _program, _uniforms, _blade_vbo
+    if _program is not None:
+        return
+    attribs = {"inst": INSTANCE_ATTRIB, "inst_tint": INSTANCE_ATTRIB + 1}
+    _program = compile_program(_VERTEX_SRC, _FRAGMENT_SRC, attribs)
+    _uniforms = Uniforms(_program)
+    _blade_vbo = glGenBuffers(1)
+    glBindBuffer(GL_ARRAY_BUFFER, _blade_vbo)
+    glBufferData(GL_ARRAY_BUFFER, _BLADE.nbytes, _BLADE, GL_STATIC_DRAW)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+
+def _update_cache(cam_x, cam_z):
+    """Gera os tiles em falta mais próximos (no máximo MAX_NEW_TILES_PER_FRAME)."""
+    generated = 0
+    for _, key in visible_tiles(cam_x, cam_z):
+        tile = _tiles.get(key)
+        if tile is not None:
+            _tiles.move_to_end(key)
+        elif generated < MAX_NEW_TILES_PER_FRAME:
+            _tiles[key] = _Tile(key, generate_tile(*key))
+            generated += 1
+
+    while len(_tiles) > MAX_CACHED_TILES:
+        _, old = _tiles.popitem(last=False)
+        old.delete()
+    stats["generated"] = generated
+
+
+def draw(cam_x, cam_z):
+    """Desenha a vegetação à volta de (cam_x, cam_z); chamado depois de draw_ground."""
+    if not enabled:
+        return
+    _ensure_gpu()
+    _update_cache(cam_x, cam_z)
+    todo = plan(cam_x, cam_z, {key: t.count for key, t in _tiles.items()})
+
+    glPushAttrib(GL_ENABLE_BIT)
+    glDisable(GL_CULL_FACE)
+    glDisable(GL_TEXTURE_2D)
+    glUseProgram(_program)
+    glUniform1f(_uniforms["time"], time.perf_counter() - _t0)
+    glUniform2f(_uniforms["wind"], 0.12, 0.05)
+
+    glBindBuffer(GL_ARRAY_BUFFER, _blade_vbo)
+    glEnableClientState(GL_VERTEX_ARRAY)
+    glVertexPointer(2, GL_FLOAT, 0, ctypes.c_void_p(0))
+
+    locs = (INSTANCE_ATTRIB, INSTANCE_ATTRIB + 1)
+    for loc in locs:
+        glEnableVertexAttribArray(loc)
+        glVertexAttribDivisor(loc, 1)
+
+    drawn = 0
+    for key, count in todo:
+        glBindBuffer(GL_ARRAY_BUFFER, _tiles[key].vbo)
+        for k, loc in enumerate(locs):
+            glVertexAttribPointer(loc, 4, GL_FLOAT, GL_FALSE, FLOATS_PER_INSTANCE * 4,
+                                  ctypes.c_void_p(16 * k))
+        glDrawArraysInstanced(GL_TRIANGLE_STRIP, 0, len(_BLADE), count)
+        telemetry.count(1, (len(_BLADE) - 2) * count)
+        drawn += count
+
+    for loc in locs:
+        glVertexAttribDivisor(loc, 0)
+        glDisableVertexAttribArray(loc)
+    glDisableClientState(GL_VERTEX_ARRAY)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    glUseProgram(0)
+    glPopAttrib()
+
+    stats["tiles"] = len(todo)
+    stats["instances"] = drawn
+
+
+# ---------------------------------------------------------
+# ORÇAMENTO (sem GL)
+# ---------------------------------------------------------
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    sample = [generate_tile(tx, tz) for tx in range(-3, 3) for tz in range(-3, 3)]
+    gen_ms = (time.perf_counter() - t0) * 1000.0 / len(sample)
+    assert np.array_equal(generate_tile(2, -1), sample[5 * 6 + 2]), "not deterministic"
+
+    counts = {}
+    for cam in ((0.0, 100.0), (45.0, 70.0), (300.0, 300.0), (-390.0, 0.0)):
+        tiles = visible_tiles(*cam)
+        for _, key in tiles:
+            if key not in counts:
+                counts[key] = len(generate_tile(*key))
+        todo = plan(*cam, counts)
+        full = sum(counts[key] for _, key in tiles)
+        print(f"[VEG] camera {cam}: {len(tiles)} tiles ({full} instances), "
+              f"drawn {sum(n for _, n in todo)} in {len(todo)} draw calls")
+    print(f"[VEG] {gen_ms:.2f} ms per tile generated "
+          f"(at most {MAX_NEW_TILES_PER_FRAME} per frame)")
@@ -0,0 +1,165 @@
+# test_obj_loader.py
+# ------------------------------------------------------------
+#  ObjStream: faces misturadas e memória num OBJ sintético grande
+# ------------------------------------------------------------
+#  python -m pytest tests
+#  OBJ_STREAM_TEST_MB=2048 python -m pytest tests -k synthetic   (vários GB)
+# ------------------------------------------------------------
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from obj_loader import ObjStream, STREAM_CHUNK_SIZE, load_obj_multipart     # noqa: E402
+
+
+STREAM_TEST_MB = int(os.environ.get("OBJ_STREAM_TEST_MB", "64"))
+STREAM_BUDGET_MB = int(os.environ.get("OBJ_STREAM_BUDGET_MB", "64"))
+RSS_SLACK = 8 << 20             # fragmentação do malloc entre o gerador e o stream
+
+
+class SyntheticObj:
+    """
+    Ficheiro OBJ gerado em memória, bloco a bloco (não toca no disco):
+    partes em grelha n x n com v/vt/vn, até perfazer total_bytes.
+    """
+
+    def __init__(self, total_bytes, grid=200):
+        self.total_bytes = total_bytes
+        self.grid = grid
+        self.produced = 0
+        self.parts = 0
+        self.triangles = 0
+        self._buf = b""
+        self._v_offset = 0
+
+    def _next_part(self):
+        n = self.grid
+        k = self.parts
+        i, j = np.meshgrid(np.arange(n), np.arange(n))
+        i, j = i.ravel(), j.ravel()
+        v = np.stack((i * 0.5, ((i * j + k) % 7) * 0.1, j * 0.5 + k * n), axis=1)
+        vt = np.stack((i / (n - 1), j / (n - 1)), axis=1)
+
+        a = (self._v_offset + 1 + j * n + i).reshape(n, n)[:-1, :-1].ravel()
+        quads = np.stack((a, a + 1, a + n + 1, a + n), axis=1).repeat(3, axis=1)
+
+        # Uma formatação por secção (sem um objeto Python por linha)
+        text = (f"o part_{k}\nusemtl mat_{k % 4}\n"
+                + "v %.4f %.4f %.4f\n" * len(v) % tuple(v.ravel().tolist())
+                + "vt %.5f %.5f\n" * len(vt) % tuple(vt.ravel().tolist())
+                + "vn 0.0000 1.0000 0.0000\n" * len(v)
+                + "f %d/%d/%d %d/%d/%d %d/%d/%d %d/%d/%d\n" * len(quads)
+                % tuple(quads.ravel().tolist()))
+
+        self._v_offset += n * n
+        self.parts += 1
+        self.triangles += 2 * (n - 1) * (n - 1)
+        return text.encode("ascii")
+
+    def read(self, size=-1):
+        while len(self._buf) < size and self.produced < self.total_bytes:
+            block = self._next_part()
+            self.produced += len(block)
+            self._buf += block
+        out, self._buf = self._buf[:size], self._buf[size:]
+        return out
+
+
+MIXED_OBJ = b"""o mixed
+v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+v 2 0 0
+v 2 1 0
+v 3 0.5 0
+vt 0 0
+vt 1 1
+vn 0 0 1
+usemtl a
+f 1 2 3 4
+f 1 2 3
+f 2 5 6 7 3
+f 1/1 2/2 3/1
+f 1/1/1 2/2/1 3/1/1 4/2/1
+f 1//1 3//1 4//1
+f 5 6 7
+usemtl b
+f 4 3 6 7 5 2
+f -7 -6 -5
+"""
+
+
+def test_mixed_polygon_runs(tmp_path):
+    """Faces de tamanhos/formatos misturados na mesma sequência: igual a load_obj_multipart."""
+    path = tmp_path / "mixed.obj"
+    path.write_bytes(MIXED_OBJ.replace(b"f -7 -6 -5", b"f 1 2 3"))
+    reference = load_obj_multipart(str(path), load_textures=False)[0]["mixed"]
+
+    parts = dict(ObjStream(io.BytesIO(MIXED_OBJ), chunk_size=64, load_textures=False))
+    expected = reference.triangle_positions()
+    got = parts["mixed"].triangle_positions()
+    assert got.shape == expected.shape
+    assert np.array_equal(got, expected)
+    for mtl, faces in parts["mixed"].faces_by_material.items():
+        ref = reference.faces_by_material[mtl]
+        has_t = [all(v[1] is not None for v in face) for face in ref]
+        assert list((faces[:, :, 1] >= 0).all(axis=1)) == has_t, f"texcoords lost in '{mtl}'"
+
+
+def _measure(what, total_mb, budget_mb=STREAM_BUDGET_MB):
+    """Corre _run num processo limpo (o RSS máximo não traz nada de antes) -> dict."""
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), what, str(total_mb),
+                          str(budget_mb)], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _run(what, total_mb, budget_mb):
+    """Crescimento do RSS máximo a ler o gerador sozinho ("source") ou pelo ObjStream."""
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    src = SyntheticObj(total_mb << 20)
+    result = {}
+    if what == "source":
+        while src.read(STREAM_CHUNK_SIZE):
+            pass
+    else:
+        stream = ObjStream(src, max_memory=budget_mb << 20, load_textures=False)
+        parts = tris = 0
+        for name, mesh in stream:
+            parts += 1
+            tris += sum(len(f) for f in mesh.faces_by_material.values())
+            mesh.release()
+        result = {"parts": parts, "tris": tris, "src_parts": src.parts,
+                  "src_tris": src.triangles, "peak": stream.peak_bytes}
+    result["rss"] = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss0) * 1024
+    return result
+
+
+@pytest.mark.parametrize("total_mb", [STREAM_TEST_MB])
+def test_stream_synthetic(total_mb):
+    """
+    Nada se perde, o pico contado fica dentro do orçamento e o RSS do
+    processo (medido pelo SO) não passa desse pico mais o do gerador.
+    """
+    source = _measure("source", total_mb)
+    result = _measure("stream", total_mb)
+
+    assert result["parts"] == result["src_parts"], "parts lost"
+    assert result["tris"] == result["src_tris"], "triangles lost"
+    assert result["peak"] <= STREAM_BUDGET_MB << 20
+    assert result["rss"] <= result["peak"] + source["rss"] + RSS_SLACK, (
+        f"RSS grew {result['rss'] >> 20} MB, stream counted {result['peak'] >> 20} MB "
+        f"(+{source['rss'] >> 20} MB source)")
+
+
+if __name__ == "__main__":
+    # Processo filho de _measure: python test_obj_loader.py source|stream MB budget_MB
+    print(json.dumps(_run(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]))))